@@ -0,0 +1,97 @@
+"""
+Alert categories: required responder types and response-time targets.
+Rows of the alert_categories table are cached in memory (refreshed at startup);
+until they are loaded, or when the database is down, the defaults below mirror
+the seed rows in db/schema.sql. Alerts are matched to a category by category_id
+when they have one, otherwise by their type.
+"""
+import json
+from typing import Any, Dict, List, Optional
+
+# seed rows of db/schema.sql; response_time_target and auto_escalate_after are minutes
+DEFAULT_CATEGORIES = {
+    'Life Threatening Emergency': (5, 5, 10, ['paramedic', 'doctor', 'ambulance']),
+    'Medical Emergency': (4, 10, 20, ['paramedic', 'doctor']),
+    'Fire Emergency': (5, 8, 15, ['firefighter']),
+    'Crime in Progress': (4, 12, 25, ['police']),
+    'Natural Disaster': (5, 15, 30, ['volunteer', 'ngo', 'police']),
+    'Traffic Accident': (3, 15, 30, ['police', 'paramedic']),
+    'Safety Concern': (2, 30, 60, ['volunteer', 'police']),
+    'General Emergency': (3, 20, 40, ['volunteer', 'ngo']),
+}
+
+# alert type (AlertCreate.type and the frontend emergency buttons) -> category name
+ALERT_TYPE_CATEGORIES = {
+    'medical': 'Medical Emergency',
+    'fire': 'Fire Emergency',
+    'crime': 'Crime in Progress',
+    'disaster': 'Natural Disaster',
+    'accident': 'Traffic Accident',
+    'safety': 'Safety Concern',
+    'security': 'Safety Concern',
+    'general': 'General Emergency',
+}
+
+
+def _category(name: str, severity_level: int, response_time_target: Optional[int],
+              auto_escalate_after: Optional[int], required_responder_types, category_id=None) -> Dict[str, Any]:
+    if isinstance(required_responder_types, str):
+        try:
+            required_responder_types = json.loads(required_responder_types)
+        except ValueError:
+            required_responder_types = []
+    return {
+        'id': str(category_id) if category_id else None,
+        'name': name,
+        'severity_level': severity_level,
+        'response_time_target': response_time_target,
+        'auto_escalate_after': auto_escalate_after,
+        'required_responder_types': [str(t).lower() for t in required_responder_types or []],
+    }
+
+
+class AlertCategories:
+    def __init__(self):
+        self._by_name: Dict[str, Dict[str, Any]] = {}
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self.load_defaults()
+
+    def load_defaults(self):
+        self.load([_category(name, *values) for name, values in DEFAULT_CATEGORIES.items()])
+
+    def load(self, categories: List[Dict[str, Any]]):
+        self._by_name = {c['name']: c for c in categories}
+        self._by_id = {c['id']: c for c in categories if c.get('id')}
+
+    async def refresh(self, database) -> int:
+        """Reload from the alert_categories table; keeps the current rows if the query fails."""
+        try:
+            rows = await database.fetch_all('SELECT id, name, severity_level, response_time_target, auto_escalate_after, '
+                                            'required_responder_types FROM alert_categories')
+        except Exception as e:
+            print(f"⚠️ Could not load alert categories, using defaults: {e}")
+            return 0
+        if rows:
+            self.load([_category(row['name'], row['severity_level'], row['response_time_target'],
+                                 row['auto_escalate_after'], row['required_responder_types'], row['id'])
+                       for row in rows])
+        return len(rows)
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        return self._by_name.get(name)
+
+    def for_alert(self, alert: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        category_id = alert.get('category_id')
+        if category_id and str(category_id) in self._by_id:
+            return self._by_id[str(category_id)]
+        name = ALERT_TYPE_CATEGORIES.get(str(alert.get('type') or '').lower())
+        return self._by_name.get(name) if name else None
+
+    def required_responder_types(self, alert: Dict[str, Any]) -> List[str]:
+        """Responder types (or capabilities) that can take the alert; empty means anyone."""
+        category = self.for_alert(alert)
+        return list(category['required_responder_types']) if category else []
+
+
+# Process-wide category cache used by auto-assign
+alert_categories = AlertCategories()
@@ -0,0 +1,166 @@
+"""
+Write-behind persistence for the JSON alert store.
+Each change is appended to a journal (one JSON line per put/delete) by a
+background writer running the file I/O in a worker thread, so recording an
+alert costs the same no matter how many are stored. Every `compact_every`
+entries the writer folds the journal into a new snapshot, written to a temp
+file and swapped in with os.replace so a crash never leaves a truncated file.
+"""
+import asyncio
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from backend.serialization import dumps
+
+JOURNAL_COMPACT_EVERY = int(os.environ.get('ALERT_JOURNAL_COMPACT_EVERY', 1000))
+JOURNAL_FLUSH_INTERVAL = float(os.environ.get('ALERT_JOURNAL_FLUSH_INTERVAL', 0.5))
+
+
+def write_atomic(path: str, data: bytes):
+    """Replace path with data; readers see either the old file or the new one."""
+    tmp = f'{path}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class AlertJournal:
+    def __init__(self, snapshot_path: str, journal_path: Optional[str] = None,
+                 compact_every: int = JOURNAL_COMPACT_EVERY, flush_interval: float = JOURNAL_FLUSH_INTERVAL):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path or f'{snapshot_path}.journal'
+        self.compact_every = compact_every
+        self.flush_interval = flush_interval
+        # encoded form of every live alert, so compaction never re-reads the store
+        self._records: Dict[str, bytes] = {}
+        self._pending: List[bytes] = []
+        self._since_compaction = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    def load(self) -> Dict[str, Any]:
+        """Snapshot plus journal replay; a torn final journal line is ignored."""
+        alerts: Dict[str, Any] = {}
+        if os.path.exists(self.snapshot_path):
+            try:
+                with open(self.snapshot_path, 'r') as f:
+                    alerts = json.load(f)
+            except Exception as e:
+                print(f"Error loading alerts snapshot: {e}")
+        replayed = 0
+        if os.path.exists(self.journal_path):
+            valid_bytes = 0
+            with open(self.journal_path, 'rb') as f:
+                for line in f:
+                    try:
+                        if not line.endswith(b'\n'):
+                            raise ValueError('torn entry')
+                        entry = json.loads(line)
+                    except ValueError:
+                        break
+                    if entry.get('op') == 'delete':
+                        alerts.pop(entry['id'], None)
+                    else:
+                        alerts[entry['id']] = entry['alert']
+                    valid_bytes += len(line)
+                    replayed += 1
+            if valid_bytes < os.path.getsize(self.journal_path):
+                # drop the half-written tail so new entries start on a clean line
+                with open(self.journal_path, 'r+b') as f:
+                    f.truncate(valid_bytes)
+        self._records = {alert_id: dumps(alert) for alert_id, alert in alerts.items()}
+        self._since_compaction = replayed
+        return alerts
+
+    def put(self, alert_id, alert: Dict[str, Any]):
+        """Record the current state of one alert (encoded now, written later)."""
+        alert_id = str(alert_id)
+        encoded = dumps(alert)
+        self._records[alert_id] = encoded
+        self._append(b'{"op":"put","id":' + dumps(alert_id) + b',"alert":' + encoded + b'}\n')
+
+    def delete(self, alert_id):
+        alert_id = str(alert_id)
+        if self._records.pop(alert_id, None) is None:
+            return
+        self._append(b'{"op":"delete","id":' + dumps(alert_id) + b'}\n')
+
+    def _append(self, line: bytes):
+        self._pending.append(line)
+        if self._wakeup is not None and len(self._pending) >= self.compact_every:
+            self._wakeup.set()
+
+    def start(self):
+        """Start the background writer (call from the running event loop)."""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._writer())
+
+    async def _writer(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"⚠️ Alert journal flush failed: {e}")
+
+    async def flush(self):
+        """Append pending entries; compact once enough have accumulated."""
+        if not self._pending:
+            return
+        lines, self._pending = self._pending, []
+        self._since_compaction += len(lines)
+        # taken together with the drained lines, so the snapshot covers exactly them
+        records = dict(self._records) if self._since_compaction >= self.compact_every else None
+        try:
+            await asyncio.to_thread(self._write_lines, lines)
+        except Exception:
+            # keep the entries for the next attempt
+            self._pending[:0] = lines
+            self._since_compaction -= len(lines)
+            raise
+        if records is not None:
+            await asyncio.to_thread(self._compact, records)
+            self._since_compaction = 0
+
+    def _write_lines(self, lines: List[bytes]):
+        with open(self.journal_path, 'ab') as f:
+            f.write(b''.join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _compact(self, records: Dict[str, bytes]):
+        body = b','.join(dumps(alert_id) + b':' + encoded for alert_id, encoded in records.items())
+        write_atomic(self.snapshot_path, b'{' + body + b'}')
+        # entries written after `records` was taken are still pending, so the journal can go
+        write_atomic(self.journal_path, b'')
+
+    async def close(self):
+        """Flush everything and leave a compacted snapshot behind."""
+        self._closing = True
+        if self._task is not None:
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        lines, self._pending = self._pending, []
+        if lines:
+            await asyncio.to_thread(self._write_lines, lines)
+        await asyncio.to_thread(self._compact, dict(self._records))
+        self._since_compaction = 0
+        self._closing = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'alerts': len(self._records),
+            'pending': len(self._pending),
+            'since_compaction': self._since_compaction,
+            'compact_every': self.compact_every,
+        }
@@ -0,0 +1,180 @@
+"""
+Indexed in-memory alert store used when Postgres is unavailable.
+Keeps secondary indexes by status, by user_id and by resolution time (a sorted
+list searched with bisect), with timestamps parsed once when an alert is
+written instead of on every query. All writes go through put/update/delete so
+the indexes and the journal stay in step.
+"""
+import bisect
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+def parse_timestamp(value) -> Optional[float]:
+    """Epoch seconds for an ISO string or datetime; naive values are taken as UTC."""
+    if value is None or value == '':
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def resolved_timestamp(alert: Dict[str, Any]) -> Optional[float]:
+    return parse_timestamp(alert.get('resolved_at') or alert.get('marked_done_at'))
+
+
+class AlertStore:
+    def __init__(self, journal=None):
+        self.journal = journal
+        self._alerts: Dict[str, Dict[str, Any]] = {}
+        # id -> alert buckets (insertion-ordered), so queries skip the lookup in _alerts
+        self._by_status: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._by_user: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # (resolved epoch seconds, alert id, alert), ascending; ids are unique so the
+        # alert itself is never compared
+        self._resolved: List[Tuple[float, str, Dict[str, Any]]] = []
+        self._resolved_ts: Dict[str, float] = {}
+
+    # -- mapping-style reads -------------------------------------------------
+
+    def __len__(self):
+        return len(self._alerts)
+
+    def __contains__(self, alert_id) -> bool:
+        return str(alert_id) in self._alerts
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._alerts)
+
+    def __getitem__(self, alert_id) -> Dict[str, Any]:
+        return self._alerts[str(alert_id)]
+
+    def get(self, alert_id, default=None):
+        return self._alerts.get(str(alert_id), default)
+
+    def values(self):
+        return self._alerts.values()
+
+    def items(self):
+        return self._alerts.items()
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        return dict(self._alerts)
+
+    # -- writes ----------------------------------------------------------------
+
+    def load(self, alerts: Dict[str, Dict[str, Any]]):
+        """Replace the contents without journaling (e.g. after replaying the journal)."""
+        self._alerts.clear()
+        self._by_status.clear()
+        self._by_user.clear()
+        self._resolved_ts.clear()
+        self._resolved = []
+        for alert_id, alert in alerts.items():
+            self._index(str(alert_id), alert, sort=False)
+        self._resolved.sort()
+
+    def put(self, alert_id, alert: Dict[str, Any]) -> Dict[str, Any]:
+        alert_id = str(alert_id)
+        if alert_id in self._alerts:
+            self._unindex(alert_id)
+        self._index(alert_id, alert)
+        if self.journal is not None:
+            self.journal.put(alert_id, alert)
+        return alert
+
+    def update(self, alert_id, **fields) -> Optional[Dict[str, Any]]:
+        """Apply field changes to a stored alert and re-index it; None if unknown."""
+        alert = self._alerts.get(str(alert_id))
+        if alert is None:
+            return None
+        self._unindex(str(alert_id))
+        alert.update(fields)
+        self._index(str(alert_id), alert)
+        if self.journal is not None:
+            self.journal.put(alert_id, alert)
+        return alert
+
+    def delete(self, alert_id) -> Optional[Dict[str, Any]]:
+        alert_id = str(alert_id)
+        if alert_id not in self._alerts:
+            return None
+        alert = self._unindex(alert_id)
+        if self.journal is not None:
+            self.journal.delete(alert_id)
+        return alert
+
+    def _index(self, alert_id: str, alert: Dict[str, Any], sort: bool = True):
+        self._alerts[alert_id] = alert
+        self._by_status.setdefault(alert.get('status'), {})[alert_id] = alert
+        if alert.get('user_id') is not None:
+            self._by_user.setdefault(str(alert['user_id']), {})[alert_id] = alert
+        ts = resolved_timestamp(alert)
+        if ts is not None:
+            self._resolved_ts[alert_id] = ts
+            if sort:
+                bisect.insort(self._resolved, (ts, alert_id, alert))
+            else:
+                self._resolved.append((ts, alert_id, alert))
+
+    def _unindex(self, alert_id: str) -> Dict[str, Any]:
+        alert = self._alerts.pop(alert_id)
+        self._discard(self._by_status, alert.get('status'), alert_id)
+        if alert.get('user_id') is not None:
+            self._discard(self._by_user, str(alert['user_id']), alert_id)
+        ts = self._resolved_ts.pop(alert_id, None)
+        if ts is not None:
+            i = bisect.bisect_left(self._resolved, (ts, alert_id))
+            if i < len(self._resolved) and self._resolved[i][1] == alert_id:
+                del self._resolved[i]
+        return alert
+
+    @staticmethod
+    def _discard(index: Dict[Any, Dict[str, Dict[str, Any]]], key, alert_id: str):
+        bucket = index.get(key)
+        if bucket is not None:
+            bucket.pop(alert_id, None)
+            if not bucket:
+                del index[key]
+
+    # -- indexed queries ----------------------------------------------------------
+
+    def by_status(self, statuses: Iterable[str]) -> List[Dict[str, Any]]:
+        buckets = [self._by_status[s] for s in statuses if s in self._by_status]
+        if len(buckets) == 1:
+            return list(buckets[0].values())
+        return [alert for bucket in buckets for alert in bucket.values()]
+
+    def by_user(self, user_id, statuses: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        bucket = self._by_user.get(str(user_id), {})
+        if statuses is None:
+            return list(bucket.values())
+        statuses = set(statuses)
+        return [a for a in bucket.values() if a.get('status') in statuses]
+
+    def resolved_since(self, cutoff: datetime, user_id=None, statuses: Iterable[str] = ('resolved', 'done')) -> List[Dict[str, Any]]:
+        """Alerts resolved at or after cutoff, most recent first."""
+        threshold = parse_timestamp(cutoff)
+        statuses = set(statuses)
+        if user_id is not None:
+            # a user's own alerts are few: filter that bucket instead of the time range
+            hits = [(self._resolved_ts[i], i, a) for i, a in self._by_user.get(str(user_id), {}).items()
+                    if self._resolved_ts.get(i, -1.0) >= threshold]
+            hits.sort(key=lambda hit: hit[:2], reverse=True)
+        else:
+            start = bisect.bisect_left(self._resolved, (threshold, ''))
+            hits = reversed(self._resolved[start:])
+        return [a for _, _, a in hits if a.get('status') in statuses]
+
+    def resolved_before(self, cutoff: datetime, statuses: Iterable[str] = ('resolved', 'done')) -> List[str]:
+        """Ids of alerts resolved before cutoff."""
+        end = bisect.bisect_left(self._resolved, (parse_timestamp(cutoff), ''))
+        statuses = set(statuses)
+        return [alert_id for _, alert_id, a in self._resolved[:end] if a.get('status') in statuses]
@@ -1,38 +1,58 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends, HTTPException, UploadFile, File, Body
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends, HTTPException, UploadFile, File, Body, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer
 from fastapi.responses import FileResponse
-from fastapi.staticfiles import StaticFiles
 from typing import List
 from datetime import datetime, timedelta
 import uvicorn
+import os
+import time
 from backend.auth import create_access_token, verify_token, mock_send_otp, verify_otp_code
 from backend.schemas import UserCreate, OTPRequest, OTPVerify, AlertCreate, AlertOut, AlertStatusUpdate, EmergencyContactCreate
 import uuid
 import asyncio
 from backend.db import database
-from backend.utils import pick_nearest_responder, estimate_eta_seconds
+from backend.utils import estimate_eta_seconds, rank_candidates
+from backend.eta_provider import eta_provider
+from backend.eta_cache import cache_stats
+from backend.broadcaster import broadcaster, Subscription, route_for
+from backend.responder_registry import responder_registry
+from backend.alert_categories import alert_categories
+from backend.change_feed import change_feed, OP_UPSERT, OP_PATCH, OP_DELETE
+from backend.alert_store import AlertStore, parse_timestamp
+from backend.pagination import DEFAULT_PAGE_SIZE, alert_columns, page_size, fetch_limit, keyset_clause, split_page, page_records
+from backend.serialization import encode_row, encode_rows, dumps, FastJSONResponse
+from backend.media_upload import receive_media_upload
+from backend.job_scheduler import job_scheduler
+from backend.batch_assign import AssignmentBatcher, candidate_eta_matrix, plan_assignments, reserve_assignments
+from backend.responder_reservation import responder_reservations, HEARTBEAT_SQL
+from backend.escalation import EscalationEngine, ESCALATABLE_STATUSES, ESCALATION_JOB
+from backend.responder_registry import DEFAULT_MAX_DISTANCE_M
+from backend.media_stats import MEDIA_RECONCILE_INTERVAL
 from backend.redis_client import connect_redis, disconnect_redis, publish
 from backend import redis_client as redis_client_module
 from backend.media_service import (
     save_photo,
     save_audio,
-    cleanup_expired_media,
+    media_expiry,
     get_media_for_alert,
     get_all_media_stats,
-    PHOTOS_DIR,
-    AUDIO_DIR
+    reconcile_media_stats,
+    shutdown_image_pool,
+    MediaTooLarge,
+    media_file_path,
+    media_etag,
+    MEDIA_CACHE_CONTROL,
 )
 from backend.demo_data import (
     initialize_demo_data, 
-    load_alerts, 
-    save_alerts, 
-    load_users, 
     save_users,
     get_user_by_phone,
     is_demo_user,
     get_demo_otp,
     get_user_role,
+    alert_journal,
+    users_repository,
     DEMO_USERS,
     get_user_emergency_contacts,
     add_emergency_contact,
@@ -41,7 +61,7 @@ from backend.demo_data import (
 import json
 
 
-app = FastAPI(title="SOS Backend Prototype")
+app = FastAPI(default_response_class=FastJSONResponse, title="SOS Backend Prototype")
 
 app.add_middleware(
     CORSMiddleware,
@@ -49,22 +69,34 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
-# Mount media directories for serving uploaded files
-import os
-if os.path.exists(PHOTOS_DIR):
-    app.mount("/media/photos", StaticFiles(directory=PHOTOS_DIR), name="photos")
-if os.path.exists(AUDIO_DIR):
-    app.mount("/media/audio", StaticFiles(directory=AUDIO_DIR), name="audio")
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
 # Load persistent data on startup
-USERS = {}
-ALERTS = {}
-CONNECTED_WEBSOCKETS: List[WebSocket] = []
-RESPONDERS = {}
+USERS = users_repository
+ALERTS = AlertStore(journal=alert_journal)
+# Identifies this worker's messages on the shared Redis channel
+INSTANCE_ID = str(uuid.uuid4())
+# Strong references to fire-and-forget tasks so they are not garbage collected
+BACKGROUND_TASKS = set()
+
+# Number of nearest responders considered for ETA ranking
+AUTO_ASSIGN_CANDIDATES = 20
+# Seconds a new alert waits for a manual accept before it is auto-assigned
+AUTO_ASSIGN_DELAY = 30
+# Alert statuses still waiting for a responder
+UNASSIGNED_STATUSES = ('pending', 'open', 'active')
+# Search radius for auto-assign; each escalation level multiplies it by ESCALATION_RADIUS_FACTOR,
+# up to ESCALATION_MAX_RADIUS_M
+AUTO_ASSIGN_RADIUS_M = float(os.environ.get('AUTO_ASSIGN_RADIUS_M', DEFAULT_MAX_DISTANCE_M))
+ESCALATION_RADIUS_FACTOR = 2
+ESCALATION_MAX_RADIUS_M = float(os.environ.get('ESCALATION_MAX_RADIUS_M', 4 * AUTO_ASSIGN_RADIUS_M))
+# Minimum seconds between registry reloads from the responders table
+RESPONDER_RELOAD_INTERVAL = float(os.environ.get('RESPONDER_RELOAD_INTERVAL', 60))
+OPEN_STATUSES = ('pending', 'assigned', 'in_progress')
 
 
 def validate_phone_number(phone: str) -> tuple[bool, str]:
@@ -143,8 +175,6 @@ async def verify_otp(v: OTPVerify):
         user_id = demo_user["id"]
         user_role = demo_user["role"]
         user_name = demo_user.get("name", "User")
-        # Store in USERS dict
-        USERS[v.phone] = demo_user
     else:
         # create or fetch user in DB
         select_q = "SELECT id FROM users WHERE phone = :phone"
@@ -162,14 +192,14 @@ async def verify_otp(v: OTPVerify):
             try:
                 await database.execute(insert_q, values={"id": user_id, "phone": v.phone})
             except Exception:
-                # Fallback to in-memory
-                USERS[v.phone] = {
+                # Fallback to the users file (saved on shutdown)
+                USERS.put(v.phone, {
                     "id": user_id,
                     "phone": v.phone,
                     "name": user_name,
                     "role": user_role,
                     "is_verified": True
-                }
+                })
         else:
             user_id = str(user[0])
             user_role = "citizen"
@@ -208,6 +238,7 @@ async def upload_media(
     """
     try:
         saved_photos = []
+        saved_thumbnails = []
         saved_audio = None
         
         # Save photos
@@ -215,6 +246,7 @@ async def upload_media(
             if photo_data:
                 photo_info = await save_photo(photo_data, alert_id)
                 saved_photos.append(photo_info['url'])
+                saved_thumbnails.append(photo_info['thumbnail_url'])
         
         # Save audio
         if audio:
@@ -224,13 +256,42 @@ async def upload_media(
         return {
             'status': 'success',
             'photo_urls': saved_photos,
+            'thumbnail_urls': saved_thumbnails,
             'audio_url': saved_audio,
             'message': f'Uploaded {len(saved_photos)} photos and {"1 audio" if saved_audio else "no audio"}'
         }
+    except MediaTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post('/alerts/{alert_id}/media')
+async def upload_alert_media(alert_id: str, request: Request, user=Depends(get_current_user)):
+    """
+    Upload photos and audio for an alert as multipart/form-data
+    (fields "photos", repeatable, and "audio", at most one); files are streamed to disk
+    """
+    try:
+        saved = await receive_media_upload(request.stream(), request.headers.get('content-type', ''), alert_id)
+    except MediaTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    photo_urls = [info['url'] for info in saved['photo']]
+    audio_url = saved['audio'][0]['url'] if saved['audio'] else None
+    return {
+        'status': 'success',
+        'photo_urls': photo_urls,
+        'thumbnail_urls': [info['thumbnail_url'] for info in saved['photo']],
+        'audio_url': audio_url,
+        'photos_saved': len(photo_urls),
+        'audio_saved': audio_url is not None,
+        'message': f'Uploaded {len(photo_urls)} photos and {"1 audio" if audio_url else "no audio"}'
+    }
+
+
 @app.get('/alerts/{alert_id}/media')
 async def get_alert_media(alert_id: str, user=Depends(get_current_user)):
     """Get all media files for an alert"""
@@ -241,6 +302,32 @@ async def get_alert_media(alert_id: str, user=Depends(get_current_user)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get('/media/{collection}/{filename}')
+async def serve_media(collection: str, filename: str, request: Request):
+    """
+    Serve an uploaded photo or audio clip. Media never changes once written, so
+    responses are cacheable for good, revalidate by ETag (304) and honour Range
+    requests (206) for audio scrubbing; FileResponse uses the server's
+    zero-copy pathsend when available.
+    """
+    path = media_file_path(collection, filename)
+    if path is None:
+        raise HTTPException(status_code=404, detail='Media not found')
+    try:
+        stat_result = await asyncio.to_thread(os.stat, path)
+    except OSError:
+        raise HTTPException(status_code=404, detail='Media not found')
+    
+    etag = media_etag(filename, stat_result)
+    headers = {'ETag': etag, 'Cache-Control': MEDIA_CACHE_CONTROL}
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match:
+        candidates = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+        if etag in candidates or '*' in candidates:
+            return Response(status_code=304, headers=headers)
+    return FileResponse(path, stat_result=stat_result, headers=headers)
+
+
 @app.get('/media/stats')
 async def get_media_stats(user=Depends(get_current_user)):
     """Get statistics about stored media (admin only)"""
@@ -254,6 +341,14 @@ async def get_media_stats(user=Depends(get_current_user)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get('/eta/cache/stats')
+async def get_eta_cache_stats(user=Depends(get_current_user)):
+    """Get ETA cache hit/miss/eviction counters (admin only)"""
+    if user.get('role') != 'admin':
+        raise HTTPException(status_code=403, detail='Admin access required')
+    return cache_stats()
+
+
 @app.post('/alerts', response_model=AlertOut)
 async def create_alert(a: AlertCreate, user=Depends(get_current_user)):
     alert_id = str(uuid.uuid4())
@@ -285,151 +380,250 @@ async def create_alert(a: AlertCreate, user=Depends(get_current_user)):
         print(f"✅ Alert {alert_id} successfully saved to database")
     except Exception as e:
         print(f"⚠️ Database error, using fallback memory storage: {e}")
-        # fallback to in-memory store for demo
-        ALERTS[alert_id] = alert
     
-    # Also save to persistent storage
-    ALERTS[alert_id] = alert
-    save_alerts(ALERTS)
-
-    # broadcast to connected websockets
-    await broadcast_alert(alert)
-    # schedule auto-assign after 30s in background
-    asyncio.create_task(schedule_auto_assign(alert_id))
+    # Also keep in the in-memory store (journaled to disk off the event loop)
+    ALERTS.put(alert_id, alert)
+
+    # broadcast to connected websockets without holding up the response
+    await record_alert_change(OP_UPSERT, alert_id, dict(alert))
+    run_in_background(broadcast_alert(dict(alert)))
+    # auto-assign after AUTO_ASSIGN_DELAY unless someone accepts first
+    await schedule_auto_assign(alert_id)
+    await escalation_engine.track(alert)
     return alert
 
 
-async def schedule_auto_assign(alert_id: str, delay: int = 30):
-    await asyncio.sleep(delay)
-    # fetch alert from DB or memory
-    alert = ALERTS.get(alert_id)
-    if not alert:
-        try:
-            row = await database.fetch_one('SELECT id, location, status FROM alerts WHERE id = :id', values={'id': alert_id})
-            if not row:
-                return
-            alert = dict(row)
-            alert['location'] = alert.get('location')
-        except Exception:
-            return
+async def schedule_auto_assign(alert_id: str, delay: float = AUTO_ASSIGN_DELAY, replace: bool = True):
+    """Queue a durable auto-assign job for the alert (replaces an earlier one unless replace=False)."""
+    await job_scheduler.schedule('auto_assign', alert_id, delay=delay, replace=replace)
+
+
+async def reschedule_pending_auto_assign():
+    """Queue auto-assign for unassigned in-memory alerts whose job may have been lost with the last process."""
+    now = time.time()
+    count = 0
+    for alert in ALERTS.by_status(UNASSIGNED_STATUSES):
+        if alert.get('assigned_to'):
+            continue
+        created = parse_timestamp(alert.get('created_at')) or now
+        await schedule_auto_assign(alert['id'], delay=max(created + AUTO_ASSIGN_DELAY - now, 0), replace=False)
+        count += 1
+    return count
 
-    if alert.get('status') not in ['open', 'active']:
-        return
 
-    # gather available responders (simple: RESPONDERS in-memory or DB responders with status available)
-    candidates = []
-    # try DB first
+async def fetch_alert(alert_id: str):
+    """The alert from memory, or the fields assignment needs from the DB; None if unknown."""
+    alert = ALERTS.get(alert_id)
+    if alert:
+        return alert
     try:
-        rows = await database.fetch_all("SELECT id, user_id, responder_type, status, last_location FROM responders WHERE status = 'available'")
-        for r in rows:
-            candidates.append(dict(r))
+        row = await database.fetch_one('SELECT id, type, category_id, location, status, severity, assigned_to, created_at '
+                                       'FROM alerts WHERE id = :id', values={'id': alert_id})
     except Exception:
-        # fallback to in-memory
-        for r in RESPONDERS.values():
-            if r.get('status') == 'available':
-                candidates.append(r)
+        return None
+    return dict(row) if row else None
+
 
-    if not candidates:
+async def auto_assign(alert_id: str, payload: dict = None):
+    """Job handler: queue the alert for the next assignment batch if it is still unassigned."""
+    alert = await fetch_alert(alert_id)
+    if not alert or alert.get('status') not in UNASSIGNED_STATUSES:
         return
+    await assignment_batcher.submit(alert)
 
-    # pick by ETA
-    loc = alert.get('location')
-    candidate = None
-    best_eta = None
-    from .utils import estimate_eta_seconds
-    try:
-        for c in candidates:
-            rloc = c.get('last_location') or {}
-            if not rloc.get('lat'):
-                continue
-            eta = estimate_eta_seconds({'lat': rloc.get('lat'), 'lng': rloc.get('lng')}, {'lat': loc.get('lat'), 'lng': loc.get('lng')})
-            if eta is None:
-                # fallback to haversine via pick_nearest_responder
-                continue
-            if best_eta is None or eta < best_eta:
-                best_eta = eta
-                candidate = c
-    except Exception:
-        candidate = pick_nearest_responder(loc, candidates)
 
-    if not candidate:
+async def assign_alert_batch(alerts: list, radius_m: float = None, k: int = AUTO_ASSIGN_CANDIDATES,
+                             any_type: bool = False, exclude=()):
+    """
+    Assign responders to every alert of a batch jointly, weighted by severity.
+    Escalations widen radius_m and k, may drop the category's responder types
+    (any_type) and skip the responders in exclude.
+    """
+    radius_m = AUTO_ASSIGN_RADIUS_M if radius_m is None else radius_m
+    # an alert may have been accepted while it waited for the batch
+    alerts = [a for a in alerts if a.get('status') in UNASSIGNED_STATUSES]
+    locs = []
+    for alert in alerts:
+        loc = alert.get('location')
+        if isinstance(loc, str):
+            loc = json.loads(loc)
+        locs.append(loc or {})
+
+    # responder types (or capabilities) each alert's category calls for; None means anyone
+    required = [None if any_type else alert_categories.required_responder_types(alert) or None for alert in alerts]
+
+    def nearest_candidates():
+        # the nearest qualified available responders of each alert, from the spatial index
+        candidates = []
+        for loc, tags in zip(locs, required):
+            if loc.get('lat') is None or loc.get('lng') is None:
+                candidates.append([])
+                continue
+            nearest = responder_registry.nearest(loc['lat'], loc['lng'], k=k, max_distance_m=radius_m, tags=tags)
+            if not nearest and tags is not None:
+                # nobody of the required types in range: any responder beats none
+                nearest = responder_registry.nearest(loc['lat'], loc['lng'], k=k, max_distance_m=radius_m)
+            candidates.append([r for r, _ in nearest if r['id'] not in exclude])
+        return candidates
+
+    candidates = nearest_candidates()
+    if not all(candidates) and await refresh_responder_registry():
+        # the registry may have been cold (started after heartbeats went to other instances)
+        candidates = nearest_candidates()
+    if not any(candidates):
         return
 
-    responder_id = candidate.get('id')
+    responders, etas = await candidate_eta_matrix(locs, candidates, eta_provider)
+    severities = [alert.get('severity') for alert in alerts]
+
+    async def reserve(i, j):
+        # other workers may have taken the responder since the candidates were read
+        return await responder_reservations.reserve(responders[j].get('id'), alerts[i]['id'])
+
+    pairs = await reserve_assignments(plan_assignments(etas, severities), etas, severities, reserve)
+    for i, j in pairs:
+        await assign_responder(alerts[i], responders[j].get('id'))
+
+
+async def assign_responder(alert: dict, responder_id: str):
+    alert_id = alert['id']
     # assign in DB
     try:
         await database.execute('UPDATE alerts SET status = :status, assigned_to = :responder WHERE id = :id', values={'status': 'assigned', 'responder': responder_id, 'id': alert_id})
         # fetch full alert
         row = await database.fetch_one('SELECT id, user_id, type, status, location, assigned_to FROM alerts WHERE id = :id', values={'id': alert_id})
-        to_broadcast = dict(row)
+        to_broadcast = encode_row(row)
     except Exception:
         # fallback
-        alert['status'] = 'assigned'
-        alert['assigned_to'] = responder_id
+        if alert_id in ALERTS:
+            ALERTS.update(alert_id, status='assigned', assigned_to=responder_id)
+        else:
+            alert.update({'status': 'assigned', 'assigned_to': responder_id})
         to_broadcast = alert
 
     # notify via websocket with full alert
+    await record_alert_change(OP_PATCH, alert_id, {'status': 'assigned', 'assigned_to': responder_id})
     await broadcast_alert(to_broadcast)
 
 
+async def escalate_alert(alert: dict, level: int):
+    """Escalation handler: widen the search, re-run assignment and record an 'escalated' event."""
+    alert_id = str(alert['id'])
+    radius_m = min(AUTO_ASSIGN_RADIUS_M * ESCALATION_RADIUS_FACTOR ** level,
+                   max(ESCALATION_MAX_RADIUS_M, AUTO_ASSIGN_RADIUS_M))
+    previous = str(alert['assigned_to']) if alert.get('status') == 'assigned' and alert.get('assigned_to') else None
+    if previous:
+        # assigned but never accepted: free the alert for someone else
+        try:
+            await database.execute("UPDATE alerts SET status = 'open', assigned_to = NULL, updated_at = now() "
+                                   "WHERE id = :id AND status = 'assigned'", values={'id': alert_id})
+        except Exception:
+            pass
+        if alert_id in ALERTS:
+            ALERTS.update(alert_id, status='open', assigned_to=None)
+        alert.update({'status': 'open', 'assigned_to': None})
+        await responder_reservations.release(previous, alert_id)
+
+    await assign_alert_batch([alert], radius_m=radius_m, k=AUTO_ASSIGN_CANDIDATES * (level + 1),
+                             any_type=level >= 2, exclude={previous} if previous else ())
+
+    metadata = {'level': level, 'radius_m': radius_m, 'reassigned_from': previous}
+    try:
+        await database.execute("INSERT INTO alert_events (alert_id, event_type, metadata) VALUES (:alert_id, 'escalated', :metadata)",
+                               values={'alert_id': alert_id, 'metadata': json.dumps(metadata)})
+    except Exception as e:
+        print(f"⚠️ Could not record escalation of {alert_id}: {e}")
+    if alert_id in ALERTS:
+        ALERTS.update(alert_id, escalation_level=level)
+    print(f"🚨 Alert {alert_id} escalated to level {level} (search radius {radius_m / 1000:.0f} km)")
+
+    await record_alert_change(OP_PATCH, alert_id, {'escalation_level': level})
+    # its own message type, routed by the stored alert's type, status and location
+    await publish_message({
+        "type": "alert_escalated",
+        "alert_id": alert_id,
+        "escalation_level": level,
+        "reassigned_from": previous,
+    }, key=alert_id, route=route_for(ALERTS.get(alert_id) or alert))
+
+
+# Due alerts are collected for AUTO_ASSIGN_BATCH_WINDOW seconds and assigned together
+assignment_batcher = AssignmentBatcher(assign_alert_batch)
+# SLA timers from the alert's category; each missed deadline escalates once
+escalation_engine = EscalationEngine(job_scheduler, alert_categories, fetch_alert, escalate_alert)
+
+
+async def pick_best_by_eta(loc: dict, candidates: list):
+    """Return (responder, eta_seconds) with the lowest ETA to loc, or (None, None)."""
+    # vectorized straight-line ranking of every candidate in one pass
+    ranked = rank_candidates(loc, candidates)
+    if not ranked:
+        return None, None
+    candidate, _, best_eta = ranked[0]
+    if eta_provider.backend.remote:
+        # refine with road ETAs, fetched for all candidates in one matrix request
+        origins = [{'lat': c['last_location']['lat'], 'lng': c['last_location']['lng']} for c, _, _ in ranked]
+        etas = await eta_provider.eta_matrix(origins, {'lat': loc.get('lat'), 'lng': loc.get('lng')})
+        best_eta = None
+        for (c, _, _), eta in zip(ranked, etas):
+            if best_eta is None or eta < best_eta:
+                best_eta = eta
+                candidate = c
+    return candidate, best_eta
+
+
 @app.get('/alerts/user/recent')
-async def get_user_recent_alerts(user=Depends(get_current_user)):
-    """Get user's own resolved alerts from the last 24 hours."""
+async def get_user_recent_alerts(cursor: str = None, limit: int = None, fields: str = None,
+                                 user=Depends(get_current_user)):
+    """Get user's own resolved alerts from the last 24 hours, most recent first (see X-Next-Cursor)."""
+    limit = page_size(limit, default=20)
+    values = {"user_id": user.get('sub'), "cutoff_time": datetime.utcnow() - timedelta(hours=24),
+              "limit": fetch_limit(limit)}
+    try:
+        columns = alert_columns(fields, required=('id', 'created_at', 'resolved_at', 'marked_done_at'))
+        after = keyset_clause(cursor, "COALESCE(a.resolved_at, a.marked_done_at)", "a.id", values)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     try:
         user_id = user.get('sub')
-        cutoff_time = datetime.utcnow() - timedelta(hours=24)
         
-        query = """SELECT a.*, u.phone as user_phone, u.name as user_name
+        query = f"""SELECT {columns}, u.phone as user_phone, u.name as user_name
                    FROM alerts a
                    LEFT JOIN users u ON a.user_id = u.id
                    WHERE a.user_id = :user_id
                      AND a.status IN ('resolved', 'done')
-                     AND (a.resolved_at >= :cutoff_time OR a.marked_done_at >= :cutoff_time)
-                   ORDER BY COALESCE(a.resolved_at, a.marked_done_at) DESC
-                   LIMIT 20"""
-        
-        rows = await database.fetch_all(query, values={
-            "user_id": user_id,
-            "cutoff_time": cutoff_time
-        })
-        alerts = [dict(row) for row in rows]
+                     AND (a.resolved_at >= :cutoff_time OR a.marked_done_at >= :cutoff_time){after}
+                   ORDER BY COALESCE(a.resolved_at, a.marked_done_at) DESC, a.id DESC
+                   LIMIT :limit"""
         
-        # Convert datetime objects to ISO strings
-        for alert in alerts:
-            for field in ['created_at', 'updated_at', 'resolved_at', 'marked_done_at']:
-                if alert.get(field):
-                    alert[field] = alert[field].isoformat()
+        rows = await database.fetch_all(query, values=values)
+        alerts, next_cursor = split_page(rows, limit, ('resolved_at', 'marked_done_at'))
+        alerts = encode_rows(alerts)
         
         print(f"✅ Retrieved {len(alerts)} recent resolved alerts for user {user_id}")
-        return alerts
+        return FastJSONResponse(alerts, headers={"X-Next-Cursor": next_cursor} if next_cursor else None)
     except Exception as e:
         print(f"⚠️ Database error: {e}")
         # Fallback to in-memory
-        user_id = user.get('sub')
         cutoff_time = datetime.utcnow() - timedelta(hours=24)
-        recent_alerts = []
-        for alert in ALERTS.values():
-            if alert.get('user_id') == user_id and alert.get('status') in ['resolved', 'done']:
-                resolved_at = alert.get('resolved_at') or alert.get('marked_done_at')
-                if resolved_at:
-                    try:
-                        resolved_dt = datetime.fromisoformat(resolved_at.replace('Z', '+00:00'))
-                        if resolved_dt >= cutoff_time:
-                            recent_alerts.append(alert)
-                    except:
-                        recent_alerts.append(alert)
-        return recent_alerts
+        alerts, next_cursor = page_records(ALERTS.resolved_since(cutoff_time, user_id=user.get('sub')),
+                                           cursor, limit, ('resolved_at', 'marked_done_at'))
+        return FastJSONResponse(alerts, headers={"X-Next-Cursor": next_cursor} if next_cursor else None)
 
 
 @app.get('/alerts/user/dashboard')
-async def get_user_dashboard_alerts(user=Depends(get_current_user)):
+async def get_user_dashboard_alerts(fields: str = None, user=Depends(get_current_user)):
     """Get user's alerts organized by status for dashboard display."""
+    try:
+        columns = alert_columns(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     try:
         user_id = user.get('sub')
         cutoff_time = datetime.utcnow() - timedelta(hours=24)
         
         # Get pending/active alerts (not time limited)
-        pending_query = """SELECT a.*, u.phone as user_phone, u.name as user_name
+        pending_query = f"""SELECT {columns}, u.phone as user_phone, u.name as user_name
                           FROM alerts a
                           LEFT JOIN users u ON a.user_id = u.id
                           WHERE a.user_id = :user_id
@@ -438,7 +632,7 @@ async def get_user_dashboard_alerts(user=Depends(get_current_user)):
                           LIMIT 10"""
         
         # Get resolved alerts (last 24 hours)
-        resolved_query = """SELECT a.*, u.phone as user_phone, u.name as user_name
+        resolved_query = f"""SELECT {columns}, u.phone as user_phone, u.name as user_name
                            FROM alerts a
                            LEFT JOIN users u ON a.user_id = u.id
                            WHERE a.user_id = :user_id
@@ -453,15 +647,8 @@ async def get_user_dashboard_alerts(user=Depends(get_current_user)):
             "cutoff_time": cutoff_time
         })
         
-        pending_alerts = [dict(row) for row in pending_rows]
-        resolved_alerts = [dict(row) for row in resolved_rows]
-        
-        # Convert datetime objects to ISO strings
-        for alerts_list in [pending_alerts, resolved_alerts]:
-            for alert in alerts_list:
-                for field in ['created_at', 'updated_at', 'resolved_at', 'marked_done_at']:
-                    if alert.get(field):
-                        alert[field] = alert[field].isoformat()
+        pending_alerts = encode_rows(pending_rows)
+        resolved_alerts = encode_rows(resolved_rows)
         
         result = {
             "pending": pending_alerts,
@@ -481,23 +668,8 @@ async def get_user_dashboard_alerts(user=Depends(get_current_user)):
         user_id = user.get('sub')
         cutoff_time = datetime.utcnow() - timedelta(hours=24)
         
-        pending_alerts = []
-        resolved_alerts = []
-        
-        for alert in ALERTS.values():
-            if alert.get('user_id') == user_id:
-                if alert.get('status') in ['pending', 'assigned', 'in_progress']:
-                    pending_alerts.append(alert)
-                elif alert.get('status') in ['resolved', 'done']:
-                    resolved_at = alert.get('resolved_at') or alert.get('marked_done_at')
-                    if resolved_at:
-                        try:
-                            resolved_dt = datetime.fromisoformat(resolved_at.replace('Z', '+00:00'))
-                            if resolved_dt >= cutoff_time:
-                                resolved_alerts.append(alert)
-                        except Exception as parse_error:
-                            # If date parsing fails, include the alert anyway
-                            resolved_alerts.append(alert)
+        pending_alerts = ALERTS.by_user(user_id, OPEN_STATUSES)
+        resolved_alerts = ALERTS.resolved_since(cutoff_time, user_id=user_id)
         
         return {
             "pending": pending_alerts[:10],
@@ -510,103 +682,137 @@ async def get_user_dashboard_alerts(user=Depends(get_current_user)):
 
 
 @app.get('/alerts')
-async def list_alerts(status: str = "pending"):
-    """Get all alerts with optional status filter. Defaults to pending alerts only."""
+async def list_alerts(status: str = "pending", cursor: str = None, limit: int = None, fields: str = None):
+    """
+    Get alerts with optional status filter. Defaults to pending alerts only.
+    Newest first, all of them unless limit or cursor is given; the next page's
+    cursor is returned in the X-Next-Cursor header.
+    """
+    limit = page_size(limit, default=DEFAULT_PAGE_SIZE if cursor else None)
+    values = {"limit": fetch_limit(limit)}
+    try:
+        columns = alert_columns(fields)
+        after = keyset_clause(cursor, "a.created_at", "a.id", values)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     try:
         # Always fetch from database for single source of truth
-        if status == "pending":
-            query = "SELECT * FROM alerts WHERE status IN ('pending', 'assigned', 'in_progress') ORDER BY created_at DESC"
-        else:
-            query = "SELECT * FROM alerts ORDER BY created_at DESC"
+        where = "a.status IN ('pending', 'assigned', 'in_progress')" if status == "pending" else "TRUE"
+        query = f"""SELECT {columns} FROM alerts a
+                    WHERE {where}{after}
+                    ORDER BY a.created_at DESC, a.id DESC
+                    LIMIT :limit"""
         
-        rows = await database.fetch_all(query)
-        alerts = [dict(row) for row in rows]
+        rows = await database.fetch_all(query, values=values)
+        alerts, next_cursor = split_page(rows, limit)
+        alerts = encode_rows(alerts)
         print(f"✅ Retrieved {len(alerts)} alerts from database (status filter: {status})")
         
-        # Convert datetime objects to ISO strings for JSON serialization
-        for alert in alerts:
-            for field in ['created_at', 'updated_at', 'resolved_at', 'marked_done_at', 'auto_delete_at']:
-                if alert.get(field):
-                    alert[field] = alert[field].isoformat()
-        
-        return alerts
+        return FastJSONResponse(alerts, headers={"X-Next-Cursor": next_cursor} if next_cursor else None)
     except Exception as e:
         print(f"⚠️ Database error, using fallback memory storage: {e}")
         # Fallback to in-memory storage
-        if status == "pending":
-            return [alert for alert in ALERTS.values() if alert.get('status') in ['pending', 'assigned', 'in_progress']]
-        return list(ALERTS.values())
+        alerts = ALERTS.by_status(OPEN_STATUSES) if status == "pending" else list(ALERTS.values())
+        alerts, next_cursor = page_records(alerts, cursor, limit)
+        return FastJSONResponse(alerts, headers={"X-Next-Cursor": next_cursor} if next_cursor else None)
+
+
+@app.get('/alerts/changes')
+async def get_alert_changes(request: Request, response: Response, cursor: str = None, status: str = None,
+                            user=Depends(get_current_user)):
+    """
+    Delta sync: alerts created, updated or deleted since `cursor`.
+    Served from the change feed (shared through Redis, no DB query), so a cursor
+    is valid on every instance. When nothing changed and the client sends the
+    last ETag in If-None-Match, answers 304. `reset: true` means the
+    cursor is unknown or too old and the client should reload GET /alerts once.
+    With status=pending, alerts that leave the open states are reported as deletions.
+    """
+    changes, next_cursor = await change_feed.since(cursor)
+    etag = f'"{next_cursor}"'
+    if changes == [] and request.headers.get('if-none-match') == etag:
+        return Response(status_code=304, headers={'ETag': etag})
+    response.headers['ETag'] = etag
+    if changes is None:
+        return {"cursor": next_cursor, "reset": True, "changes": []}
+    if status == "pending":
+        for change in changes:
+            new_status = (change.get('alert') or {}).get('status')
+            if change['op'] != OP_DELETE and new_status is not None and new_status not in OPEN_STATUSES:
+                change['op'] = OP_DELETE
+                change['alert'] = None
+    return {"cursor": next_cursor, "reset": False, "changes": changes}
 
 
 @app.get('/alerts/open')
-async def get_open_alerts(user=Depends(get_current_user)):
-    """Get all pending/active alerts for admin dashboard."""
+async def get_open_alerts(cursor: str = None, limit: int = None, fields: str = None,
+                          user=Depends(get_current_user)):
+    """Get pending/active alerts for admin dashboard, newest first; paged when limit or cursor is given (see X-Next-Cursor)."""
+    limit = page_size(limit, default=DEFAULT_PAGE_SIZE if cursor else None)
+    values = {"limit": fetch_limit(limit)}
     try:
-        query = """SELECT a.*, u.phone as user_phone, u.name as user_name
+        columns = alert_columns(fields)
+        after = keyset_clause(cursor, "a.created_at", "a.id", values)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        query = f"""SELECT {columns}, u.phone as user_phone, u.name as user_name
                    FROM alerts a
                    LEFT JOIN users u ON a.user_id = u.id
-                   WHERE a.status IN ('pending', 'assigned', 'in_progress')
-                   ORDER BY a.created_at DESC"""
-        
-        rows = await database.fetch_all(query)
-        alerts = [dict(row) for row in rows]
+                   WHERE a.status IN ('pending', 'assigned', 'in_progress'){after}
+                   ORDER BY a.created_at DESC, a.id DESC
+                   LIMIT :limit"""
         
-        # Convert datetime objects to ISO strings
-        for alert in alerts:
-            for field in ['created_at', 'updated_at', 'resolved_at', 'marked_done_at']:
-                if alert.get(field):
-                    alert[field] = alert[field].isoformat()
+        rows = await database.fetch_all(query, values=values)
+        alerts, next_cursor = split_page(rows, limit)
+        alerts = encode_rows(alerts)
         
         print(f"✅ Retrieved {len(alerts)} active alerts for admin")
-        return alerts
+        return FastJSONResponse(alerts, headers={"X-Next-Cursor": next_cursor} if next_cursor else None)
     except Exception as e:
         print(f"⚠️ Database error: {e}")
         # Fallback to in-memory
-        return [alert for alert in ALERTS.values() if alert.get('status') in ['pending', 'assigned', 'in_progress']]
+        alerts, next_cursor = page_records(ALERTS.by_status(OPEN_STATUSES), cursor, limit)
+        return FastJSONResponse(alerts, headers={"X-Next-Cursor": next_cursor} if next_cursor else None)
 
 
 @app.get('/alerts/recent')
-async def get_recent_alerts(user=Depends(get_current_user)):
-    """Get recently resolved alerts from the last 24 hours for admin dashboard."""
+async def get_recent_alerts(cursor: str = None, limit: int = None, fields: str = None,
+                            user=Depends(get_current_user)):
+    """
+    Get recently resolved alerts from the last 24 hours for admin dashboard.
+    Paged by resolution time, most recent first (see X-Next-Cursor).
+    """
+    # Calculate cutoff time (24 hours ago)
+    cutoff_time = datetime.utcnow() - timedelta(hours=24)
+    limit = page_size(limit)
+    values = {"cutoff_time": cutoff_time, "limit": fetch_limit(limit)}
     try:
-        # Calculate cutoff time (24 hours ago)
-        cutoff_time = datetime.utcnow() - timedelta(hours=24)
-        
-        query = """SELECT a.*, u.phone as user_phone, u.name as user_name
+        columns = alert_columns(fields, required=('id', 'created_at', 'resolved_at', 'marked_done_at'))
+        after = keyset_clause(cursor, "COALESCE(a.resolved_at, a.marked_done_at)", "a.id", values)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        query = f"""SELECT {columns}, u.phone as user_phone, u.name as user_name
                    FROM alerts a
                    LEFT JOIN users u ON a.user_id = u.id
                    WHERE a.status IN ('resolved', 'done')
-                     AND (a.resolved_at >= :cutoff_time OR a.marked_done_at >= :cutoff_time)
-                   ORDER BY COALESCE(a.resolved_at, a.marked_done_at) DESC
-                   LIMIT 100"""
+                     AND (a.resolved_at >= :cutoff_time OR a.marked_done_at >= :cutoff_time){after}
+                   ORDER BY COALESCE(a.resolved_at, a.marked_done_at) DESC, a.id DESC
+                   LIMIT :limit"""
         
-        rows = await database.fetch_all(query, values={"cutoff_time": cutoff_time})
-        alerts = [dict(row) for row in rows]
-        
-        # Convert datetime objects to ISO strings
-        for alert in alerts:
-            for field in ['created_at', 'updated_at', 'resolved_at', 'marked_done_at']:
-                if alert.get(field):
-                    alert[field] = alert[field].isoformat()
+        rows = await database.fetch_all(query, values=values)
+        alerts, next_cursor = split_page(rows, limit, ('resolved_at', 'marked_done_at'))
+        alerts = encode_rows(alerts)
         
         print(f"✅ Retrieved {len(alerts)} recent resolved alerts (last 24 hours) for admin")
-        return alerts
+        return FastJSONResponse(alerts, headers={"X-Next-Cursor": next_cursor} if next_cursor else None)
     except Exception as e:
         print(f"⚠️ Database error: {e}")
         # Fallback to in-memory
-        cutoff_time = datetime.utcnow() - timedelta(hours=24)
-        recent_alerts = []
-        for alert in ALERTS.values():
-            if alert.get('status') in ['resolved', 'done']:
-                resolved_at = alert.get('resolved_at') or alert.get('marked_done_at')
-                if resolved_at:
-                    try:
-                        resolved_dt = datetime.fromisoformat(resolved_at.replace('Z', '+00:00'))
-                        if resolved_dt >= cutoff_time:
-                            recent_alerts.append(alert)
-                    except:
-                        recent_alerts.append(alert)
-        return recent_alerts
+        alerts, next_cursor = page_records(ALERTS.resolved_since(cutoff_time), cursor, limit,
+                                           ('resolved_at', 'marked_done_at'))
+        return FastJSONResponse(alerts, headers={"X-Next-Cursor": next_cursor} if next_cursor else None)
 
 
 @app.get('/responders/active')
@@ -625,20 +831,14 @@ async def get_active_responders(user=Depends(get_current_user)):
                    ORDER BY r.updated_at DESC"""
         
         rows = await database.fetch_all(query)
-        responders = [dict(row) for row in rows]
-        
-        # Convert datetime objects to ISO strings
-        for responder in responders:
-            for field in ['created_at', 'updated_at']:
-                if responder.get(field):
-                    responder[field] = responder[field].isoformat()
+        responders = encode_rows(rows)
         
         print(f"✅ Retrieved {len(responders)} active responders for admin")
         return responders
     except Exception as e:
         print(f"⚠️ Database error: {e}")
         # Fallback to in-memory
-        return [resp for resp in RESPONDERS.values() if resp.get('status') == 'active']
+        return [resp for resp in responder_registry.values() if resp.get('status') == 'active']
 
 
 ########################################
@@ -672,31 +872,7 @@ async def get_emergency_contacts(user=Depends(get_current_user)):
             user_contacts = await database.fetch_all(user_query, values={"user_id": user_id})
             
             # Combine and format
-            all_contacts = []
-            
-            for contact in default_contacts:
-                all_contacts.append({
-                    "id": str(contact['id']),
-                    "name": contact['name'],
-                    "phone": contact['phone'],
-                    "relationship": contact['relationship'],
-                    "priority": contact['priority'],
-                    "is_default": True,
-                    "created_at": contact['created_at'].isoformat() if contact['created_at'] else None,
-                    "updated_at": contact['updated_at'].isoformat() if contact['updated_at'] else None
-                })
-            
-            for contact in user_contacts:
-                all_contacts.append({
-                    "id": str(contact['id']),
-                    "name": contact['name'],
-                    "phone": contact['phone'],
-                    "relationship": contact['relationship'],
-                    "priority": contact['priority'],
-                    "is_default": False,
-                    "created_at": contact['created_at'].isoformat() if contact['created_at'] else None,
-                    "updated_at": contact['updated_at'].isoformat() if contact['updated_at'] else None
-                })
+            all_contacts = encode_rows(default_contacts) + encode_rows(user_contacts)
             
             print(f"✅ Retrieved {len(all_contacts)} emergency contacts from DB for user {user_id}")
             return all_contacts
@@ -759,16 +935,7 @@ async def create_emergency_contact(
                 }
             )
             
-            new_contact = {
-                "id": str(result['id']),
-                "name": result['name'],
-                "phone": result['phone'],
-                "relationship": result['relationship'],
-                "priority": result['priority'],
-                "is_default": False,
-                "created_at": result['created_at'].isoformat() if result['created_at'] else None,
-                "updated_at": result['updated_at'].isoformat() if result['updated_at'] else None
-            }
+            new_contact = encode_row(result)
             
             print(f"✅ Created emergency contact {contact_id} in DB for user {user_id}: {contact.name}")
             return new_contact
@@ -875,9 +1042,10 @@ async def mark_alert_done(alert_id: str, user=Depends(get_current_user)):
         
         if result:
             print(f"✅ Alert {alert_id} marked as resolved by user {user.get('sub', 'unknown')} - Will auto-delete after 24 hours")
+            await responder_reservations.release(alert_row['assigned_to'], alert_id)
             
             # Get updated alert data for broadcasting
-            updated_alert = dict(alert_row)
+            updated_alert = encode_row(alert_row)
             updated_alert.update({
                 "status": "resolved",
                 "resolved_at": resolved_time.isoformat(),
@@ -895,6 +1063,7 @@ async def mark_alert_done(alert_id: str, user=Depends(get_current_user)):
                 "marked_done_at": resolved_time.isoformat(),
                 "marked_by": user.get('sub', 'unknown')
             }
+            await record_alert_change(OP_UPSERT, alert_id, updated_alert)
             await broadcast_alert(broadcast_data)
             
             return {
@@ -913,9 +1082,9 @@ async def mark_alert_done(alert_id: str, user=Depends(get_current_user)):
         # Fallback to in-memory
         if alert_id in ALERTS:
             resolved_time = datetime.utcnow()
-            ALERTS[alert_id]['status'] = 'resolved'
-            ALERTS[alert_id]['resolved_at'] = resolved_time.isoformat()
-            ALERTS[alert_id]['marked_done_at'] = resolved_time.isoformat()
+            ALERTS.update(alert_id, status='resolved', resolved_at=resolved_time.isoformat(),
+                          marked_done_at=resolved_time.isoformat())
+            await responder_reservations.release(ALERTS[alert_id].get('assigned_to'), alert_id)
             
             # Broadcast fallback update
             broadcast_data = {
@@ -926,6 +1095,7 @@ async def mark_alert_done(alert_id: str, user=Depends(get_current_user)):
                 "resolved_at": ALERTS[alert_id]['resolved_at'],
                 "marked_done_at": ALERTS[alert_id]['marked_done_at']
             }
+            await record_alert_change(OP_UPSERT, alert_id, dict(ALERTS[alert_id]))
             await broadcast_alert(broadcast_data)
             
             return {"success": True, "message": "Alert marked as resolved (memory)", "alert_id": alert_id}
@@ -978,14 +1148,11 @@ async def update_alert_status(alert_id: str, status_update: AlertStatusUpdate, u
         result = await database.execute(update_query, values=update_values)
         
         if result:
+            if new_status in ('resolved', 'cancelled'):
+                await responder_reservations.release(alert_row['assigned_to'], alert_id)
             # Get updated alert data
             updated_alert_row = await database.fetch_one(alert_query, values={"alert_id": alert_id})
-            updated_alert = dict(updated_alert_row)
-            
-            # Convert datetime objects to ISO strings
-            for field in ['created_at', 'updated_at', 'resolved_at', 'marked_done_at']:
-                if updated_alert.get(field):
-                    updated_alert[field] = updated_alert[field].isoformat()
+            updated_alert = encode_row(updated_alert_row)
             
             # Broadcast update to all connected clients
             broadcast_data = {
@@ -997,6 +1164,7 @@ async def update_alert_status(alert_id: str, status_update: AlertStatusUpdate, u
                 "new_status": new_status,
                 "note": status_update.note
             }
+            await record_alert_change(OP_UPSERT, alert_id, updated_alert)
             await broadcast_alert(broadcast_data)
             
             print(f"✅ Alert {alert_id} status updated from '{current_status}' to '{new_status}'")
@@ -1032,11 +1200,13 @@ async def update_alert_status(alert_id: str, status_update: AlertStatusUpdate, u
                 )
             
             # Update in memory
-            ALERTS[alert_id]['status'] = status_update.status
+            changes = {'status': status_update.status}
             if status_update.status == 'resolved':
                 resolved_time = datetime.utcnow().isoformat()
-                ALERTS[alert_id]['resolved_at'] = resolved_time
-                ALERTS[alert_id]['marked_done_at'] = resolved_time
+                changes.update(resolved_at=resolved_time, marked_done_at=resolved_time)
+            ALERTS.update(alert_id, **changes)
+            if status_update.status in ('resolved', 'cancelled'):
+                await responder_reservations.release(ALERTS[alert_id].get('assigned_to'), alert_id)
             
             # Broadcast update
             broadcast_data = {
@@ -1047,6 +1217,7 @@ async def update_alert_status(alert_id: str, status_update: AlertStatusUpdate, u
                 "new_status": status_update.status,
                 "note": status_update.note
             }
+            await record_alert_change(OP_UPSERT, alert_id, dict(ALERTS[alert_id]))
             await broadcast_alert(broadcast_data)
             
             return {
@@ -1074,6 +1245,7 @@ async def delete_alert(alert_id: str, user=Depends(get_current_user)):
                 "id": alert_id,
                 "action": "deleted"
             }
+            await record_alert_change(OP_DELETE, alert_id)
             await broadcast_alert(alert_update)
             
             return {"success": True, "message": "Alert deleted", "alert_id": alert_id}
@@ -1084,7 +1256,8 @@ async def delete_alert(alert_id: str, user=Depends(get_current_user)):
         print(f"⚠️ Database error: {e}")
         # Fallback to in-memory
         if alert_id in ALERTS:
-            del ALERTS[alert_id]
+            ALERTS.delete(alert_id)
+            await record_alert_change(OP_DELETE, alert_id)
             return {"success": True, "message": "Alert deleted (memory)", "alert_id": alert_id}
         else:
             raise HTTPException(status_code=404, detail="Alert not found")
@@ -1106,6 +1279,7 @@ async def auto_delete_alert(alert_id: str, delay_seconds: int = 10):
                 "alert_id": alert_id,
                 "deleted_at": datetime.utcnow().isoformat()
             }
+            await record_alert_change(OP_DELETE, alert_id)
             await broadcast_alert(broadcast_data)
     except Exception as e:
         print(f"⚠️ Auto-delete error: {e}")
@@ -1115,7 +1289,8 @@ async def auto_delete_alert_memory(alert_id: str, delay_seconds: int = 10):
     """Auto-delete alert from memory after specified delay."""
     await asyncio.sleep(delay_seconds)
     if alert_id in ALERTS and ALERTS[alert_id].get('status') == 'done':
-        del ALERTS[alert_id]
+        ALERTS.delete(alert_id)
+        await record_alert_change(OP_DELETE, alert_id)
         print(f"🗑️ Auto-deleted alert {alert_id} from memory")
 
 
@@ -1127,19 +1302,39 @@ async def websocket_alerts(ws: WebSocket):
         await ws.close(code=4001)
         return
     try:
-        verify_token(token)
+        payload = verify_token(token)
     except Exception:
         await ws.close(code=4002)
         return
+    # optional filters: ?types=medical,fire&statuses=pending&bbox=...|near=lat,lng&radius_m=...&scope=own
+    try:
+        subscription = Subscription.from_params(dict(ws.query_params), user_id=payload.get('sub'))
+    except (ValueError, TypeError):
+        await ws.close(code=4003)
+        return
     await ws.accept()
-    CONNECTED_WEBSOCKETS.append(ws)
+    client = broadcaster.register(ws, subscription)
     try:
         while True:
             data = await ws.receive_text()
-            # For demo, echo back
-            await ws.send_text(f"echo: {data}")
+            # control message: {"action": "subscribe", "types": [...], "bbox": [...], ...}
+            try:
+                control = json.loads(data)
+            except ValueError:
+                control = None
+            if isinstance(control, dict) and control.get('action') == 'subscribe':
+                try:
+                    broadcaster.subscribe(client, Subscription.from_params(control, user_id=payload.get('sub')))
+                    client.offer(json.dumps({"type": "subscribed", "filters": client.subscription.describe()}))
+                except (ValueError, TypeError) as e:
+                    client.offer(json.dumps({"type": "subscribe_error", "detail": str(e)}))
+                continue
+            # For demo, echo back (through the client's queue so sends never interleave)
+            client.offer(f"echo: {data}")
     except WebSocketDisconnect:
-        CONNECTED_WEBSOCKETS.remove(ws)
+        pass
+    finally:
+        broadcaster.unregister(client)
 
 
 async def _redis_subscriber():
@@ -1148,7 +1343,7 @@ async def _redis_subscriber():
         return
     try:
         sub = redis_client_module.redis.pubsub()
-        await sub.subscribe('alerts')
+        await sub.subscribe('alerts', 'responders')
         async for message in sub.listen():
             if message is None:
                 continue
@@ -1158,13 +1353,19 @@ async def _redis_subscriber():
             if isinstance(payload, bytes):
                 payload = payload.decode('utf-8')
             try:
-                obj = json.loads(payload)
+                envelope = json.loads(payload)
+                # local clients already received messages this instance published
+                if envelope.get('origin') == INSTANCE_ID:
+                    continue
+                if envelope.get('responder'):
+                    # a heartbeat handled by another instance
+                    responder = envelope['responder']
+                    if responder.get('status') == 'available' and responder_reservations.holds(responder.get('id')):
+                        responder['status'] = 'busy'
+                    responder_registry.upsert(responder)
+                    continue
                 # rebroadcast to local websockets
-                for ws in list(CONNECTED_WEBSOCKETS):
-                    try:
-                        await ws.send_json(obj)
-                    except Exception:
-                        pass
+                broadcaster.publish(envelope.get('message', envelope), key=envelope.get('key'), route=envelope.get('route'))
             except Exception:
                 pass
     except Exception:
@@ -1175,13 +1376,17 @@ async def _redis_subscriber():
 async def responder_heartbeat(payload: dict):
     # payload: {id (optional), user_id, status, location}
     rid = payload.get('id') or str(uuid.uuid4())
-    RESPONDERS[rid] = payload
-    RESPONDERS[rid]['id'] = rid
-    RESPONDERS[rid]['last_heartbeat'] = None
+    status = payload.get('status', 'available')
+    if status == 'available' and responder_reservations.holds(rid):
+        # still reserved for an alert; released on decline or resolve
+        status = 'busy'
+    record = responder_registry.upsert(dict(payload, id=rid, status=status))
+    # keep the other instances' registries in step
+    await publish('responders', dumps({'origin': INSTANCE_ID, 'responder': record}).decode('utf-8'))
     # persist responder if DB available
     try:
         # upsert logic (simplified)
-        await database.execute("INSERT INTO responders (id, user_id, responder_type, status, last_location, created_at, updated_at) VALUES (:id, :user_id, :responder_type, :status, :last_location, now(), now()) ON CONFLICT (id) DO UPDATE SET status = :status, last_location = :last_location, updated_at = now()", values={'id': rid, 'user_id': payload.get('user_id'), 'responder_type': payload.get('responder_type', 'volunteer'), 'status': payload.get('status','available'), 'last_location': payload.get('location')})
+        await database.execute(HEARTBEAT_SQL, values={'id': rid, 'user_id': payload.get('user_id'), 'responder_type': payload.get('responder_type', 'volunteer'), 'status': status, 'last_location': payload.get('location')})
     except Exception:
         pass
     return {'id': rid}
@@ -1204,10 +1409,11 @@ async def responder_accept(responder_id: str, body: dict):
     except Exception:
         # fallback to memory
         if ALERTS.get(alert_id) and ALERTS[alert_id].get('assigned_to') == responder_id:
-            ALERTS[alert_id]['status'] = 'accepted'
+            ALERTS.update(alert_id, status='accepted')
         else:
             raise HTTPException(status_code=500, detail='DB error')
 
+    await record_alert_change(OP_PATCH, alert_id, {'status': 'accepted'})
     await broadcast_alert({'id': alert_id, 'status': 'accepted', 'responder': responder_id})
     return {'status': 'accepted'}
 
@@ -1222,27 +1428,81 @@ async def responder_decline(responder_id: str, body: dict):
         if str(row['assigned_to']) != responder_id:
             raise HTTPException(status_code=403, detail='Not assigned to this responder')
         await database.execute('UPDATE alerts SET status = :status, assigned_to = NULL WHERE id = :id', values={'status': 'open', 'id': alert_id})
+    except HTTPException:
+        raise
     except Exception:
         # fallback: mark open
-        if ALERTS.get(alert_id):
-            ALERTS[alert_id]['status'] = 'open'
-            ALERTS[alert_id]['assigned_to'] = None
+        if ALERTS.get(alert_id) and ALERTS[alert_id].get('assigned_to') == responder_id:
+            ALERTS.update(alert_id, status='open', assigned_to=None)
+        else:
+            raise HTTPException(status_code=500, detail='DB error')
+    await responder_reservations.release(responder_id, alert_id)
     # trigger another auto-assign
-    asyncio.create_task(schedule_auto_assign(alert_id, delay=1))
+    await schedule_auto_assign(alert_id, delay=1)
+    await record_alert_change(OP_PATCH, alert_id, {'status': 'open', 'assigned_to': None})
     await broadcast_alert({'id': alert_id, 'status': 'open', 'assigned_to': None})
     return {'status': 'declined'}
 
 
+async def open_alerts_for_escalation():
+    """Alerts that can still escalate, with how often each already has (one query at startup)."""
+    try:
+        rows = await database.fetch_all(
+            """SELECT a.id, a.type, a.category_id, a.status, a.created_at, COUNT(e.id) AS escalation_level
+               FROM alerts a
+               LEFT JOIN alert_events e ON e.alert_id = a.id AND e.event_type = 'escalated'
+               WHERE a.status IN ('pending', 'open', 'active', 'assigned')
+               GROUP BY a.id""")
+        return [dict(row) for row in rows]
+    except Exception:
+        return ALERTS.by_status(ESCALATABLE_STATUSES)
+
+
+async def load_responders_into_registry():
+    """Warm the responder registry from the responders table."""
+    global _registry_loaded_at
+    _registry_loaded_at = time.monotonic()
+    try:
+        rows = await database.fetch_all("SELECT id, user_id, responder_type, status, last_location, capabilities FROM responders WHERE status = 'available'")
+    except Exception:
+        return 0
+    for row in rows:
+        responder_registry.upsert(dict(row))
+    return len(rows)
+
+
+_registry_reload = None
+_registry_loaded_at = None
+
+
+async def refresh_responder_registry():
+    """
+    Reload the registry from the DB when it may be missing responders, at most
+    once per RESPONDER_RELOAD_INTERVAL; concurrent callers share one query.
+    Heartbeats reach every instance through Redis, so this is only a safety net.
+    """
+    global _registry_reload
+    if _registry_reload is None or _registry_reload.done():
+        if _registry_loaded_at is not None and time.monotonic() - _registry_loaded_at < RESPONDER_RELOAD_INTERVAL:
+            return 0
+        _registry_reload = asyncio.create_task(load_responders_into_registry())
+    return await asyncio.shield(_registry_reload)
+
+
 @app.on_event('startup')
 async def startup():
-    global USERS, ALERTS
-    
     # Initialize demo data and load persistent storage
-    USERS, ALERTS = initialize_demo_data()
+    _, stored_alerts = initialize_demo_data()
+    ALERTS.load(stored_alerts)
+    alert_journal.start()
     
     try:
         await database.connect()
         print("✅ Database connected")
+        loaded = await load_responders_into_registry()
+        print(f"📍 Loaded {loaded} available responders into registry")
+        categories = await alert_categories.refresh(database)
+        print(f"🏷️  Loaded {categories} alert categories")
     except Exception as e:
         print(f'⚠️ Database connection failed: {e}')
         print('🔄 Continuing in demo mode with in-memory storage')
@@ -1257,23 +1517,37 @@ async def startup():
         print(f'⚠️ Redis connection failed: {e}')
         print('Running single-instance mode')
     
+    # Deferred auto-assign and escalation jobs: durable in Redis when available, in-memory otherwise
+    job_scheduler.register('auto_assign', auto_assign)
+    job_scheduler.register(ESCALATION_JOB, escalation_engine.on_due)
+    await job_scheduler.start(redis_client_module.redis)
+    queued = await reschedule_pending_auto_assign()
+    if queued:
+        print(f"⏱️  Re-queued auto-assign for {queued} unassigned alerts")
+    armed = await escalation_engine.rebuild(await open_alerts_for_escalation())
+    print(f"🚨 Escalation timers armed for {armed} open alerts")
+    
     # Start background cleanup task
     asyncio.create_task(periodic_cleanup())
     print("🧹 Started periodic cleanup task")
     
-    # Start media cleanup task (runs every 5 minutes)
-    asyncio.create_task(periodic_media_cleanup())
-    print("🗑️  Started media cleanup task (runs every 5 minutes)")
+    # Delete uploaded media as each file reaches its expiry time
+    media_expiry.start()
+    
+    # Seed and periodically repair the media stats counters
+    asyncio.create_task(periodic_media_reconcile())
 
 
 @app.on_event('shutdown')
 async def shutdown():
-    global ALERTS, USERS
+    # stop taking jobs, then assign what is already waiting for a batch
+    await job_scheduler.stop()
+    await assignment_batcher.flush()
     
     # Save data before shutdown
     print("💾 Saving data before shutdown...")
-    save_alerts(ALERTS)
-    save_users(USERS)
+    await alert_journal.close()
+    save_users()
     print("✅ Data saved successfully")
     
     try:
@@ -1288,49 +1562,40 @@ async def shutdown():
     except Exception:
         pass
 
+    await eta_provider.close()
+    await broadcaster.close()
+    await media_expiry.stop()
+    shutdown_image_pool()
+
 
 async def broadcast_alert(alert: dict):
-    living = []
     # enrich alert with ETA where possible
     alert_out = dict(alert) if isinstance(alert, dict) else alert
     try:
         # If alert has an assigned responder, compute ETA from responder -> alert
         assigned = alert_out.get('assigned_to')
         if assigned:
-            responder = None
-            try:
-                row = await database.fetch_one('SELECT id, last_location FROM responders WHERE id = :id', values={'id': assigned})
-                if row:
-                    responder = dict(row)
-            except Exception:
-                responder = None
+            responder = responder_registry.get(assigned)
             if not responder:
-                responder = RESPONDERS.get(assigned)
+                try:
+                    row = await database.fetch_one('SELECT id, status, last_location FROM responders WHERE id = :id', values={'id': assigned})
+                    if row:
+                        responder = responder_registry.upsert(dict(row))
+                except Exception:
+                    responder = None
             if responder and responder.get('last_location') and alert_out.get('location'):
                 rloc = responder['last_location']
-                eta = estimate_eta_seconds({'lat': rloc.get('lat'), 'lng': rloc.get('lng')}, {'lat': alert_out['location'].get('lat'), 'lng': alert_out['location'].get('lng')})
+                eta = await estimate_eta_seconds({'lat': rloc.get('lat'), 'lng': rloc.get('lng')}, {'lat': alert_out['location'].get('lat'), 'lng': alert_out['location'].get('lng')})
                 if eta is not None:
                     alert_out['eta_seconds'] = eta
         else:
             # If unassigned, compute nearest available responder ETA (best-effort)
+            aloc = alert_out.get('location') or {}
             candidates = []
-            try:
-                rows = await database.fetch_all("SELECT id, last_location FROM responders WHERE status = 'available' LIMIT 20")
-                candidates = [dict(r) for r in rows]
-            except Exception:
-                candidates = [r for r in RESPONDERS.values() if r.get('status') == 'available']
-            best_eta = None
-            best_id = None
-            for c in candidates:
-                loc = c.get('last_location') or {}
-                if not loc.get('lat'):
-                    continue
-                eta = estimate_eta_seconds({'lat': loc.get('lat'), 'lng': loc.get('lng')}, {'lat': alert_out.get('location', {}).get('lat'), 'lng': alert_out.get('location', {}).get('lng')})
-                if eta is None:
-                    continue
-                if best_eta is None or eta < best_eta:
-                    best_eta = eta
-                    best_id = c.get('id')
+            if aloc.get('lat') is not None:
+                candidates = [r for r, _ in responder_registry.nearest(aloc['lat'], aloc['lng'], k=AUTO_ASSIGN_CANDIDATES)]
+            best, best_eta = await pick_best_by_eta(aloc, candidates)
+            best_id = best.get('id') if best else None
             if best_eta is not None:
                 alert_out['nearest_responder_eta'] = best_eta
                 alert_out['nearest_responder_id'] = best_id
@@ -1338,21 +1603,53 @@ async def broadcast_alert(alert: dict):
         # best-effort: ignore ETA errors
         pass
 
-    for ws in CONNECTED_WEBSOCKETS:
-        try:
-            await ws.send_json({"type": "new_alert", "alert": alert_out})
-            living.append(ws)
-        except Exception:
-            pass
-    # cleanup
-    CONNECTED_WEBSOCKETS[:] = living
+    key = alert_out.get('id') or alert_out.get('alert_id')
+    await publish_message({"type": "new_alert", "alert": alert_out}, key=key, route=alert_route(alert_out))
+
+
+async def publish_message(message: dict, key=None, route: dict = None):
+    """Send a message to matching local websockets and to the other instances."""
+    # serialize once; every local client's writer task sends the same text
+    broadcaster.publish(message, key=key, route=route)
     # publish to redis channel for other instances
     try:
-        await publish('alerts', json.dumps({"type": "new_alert", "alert": alert_out}))
+        envelope = {'origin': INSTANCE_ID, 'key': key, 'route': route, 'message': message}
+        await publish('alerts', dumps(envelope).decode('utf-8'))
     except Exception:
         pass
 
 
+async def record_alert_change(op: str, alert_id, alert: dict = None) -> str:
+    """Append a mutation to the delta-sync feed (shared by all instances through Redis)."""
+    return await change_feed.record(op, alert_id, alert)
+
+
+def alert_route(payload: dict) -> dict:
+    """Routing attributes for a broadcast payload, filling gaps from the in-memory alert."""
+    nested = payload.get('alert')
+    source = nested if isinstance(nested, dict) else payload
+    route = route_for(source)
+    if source is payload and 'id' not in payload:
+        # flat status/delete messages carry the message type, not the alert type
+        route.pop('type', None)
+    if 'status' not in route and payload.get('new_status'):
+        route['status'] = str(payload['new_status'])
+    alert_id = payload.get('id') or payload.get('alert_id')
+    known = ALERTS.get(str(alert_id)) if alert_id else None
+    if known:
+        for field, value in route_for(known).items():
+            route.setdefault(field, value)
+    return route
+
+
+def run_in_background(coro):
+    """Schedule a coroutine without awaiting it, keeping a reference until it finishes."""
+    task = asyncio.create_task(coro)
+    BACKGROUND_TASKS.add(task)
+    task.add_done_callback(BACKGROUND_TASKS.discard)
+    return task
+
+
 async def cleanup_old_resolved_alerts():
     """Delete resolved alerts older than 24 hours."""
     try:
@@ -1361,31 +1658,24 @@ async def cleanup_old_resolved_alerts():
         # Delete from database
         delete_query = """DELETE FROM alerts 
                          WHERE status IN ('resolved', 'done')
-                         AND (resolved_at < :cutoff_time OR marked_done_at < :cutoff_time)"""
+                         AND (resolved_at < :cutoff_time OR marked_done_at < :cutoff_time)
+                         RETURNING id"""
         
-        result = await database.execute(delete_query, values={"cutoff_time": cutoff_time})
+        deleted_rows = await database.fetch_all(delete_query, values={"cutoff_time": cutoff_time})
+        for row in deleted_rows:
+            await record_alert_change(OP_DELETE, row['id'])
+        result = len(deleted_rows)
         
         if result > 0:
             print(f"🧹 Deleted {result} resolved alerts older than 24 hours")
         
         # Also clean up in-memory storage
-        alerts_to_delete = []
-        for alert_id, alert in ALERTS.items():
-            if alert.get('status') in ['resolved', 'done']:
-                resolved_at = alert.get('resolved_at') or alert.get('marked_done_at')
-                if resolved_at:
-                    try:
-                        resolved_dt = datetime.fromisoformat(resolved_at.replace('Z', '+00:00'))
-                        if resolved_dt < cutoff_time:
-                            alerts_to_delete.append(alert_id)
-                    except:
-                        pass
-        
+        alerts_to_delete = ALERTS.resolved_before(cutoff_time)
         for alert_id in alerts_to_delete:
-            del ALERTS[alert_id]
+            ALERTS.delete(alert_id)
+            await record_alert_change(OP_DELETE, alert_id)
         
         if alerts_to_delete:
-            save_alerts(ALERTS)
             print(f"🧹 Cleaned up {len(alerts_to_delete)} old resolved alerts from memory")
             
     except Exception as e:
@@ -1407,22 +1697,14 @@ async def periodic_cleanup():
             await asyncio.sleep(3600)  # Wait an hour on error before retrying
 
 
-async def periodic_media_cleanup():
-    """Background task to clean up media files older than 30 minutes."""
+async def periodic_media_reconcile():
+    """Background task that recounts media stats from disk (first run at startup)."""
     while True:
         try:
-            # Run cleanup every 5 minutes
-            await asyncio.sleep(300)  # 300 seconds = 5 minutes
-            
-            print("🗑️  Running media cleanup (removing files older than 30 minutes)...")
-            result = cleanup_expired_media()
-            
-            if result.get('deleted_count', 0) > 0:
-                print(f"✓ Cleaned up {result['deleted_count']} files ({result['deleted_size_kb']:.2f} KB freed)")
-            
+            await asyncio.to_thread(reconcile_media_stats)
         except Exception as e:
-            print(f"⚠️ Media cleanup task error: {e}")
-            await asyncio.sleep(300)  # Wait 5 minutes on error before retrying
+            print(f"⚠️ Media stats reconcile error: {e}")
+        await asyncio.sleep(MEDIA_RECONCILE_INTERVAL)
 
 
 # Duplicate startup/shutdown removed - using the ones above with demo data initialization
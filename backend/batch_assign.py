@@ -0,0 +1,239 @@
+"""
+Batch auto-assignment for alert surges.
+Alerts that become due for auto-assign within a short window are collected and
+assigned together: an alert x responder ETA matrix (each alert's own nearest
+candidates, road ETAs when a routing provider is configured) is weighted by
+severity and solved as a min-cost assignment, so two alerts never grab the
+same responder and coverage is balanced across the batch. With one alert in
+the window this picks the lowest ETA, as before.
+"""
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.utils import haversine_batch, fallback_eta_batch, responder_coordinates
+
+# Seconds to collect due alerts before solving (0 assigns each alert on its own)
+AUTO_ASSIGN_BATCH_WINDOW = float(os.environ.get('AUTO_ASSIGN_BATCH_WINDOW', 2.0))
+# Solve early once this many alerts are waiting
+AUTO_ASSIGN_BATCH_MAX = int(os.environ.get('AUTO_ASSIGN_BATCH_MAX', 200))
+# Next-best candidates tried when a planned responder was reserved elsewhere
+AUTO_ASSIGN_RESERVE_ATTEMPTS = int(os.environ.get('AUTO_ASSIGN_RESERVE_ATTEMPTS', 5))
+# Cost of leaving an alert unassigned, in (severity-weighted) seconds of ETA
+UNASSIGNED_COST_S = 24 * 3600.0
+# Cost standing in for "not a candidate"; larger than any real or unassigned cost
+INFEASIBLE_COST = 1e12
+DEFAULT_SEVERITY = 3
+
+
+def severity_weight(severity) -> float:
+    """Each severity step (1-5) doubles how much a second of ETA costs."""
+    try:
+        severity = int(severity)
+    except (TypeError, ValueError):
+        severity = DEFAULT_SEVERITY
+    return 2.0 ** (min(max(severity, 1), 5) - DEFAULT_SEVERITY)
+
+
+def solve_assignment(cost) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Minimum-cost assignment (Hungarian method, shortest augmenting paths) for a
+    rectangular cost matrix. Returns (rows, cols) index arrays sorted by row,
+    one pair per row or column, whichever dimension is smaller.
+    The scan over columns is vectorized: O(n^2 m) work in O(n^2) numpy steps.
+    """
+    cost = np.asarray(cost, dtype=np.float64)
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.T
+    n, m = cost.shape
+    if n == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    # 1-based potentials and matching, index 0 is the virtual start column
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    row_of = np.zeros(m + 1, dtype=np.int64)
+    way = np.zeros(m + 1, dtype=np.int64)
+    for i in range(1, n + 1):
+        row_of[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = row_of[j0]
+            free = ~used[1:]
+            reduced = cost[i0 - 1] - u[i0] - v[1:]
+            better = free & (reduced < minv[1:])
+            minv[1:][better] = reduced[better]
+            way[1:][better] = j0
+            candidates = np.where(free, minv[1:], np.inf)
+            j1 = int(np.argmin(candidates)) + 1
+            delta = candidates[j1 - 1]
+            u[row_of[used]] += delta
+            v[used] -= delta
+            minv[1:][free] -= delta
+            j0 = j1
+            if row_of[j0] == 0:
+                break
+        # flip the augmenting path back to the start column
+        while j0:
+            j1 = way[j0]
+            row_of[j0] = row_of[j1]
+            j0 = j1
+    cols = np.nonzero(row_of[1:])[0]
+    rows = row_of[1:][cols] - 1
+    if transposed:
+        rows, cols = cols, rows
+    order = np.argsort(rows, kind='stable')
+    return rows[order], cols[order]
+
+
+def plan_assignments(etas, severities) -> List[Tuple[int, int]]:
+    """
+    (alert index, responder index) pairs minimizing the severity-weighted sum of
+    ETAs. etas[i, j] is the ETA in seconds of responder j to alert i, inf where j
+    is not a candidate. When responders run short, the lowest-severity alerts
+    are the ones left unassigned.
+    """
+    etas = np.asarray(etas, dtype=np.float64)
+    n = etas.shape[0]
+    if n == 0 or etas.shape[1] == 0:
+        return []
+    weights = np.array([severity_weight(s) for s in severities], dtype=np.float64)
+    cost = np.where(np.isfinite(etas), etas * weights[:, None], INFEASIBLE_COST)
+    # one "stay unassigned" column per alert keeps every row feasible
+    unassigned = np.full((n, n), INFEASIBLE_COST)
+    np.fill_diagonal(unassigned, UNASSIGNED_COST_S * weights)
+    rows, cols = solve_assignment(np.hstack((cost, unassigned)))
+    return [(int(i), int(j)) for i, j in zip(rows, cols) if j < etas.shape[1]]
+
+
+async def reserve_assignments(pairs: List[Tuple[int, int]], etas, severities,
+                              reserve: Callable[[int, int], Awaitable[bool]],
+                              max_attempts: int = AUTO_ASSIGN_RESERVE_ATTEMPTS) -> List[Tuple[int, int]]:
+    """
+    Reserve each planned (alert, responder) pair with reserve(i, j). An alert
+    whose responder was taken by another worker falls back to its next-best
+    candidates by ETA (highest severity first), up to max_attempts of them.
+    Returns the pairs that were actually reserved.
+    """
+    etas = np.asarray(etas, dtype=np.float64)
+    unavailable = set()
+    reserved = []
+    lost = []
+    for i, j in pairs:
+        unavailable.add(j)
+        if await reserve(i, j):
+            reserved.append((i, j))
+        else:
+            lost.append(i)
+    for i in sorted(lost, key=lambda i: -severity_weight(severities[i])):
+        attempts = 0
+        for j in np.argsort(etas[i], kind='stable'):
+            j = int(j)
+            if attempts >= max_attempts or not np.isfinite(etas[i, j]):
+                break
+            if j in unavailable:
+                continue
+            attempts += 1
+            unavailable.add(j)
+            if await reserve(i, j):
+                reserved.append((i, j))
+                break
+    return reserved
+
+
+async def candidate_eta_matrix(alert_locs: List[Dict[str, float]], candidates: List[List[Dict[str, Any]]],
+                               provider=None) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+    """
+    Responders considered for the batch (the union of each alert's candidates)
+    and the alert x responder ETA matrix in seconds, inf outside an alert's own
+    candidates. Road ETAs come from provider (one matrix lookup per alert) when
+    it routes remotely, straight-line estimates otherwise.
+    """
+    responders: List[Dict[str, Any]] = []
+    column: Dict[str, int] = {}
+    rows = []
+    for cands in candidates:
+        located, lats, lngs = responder_coordinates(cands)
+        cols = []
+        for r in located:
+            if r['id'] not in column:
+                column[r['id']] = len(responders)
+                responders.append(r)
+            cols.append(column[r['id']])
+        rows.append((np.array(cols, dtype=np.int64), located, lats, lngs))
+
+    etas = np.full((len(alert_locs), len(responders)), np.inf)
+    remote = provider is not None and provider.backend.remote
+    lookups = []
+    for i, (loc, (cols, located, lats, lngs)) in enumerate(zip(alert_locs, rows)):
+        if not located:
+            continue
+        if remote:
+            origins = [{'lat': float(lat), 'lng': float(lng)} for lat, lng in zip(lats, lngs)]
+            lookups.append((i, cols, provider.eta_matrix(origins, {'lat': loc['lat'], 'lng': loc['lng']})))
+        else:
+            etas[i, cols] = fallback_eta_batch(haversine_batch(float(loc['lat']), float(loc['lng']), lats, lngs))
+    if lookups:
+        results = await asyncio.gather(*[lookup for _, _, lookup in lookups])
+        for (i, cols, _), values in zip(lookups, results):
+            etas[i, cols] = values
+    return responders, etas
+
+
+class AssignmentBatcher:
+    """Collects alerts due for auto-assign and hands them to solve() in batches."""
+
+    def __init__(self, solve: Callable[[List[Dict[str, Any]]], Awaitable[Any]],
+                 window: float = AUTO_ASSIGN_BATCH_WINDOW, max_batch: int = AUTO_ASSIGN_BATCH_MAX):
+        self.solve = solve
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushing: set = set()
+        self.batches = 0
+        self.batched_alerts = 0
+        self.largest_batch = 0
+
+    async def submit(self, alert: Dict[str, Any]):
+        self._pending[str(alert['id'])] = alert
+        if self.window <= 0 or len(self._pending) >= self.max_batch:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush_later)
+
+    def _flush_later(self):
+        self._timer = None
+        task = asyncio.create_task(self.flush())
+        self._flushing.add(task)
+        task.add_done_callback(self._flushing.discard)
+
+    async def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch = list(self._pending.values())
+        self._pending.clear()
+        if not batch:
+            return
+        self.batches += 1
+        self.batched_alerts += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        try:
+            await self.solve(batch)
+        except Exception as e:
+            print(f"⚠️ Batch auto-assign of {len(batch)} alerts failed: {e}")
+
+    def stats(self):
+        return {
+            'window_s': self.window,
+            'pending': len(self._pending),
+            'batches': self.batches,
+            'batched_alerts': self.batched_alerts,
+            'largest_batch': self.largest_batch,
+        }
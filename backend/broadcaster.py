@@ -0,0 +1,378 @@
+"""
+WebSocket fan-out.
+Each connection gets a bounded outbound queue drained by its own writer task,
+so one slow client never delays the others or the request that published.
+Payloads are serialized once and the same text is queued for every client.
+Clients may subscribe to a subset of alerts (type, status, area, own alerts);
+messages are routed through a subscription index rather than to every socket.
+"""
+import asyncio
+import json
+import math
+import os
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from fastapi import WebSocket
+
+from backend.serialization import dumps
+from backend.utils import haversine_distance
+
+WS_SEND_QUEUE_SIZE = int(os.environ.get('WS_SEND_QUEUE_SIZE', 100))
+# 'coalesce': when a queue is full, replace the queued message for the same alert
+#             (or drop the oldest one); 'disconnect': close the slow client
+WS_SLOW_CLIENT_POLICY = os.environ.get('WS_SLOW_CLIENT_POLICY', 'coalesce')
+WS_SEND_TIMEOUT_SECONDS = float(os.environ.get('WS_SEND_TIMEOUT_SECONDS', 10))
+
+POLICY_COALESCE = 'coalesce'
+POLICY_DISCONNECT = 'disconnect'
+
+# Geo subscriptions are indexed on cells of this size (~11 km)
+GEO_CELL_DEG = 0.1
+# Areas spanning more cells than this are matched by filter instead of by cell
+MAX_CELLS_PER_SUBSCRIPTION = 400
+_M_PER_DEG = 111320.0
+
+
+def _csv(value) -> Optional[Set[str]]:
+    if value is None or value == '':
+        return None
+    if isinstance(value, str):
+        value = value.split(',')
+    items = {str(v).strip() for v in value if str(v).strip()}
+    return items or None
+
+
+def _floats(value, count: int) -> Optional[Tuple[float, ...]]:
+    if value is None or value == '':
+        return None
+    if isinstance(value, str):
+        value = value.split(',')
+    numbers = tuple(float(v) for v in value)
+    if len(numbers) != count:
+        raise ValueError(f'expected {count} numbers, got {len(numbers)}')
+    return numbers
+
+
+def _geo_cell(lat: float, lng: float) -> Tuple[int, int]:
+    return (int(math.floor(lat / GEO_CELL_DEG)), int(math.floor(lng / GEO_CELL_DEG)))
+
+
+class Subscription:
+    """
+    Which alerts a client wants. Every filter is optional; a message attribute
+    that is missing (e.g. a deletion without a location) does not exclude it.
+    """
+
+    def __init__(self, types: Optional[Set[str]] = None, statuses: Optional[Set[str]] = None,
+                 bbox: Optional[Tuple[float, float, float, float]] = None,
+                 center: Optional[Tuple[float, float]] = None, radius_m: Optional[float] = None,
+                 user_id: Optional[str] = None):
+        self.types = types
+        self.statuses = statuses
+        self.center = center if radius_m else None
+        self.radius_m = float(radius_m) if radius_m and center else None
+        if self.center and bbox is None:
+            dlat = self.radius_m / _M_PER_DEG
+            dlng = self.radius_m / (_M_PER_DEG * max(math.cos(math.radians(self.center[0])), 0.01))
+            bbox = (self.center[0] - dlat, self.center[1] - dlng, self.center[0] + dlat, self.center[1] + dlng)
+        self.bbox = bbox
+        self.user_id = user_id
+
+    @classmethod
+    def from_params(cls, params: Dict[str, Any], user_id: Optional[str] = None) -> 'Subscription':
+        """
+        Build from websocket query params or a subscribe control message:
+        types=medical,fire  statuses=pending,assigned  bbox=minLat,minLng,maxLat,maxLng
+        near=lat,lng&radius_m=5000  scope=own
+        """
+        near = _floats(params.get('near'), 2)
+        return cls(
+            types=_csv(params.get('types')),
+            statuses=_csv(params.get('statuses')),
+            bbox=_floats(params.get('bbox'), 4),
+            center=near,
+            radius_m=float(params['radius_m']) if near and params.get('radius_m') else None,
+            user_id=user_id if params.get('scope') == 'own' else None,
+        )
+
+    def cells(self) -> Optional[List[Tuple[int, int]]]:
+        """Geo cells covering the area, or None when unbounded or too large to index."""
+        if self.bbox is None:
+            return None
+        lo = _geo_cell(self.bbox[0], self.bbox[1])
+        hi = _geo_cell(self.bbox[2], self.bbox[3])
+        if (hi[0] - lo[0] + 1) * (hi[1] - lo[1] + 1) > MAX_CELLS_PER_SUBSCRIPTION:
+            return None
+        return [(i, j) for i in range(lo[0], hi[0] + 1) for j in range(lo[1], hi[1] + 1)]
+
+    def matches(self, route: Dict[str, Any]) -> bool:
+        if self.types and route.get('type') is not None and route['type'] not in self.types:
+            return False
+        if self.statuses and route.get('status') is not None and route['status'] not in self.statuses:
+            return False
+        if self.user_id and route.get('user_id') is not None and str(route['user_id']) != self.user_id:
+            return False
+        lat = route.get('lat')
+        lng = route.get('lng')
+        if lat is not None and lng is not None:
+            if self.bbox and not (self.bbox[0] <= lat <= self.bbox[2] and self.bbox[1] <= lng <= self.bbox[3]):
+                return False
+            if self.radius_m and haversine_distance(self.center[0], self.center[1], lat, lng) > self.radius_m:
+                return False
+        return True
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            'types': sorted(self.types) if self.types else None,
+            'statuses': sorted(self.statuses) if self.statuses else None,
+            'bbox': list(self.bbox) if self.bbox else None,
+            'near': list(self.center) if self.center else None,
+            'radius_m': self.radius_m,
+            'scope': 'own' if self.user_id else 'all',
+        }
+
+
+def route_for(alert: Dict[str, Any]) -> Dict[str, Any]:
+    """Routing attributes (type, status, user_id, lat, lng) of an alert-shaped payload."""
+    route: Dict[str, Any] = {}
+    for field in ('type', 'status', 'user_id'):
+        if alert.get(field) is not None:
+            route[field] = str(alert[field])
+    loc = alert.get('location')
+    if isinstance(loc, str):
+        try:
+            loc = json.loads(loc)
+        except Exception:
+            loc = None
+    if isinstance(loc, dict) and loc.get('lat') is not None and loc.get('lng') is not None:
+        route['lat'] = float(loc['lat'])
+        route['lng'] = float(loc['lng'])
+    return route
+
+
+class ClientConnection:
+    """One websocket plus its outbound queue and writer task."""
+
+    def __init__(self, ws: WebSocket, broadcaster: 'Broadcaster', subscription: Optional[Subscription] = None):
+        self.ws = ws
+        self.broadcaster = broadcaster
+        self.subscription = subscription or Subscription()
+        # where this client sits in the broadcaster's index
+        self.index_keys: List[Tuple[str, Any]] = []
+        self.pending: Deque[Tuple[Optional[str], str]] = deque()
+        self.ready = asyncio.Event()
+        self.closed = False
+        self.dropped = 0
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self.task = asyncio.ensure_future(self._writer())
+
+    def offer(self, text: str, key: Optional[str] = None) -> bool:
+        """Queue pre-encoded text without waiting; returns False if the message was not queued."""
+        if self.closed:
+            return False
+        if len(self.pending) >= self.broadcaster.queue_size:
+            if self.broadcaster.policy == POLICY_DISCONNECT:
+                self.dropped += 1
+                self.close()
+                return False
+            self.dropped += 1
+            if key is not None:
+                for i, (queued_key, _) in enumerate(self.pending):
+                    if queued_key == key:
+                        # newer state for the same alert supersedes the queued one
+                        self.pending[i] = (key, text)
+                        return True
+            self.pending.popleft()
+        self.pending.append((key, text))
+        self.ready.set()
+        return True
+
+    async def _writer(self):
+        try:
+            while not self.closed:
+                await self.ready.wait()
+                while self.pending and not self.closed:
+                    _, text = self.pending.popleft()
+                    await asyncio.wait_for(self.ws.send_text(text), timeout=self.broadcaster.send_timeout)
+                self.ready.clear()
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            # send timed out or failed: stop queueing for it and close the socket
+            self.closed = True
+            await self._close_socket(code=1011)
+        finally:
+            self.closed = True
+            self.broadcaster.unregister(self)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.ready.set()
+        asyncio.ensure_future(self._close_socket())
+
+    async def _close_socket(self, code: int = 1013):
+        try:
+            await asyncio.wait_for(self.ws.close(code=code), timeout=self.broadcaster.send_timeout)
+        except Exception:
+            pass
+
+
+class Broadcaster:
+    def __init__(self, queue_size: int = WS_SEND_QUEUE_SIZE, policy: str = WS_SLOW_CLIENT_POLICY,
+                 send_timeout: float = WS_SEND_TIMEOUT_SECONDS):
+        self.queue_size = queue_size
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self.clients: Set[ClientConnection] = set()
+        self.messages_published = 0
+        # subscription index: each client is filed under its most selective filter
+        self._all: Set[ClientConnection] = set()
+        self._by_user: Dict[str, Set[ClientConnection]] = {}
+        self._by_cell: Dict[Tuple[int, int], Set[ClientConnection]] = {}
+        self._by_type: Dict[str, Set[ClientConnection]] = {}
+        self._user_scoped: Set[ClientConnection] = set()
+        self._geo_scoped: Set[ClientConnection] = set()
+        self._type_scoped: Set[ClientConnection] = set()
+
+    def __len__(self):
+        return len(self.clients)
+
+    def register(self, ws: WebSocket, subscription: Optional[Subscription] = None) -> ClientConnection:
+        client = ClientConnection(ws, self, subscription)
+        self.clients.add(client)
+        self._index(client)
+        client.start()
+        return client
+
+    def unregister(self, client: ClientConnection) -> None:
+        self.clients.discard(client)
+        self._unindex(client)
+        if not client.closed:
+            client.closed = True
+            client.ready.set()
+
+    def subscribe(self, client: ClientConnection, subscription: Subscription) -> None:
+        """Replace a connected client's filters."""
+        self._unindex(client)
+        client.subscription = subscription
+        if client in self.clients:
+            self._index(client)
+
+    def _index(self, client: ClientConnection) -> None:
+        sub = client.subscription
+        cells = sub.cells()
+        if sub.user_id:
+            self._by_user.setdefault(sub.user_id, set()).add(client)
+            self._user_scoped.add(client)
+            client.index_keys = [('user', sub.user_id)]
+        elif cells is not None:
+            for cell in cells:
+                self._by_cell.setdefault(cell, set()).add(client)
+            self._geo_scoped.add(client)
+            client.index_keys = [('cell', c) for c in cells]
+        elif sub.types:
+            for t in sub.types:
+                self._by_type.setdefault(t, set()).add(client)
+            self._type_scoped.add(client)
+            client.index_keys = [('type', t) for t in sub.types]
+        else:
+            self._all.add(client)
+            client.index_keys = [('all', None)]
+
+    def _unindex(self, client: ClientConnection) -> None:
+        indexes = {'user': self._by_user, 'cell': self._by_cell, 'type': self._by_type}
+        for kind, key in client.index_keys:
+            if kind == 'all':
+                continue
+            bucket = indexes[kind].get(key)
+            if bucket is not None:
+                bucket.discard(client)
+                if not bucket:
+                    del indexes[kind][key]
+        client.index_keys = []
+        self._all.discard(client)
+        self._user_scoped.discard(client)
+        self._geo_scoped.discard(client)
+        self._type_scoped.discard(client)
+
+    def _candidates(self, route: Dict[str, Any]) -> Iterable[ClientConnection]:
+        candidates = set(self._all)
+        # a missing attribute cannot rule a scoped client out, so include them all
+        if route.get('user_id') is not None:
+            candidates.update(self._by_user.get(route['user_id'], ()))
+        else:
+            candidates.update(self._user_scoped)
+        if route.get('lat') is not None:
+            candidates.update(self._by_cell.get(_geo_cell(route['lat'], route['lng']), ()))
+        else:
+            candidates.update(self._geo_scoped)
+        if route.get('type') is not None:
+            candidates.update(self._by_type.get(route['type'], ()))
+        else:
+            candidates.update(self._type_scoped)
+        return candidates
+
+    @staticmethod
+    def encode(message: Dict[str, Any]) -> str:
+        return dumps(message).decode('utf-8')
+
+    def publish_text(self, text: str, key: Optional[str] = None, route: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Queue already-encoded text for every subscribed client; returns the number reached.
+        route: routing attributes from route_for(); None delivers to every client.
+        """
+        self.messages_published += 1
+        if route is None:
+            targets = list(self.clients)
+        else:
+            targets = [c for c in self._candidates(route) if c.subscription.matches(route)]
+        delivered = 0
+        for client in targets:
+            if client.offer(text, key):
+                delivered += 1
+        return delivered
+
+    def publish(self, message: Dict[str, Any], key: Optional[str] = None, route: Optional[Dict[str, Any]] = None) -> str:
+        """Serialize once and fan out; returns the encoded text for reuse (e.g. Redis)."""
+        text = self.encode(message)
+        self.publish_text(text, key, route)
+        return text
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'clients': len(self.clients),
+            'policy': self.policy,
+            'queue_size': self.queue_size,
+            'messages_published': self.messages_published,
+            'queued': sum(len(c.pending) for c in self.clients),
+            'dropped': sum(c.dropped for c in self.clients),
+            'subscriptions': {
+                'all': len(self._all),
+                'own': len(self._user_scoped),
+                'geo': len(self._geo_scoped),
+                'type': len(self._type_scoped),
+            },
+        }
+
+    async def close(self):
+        for client in list(self.clients):
+            client.close()
+            if client.task is not None:
+                client.task.cancel()
+        self.clients.clear()
+        self._all.clear()
+        self._by_user.clear()
+        self._by_cell.clear()
+        self._by_type.clear()
+        self._user_scoped.clear()
+        self._geo_scoped.clear()
+        self._type_scoped.clear()
+
+
+# Process-wide broadcaster used by the API handlers
+broadcaster = Broadcaster()
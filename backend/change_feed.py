@@ -0,0 +1,171 @@
+"""
+Change log for alerts.
+Every mutation is appended with a monotonic sequence number so clients can ask
+for "everything since cursor N" instead of re-downloading the full list.
+Cursors are "<epoch>:<seq>"; a cursor of another epoch, or one that has fallen
+out of the retained window, asks the client for a full reload.
+
+With Redis the log is shared by every instance and worker: one script takes the
+next number from an INCR counter and appends the change to a sorted set scored
+by it, so a cursor issued by one node reads correctly on any other. The epoch
+is stored next to the counter and only changes if Redis loses the log. Without
+Redis (or while it is unreachable) the log is kept in process, with a
+per-process epoch.
+"""
+import json
+import os
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+from backend import redis_client as redis_client_module
+from backend.serialization import dumps
+
+CHANGE_FEED_MAX_ENTRIES = int(os.environ.get('CHANGE_FEED_MAX_ENTRIES', 10000))
+CHANGE_FEED_KEY = os.environ.get('CHANGE_FEED_REDIS_KEY', 'safenow:alert_changes')
+
+OP_UPSERT = 'upsert'  # full alert row
+OP_PATCH = 'patch'    # partial fields to merge into a known alert
+OP_DELETE = 'delete'
+
+# number and append in one step: readers never see seq N+1 before seq N
+RECORD_SCRIPT = """
+redis.call('SET', KEYS[1], ARGV[1], 'NX')
+local seq = redis.call('INCR', KEYS[2])
+redis.call('ZADD', KEYS[3], seq, seq .. ':' .. ARGV[2])
+redis.call('ZREMRANGEBYRANK', KEYS[3], 0, -tonumber(ARGV[3]) - 1)
+return {redis.call('GET', KEYS[1]), seq}
+"""
+
+# epoch, current seq, oldest retained seq and the entries after ARGV[2], as one snapshot
+READ_SCRIPT = """
+redis.call('SET', KEYS[1], ARGV[1], 'NX')
+local oldest = redis.call('ZRANGE', KEYS[3], 0, 0, 'WITHSCORES')
+local entries = {}
+if ARGV[2] ~= '' then
+    entries = redis.call('ZRANGEBYSCORE', KEYS[3], '(' .. ARGV[2], '+inf')
+end
+return {redis.call('GET', KEYS[1]), redis.call('GET', KEYS[2]) or '0', oldest[2] or '', entries}
+"""
+
+Entry = Tuple[int, str, str, Optional[Dict[str, Any]]]
+
+
+def _text(value) -> str:
+    return value.decode('utf-8') if isinstance(value, bytes) else str(value)
+
+
+def merge_changes(entries: Iterable[Entry], after: int) -> List[Dict[str, Any]]:
+    """One change per alert for the entries after seq `after` (latest wins, patches merged)."""
+    merged: Dict[str, Dict[str, Any]] = {}
+    for entry_seq, alert_id, op, alert in entries:
+        if entry_seq <= after:
+            continue
+        previous = merged.get(alert_id)
+        if op == OP_PATCH and previous is not None and previous['op'] != OP_DELETE:
+            previous['alert'] = dict(previous['alert'] or {}, **(alert or {}))
+            previous['seq'] = entry_seq
+            continue
+        merged.pop(alert_id, None)
+        merged[alert_id] = {'seq': entry_seq, 'op': op, 'id': alert_id, 'alert': alert}
+    return list(merged.values())
+
+
+def parse_cursor(cursor: Optional[str]) -> Tuple[Optional[str], Optional[int]]:
+    if not cursor:
+        return None, None
+    epoch, _, seq = cursor.partition(':')
+    if not seq.isdigit():
+        return None, None
+    return epoch, int(seq)
+
+
+def covered(seq: Optional[int], current: int, oldest: Optional[int]) -> bool:
+    """Whether every change after seq is still retained (oldest is the first retained seq)."""
+    if seq is None or seq > current:
+        return False
+    if oldest is None:
+        return seq == current
+    return seq >= oldest - 1
+
+
+class ChangeFeed:
+    def __init__(self, max_entries: int = CHANGE_FEED_MAX_ENTRIES, key: str = CHANGE_FEED_KEY):
+        self.max_entries = max_entries
+        self.key = key
+        self.epoch_key = f'{key}:epoch'
+        self.seq_key = f'{key}:seq'
+        # local log, used while Redis is not available
+        self.epoch = uuid.uuid4().hex[:8]
+        self.seq = 0
+        self._log: Deque[Entry] = deque(maxlen=max_entries)
+        self.shared_records = 0
+        self.local_records = 0
+
+    @property
+    def cursor(self) -> str:
+        """Cursor of the local log."""
+        return f'{self.epoch}:{self.seq}'
+
+    async def record(self, op: str, alert_id, alert: Optional[Dict[str, Any]] = None) -> str:
+        """Append a change; returns the cursor just after it."""
+        redis = redis_client_module.redis
+        if redis is not None:
+            entry = dumps({'id': str(alert_id), 'op': op, 'alert': alert}).decode('utf-8')
+            try:
+                epoch, seq = await redis.eval(RECORD_SCRIPT, 3, self.epoch_key, self.seq_key, self.key,
+                                              uuid.uuid4().hex[:8], entry, self.max_entries)
+                self.shared_records += 1
+                return f'{_text(epoch)}:{int(seq)}'
+            except Exception:
+                pass
+        self.seq += 1
+        self._log.append((self.seq, str(alert_id), op, alert))
+        self.local_records += 1
+        return self.cursor
+
+    async def since(self, cursor: Optional[str]) -> Tuple[Optional[List[Dict[str, Any]]], str]:
+        """
+        Changes after cursor, one entry per alert (latest wins, patches merged),
+        and the cursor to send next. Returns (None, cursor) when the client must
+        reload the full list.
+        """
+        redis = redis_client_module.redis
+        if redis is not None:
+            try:
+                return await self._since_shared(redis, cursor)
+            except Exception:
+                pass
+        return self._since_local(cursor)
+
+    async def _since_shared(self, redis, cursor: Optional[str]):
+        epoch, seq = parse_cursor(cursor)
+        epoch_now, current, oldest, members = await redis.eval(
+            READ_SCRIPT, 3, self.epoch_key, self.seq_key, self.key,
+            uuid.uuid4().hex[:8], '' if seq is None else str(seq))
+        epoch_now, current = _text(epoch_now), int(_text(current))
+        oldest = _text(oldest)
+        next_cursor = f'{epoch_now}:{current}'
+        if epoch != epoch_now or not covered(seq, current, int(float(oldest)) if oldest else None):
+            return None, next_cursor
+        entries = []
+        for member in members:
+            entry_seq, _, raw = _text(member).partition(':')
+            entry = json.loads(raw)
+            entries.append((int(entry_seq), entry['id'], entry['op'], entry.get('alert')))
+        return merge_changes(entries, seq), next_cursor
+
+    def _since_local(self, cursor: Optional[str]):
+        epoch, seq = parse_cursor(cursor)
+        oldest = self._log[0][0] if self._log else None
+        if epoch != self.epoch or not covered(seq, self.seq, oldest):
+            return None, self.cursor
+        return merge_changes(self._log, seq), self.cursor
+
+    def stats(self) -> Dict[str, Any]:
+        return {'shared_records': self.shared_records, 'local_records': self.local_records,
+                'local_retained': len(self._log)}
+
+
+# Process-wide feed used by the API handlers
+change_feed = ChangeFeed()
@@ -7,6 +7,9 @@ import os
 from datetime import datetime
 from typing import Dict, List
 
+from backend.alert_journal import AlertJournal, write_atomic
+from backend.users_repository import UsersRepository
+
 # Path to persistent storage file
 STORAGE_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
 ALERTS_FILE = os.path.join(STORAGE_DIR, 'alerts.json')
@@ -15,6 +18,9 @@ USERS_FILE = os.path.join(STORAGE_DIR, 'users.json')
 # Ensure data directory exists
 os.makedirs(STORAGE_DIR, exist_ok=True)
 
+# Append-only journal in front of alerts.json; compacted into it in the background
+alert_journal = AlertJournal(ALERTS_FILE)
+
 # Demo Users with predefined roles
 DEMO_USERS = {
     # Admin
@@ -99,59 +105,42 @@ DEMO_USERS = {
     }
 }
 
+# Users file parsed once and cached; demo users always take precedence
+users_repository = UsersRepository(USERS_FILE, defaults=DEMO_USERS)
+
 # OTP codes for demo users (for easy login)
 DEMO_OTP = "123456"
 
 
 def load_alerts() -> Dict:
-    """Load alerts from persistent storage"""
-    if os.path.exists(ALERTS_FILE):
-        try:
-            with open(ALERTS_FILE, 'r') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Error loading alerts: {e}")
-    return {}
+    """Load alerts from persistent storage (snapshot plus journal replay)"""
+    return alert_journal.load()
 
 
 def save_alerts(alerts: Dict):
-    """Save alerts to persistent storage"""
+    """Write a full snapshot of alerts atomically (prefer alert_journal.put/delete for single changes)"""
     try:
-        with open(ALERTS_FILE, 'w') as f:
-            json.dump(alerts, f, indent=2, default=str)
+        write_atomic(ALERTS_FILE, json.dumps(alerts, indent=2, default=str).encode('utf-8'))
         print(f"Saved {len(alerts)} alerts to persistent storage")
     except Exception as e:
         print(f"Error saving alerts: {e}")
 
 
 def load_users() -> Dict:
-    """Load users from persistent storage"""
-    if os.path.exists(USERS_FILE):
-        try:
-            with open(USERS_FILE, 'r') as f:
-                stored_users = json.load(f)
-                # Merge with demo users (demo users take precedence)
-                stored_users.update(DEMO_USERS)
-                return stored_users
-        except Exception as e:
-            print(f"Error loading users: {e}")
-    return DEMO_USERS.copy()
+    """Copy of all users (stored users merged with demo users, demo users take precedence)"""
+    return users_repository.to_dict()
 
 
-def save_users(users: Dict):
-    """Save users to persistent storage"""
-    try:
-        with open(USERS_FILE, 'w') as f:
-            json.dump(users, f, indent=2, default=str)
-        print(f"Saved {len(users)} users to persistent storage")
-    except Exception as e:
-        print(f"Error saving users: {e}")
+def save_users(users: Dict = None):
+    """Save users to persistent storage (pass a dict to replace the stored users)"""
+    if users is not None and users is not users_repository:
+        users_repository.replace(users)
+    users_repository.save()
 
 
 def get_user_by_phone(phone: str) -> Dict:
     """Get user by phone number"""
-    users = load_users()
-    return users.get(phone)
+    return users_repository.get(phone)
 
 
 def is_demo_user(phone: str) -> bool:
@@ -315,7 +304,8 @@ def initialize_demo_data():
     print("=" * 60)
     
     # Load existing data
-    users = load_users()
+    users = users_repository
+    users.load()
     alerts = load_alerts()
     
     print(f"\nLoaded {len(users)} users")
@@ -0,0 +1,99 @@
+"""
+SLA escalation for open alerts.
+Each open alert carries one pending 'escalate' job on the job scheduler, due at
+its next deadline: the category's response_time_target for the first level,
+then every auto_escalate_after minutes up to ESCALATION_MAX_LEVEL. Deadlines
+sit in the scheduler's min-heap (and Redis sorted set), so tens of thousands of
+open alerts cost no polling. Invalidation is lazy: nothing is cancelled when an
+alert is accepted or resolved; its job checks the status when it fires and
+simply stops.
+"""
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+from backend.alert_store import parse_timestamp
+
+ESCALATION_JOB = 'escalate'
+ESCALATION_MAX_LEVEL = int(os.environ.get('ESCALATION_MAX_LEVEL', 3))
+# used when an alert matches no category (minutes)
+DEFAULT_RESPONSE_TARGET_MIN = 20
+DEFAULT_ESCALATE_AFTER_MIN = 40
+# statuses in which a missed deadline escalates (assigned = not accepted yet)
+ESCALATABLE_STATUSES = ('pending', 'open', 'active', 'assigned')
+
+
+class EscalationEngine:
+    def __init__(self, scheduler, categories,
+                 load_alert: Callable[[str], Awaitable[Optional[Dict[str, Any]]]],
+                 escalate: Callable[[Dict[str, Any], int], Awaitable[Any]],
+                 max_level: int = ESCALATION_MAX_LEVEL):
+        self.scheduler = scheduler
+        self.categories = categories
+        # load_alert(alert_id) -> current alert (memory or DB); escalate(alert, level) acts on a miss
+        self.load_alert = load_alert
+        self.escalate = escalate
+        self.max_level = max_level
+        self.escalated = 0
+        self.dismissed = 0
+
+    def deadline(self, alert: Dict[str, Any], level: int) -> Optional[float]:
+        """Epoch seconds at which the alert escalates to level, or None without a creation time."""
+        created = parse_timestamp(alert.get('created_at'))
+        if created is None:
+            return None
+        category = self.categories.for_alert(alert) or {}
+        target = category.get('response_time_target') or DEFAULT_RESPONSE_TARGET_MIN
+        after = category.get('auto_escalate_after') or max(DEFAULT_ESCALATE_AFTER_MIN, target)
+        minutes = target if level == 1 else after * (level - 1)
+        return created + minutes * 60
+
+    async def track(self, alert: Dict[str, Any], level: int = 1, replace: bool = True) -> Optional[float]:
+        """Schedule the alert's escalation to level; returns the deadline, if any."""
+        if level > self.max_level:
+            return None
+        run_at = self.deadline(alert, level)
+        if run_at is None:
+            return None
+        await self.scheduler.schedule(ESCALATION_JOB, str(alert['id']), run_at=run_at,
+                                      payload={'level': level}, replace=replace)
+        return run_at
+
+    async def rebuild(self, alerts: Iterable[Dict[str, Any]]) -> int:
+        """
+        Re-arm the timers of open alerts at startup (jobs still queued in Redis are kept).
+        Deadlines missed while no instance was running escalate once, at the latest
+        missed level. alerts carry 'escalation_level', the number of escalations so far.
+        """
+        now = time.time()
+        count = 0
+        for alert in alerts:
+            if alert.get('status') not in ESCALATABLE_STATUSES:
+                continue
+            level = int(alert.get('escalation_level') or 0) + 1
+            if level > self.max_level:
+                continue
+            while level < self.max_level and (self.deadline(alert, level + 1) or now + 1) <= now:
+                level += 1
+            run_at = self.deadline(alert, level)
+            if run_at is None:
+                continue
+            await self.scheduler.schedule(ESCALATION_JOB, str(alert['id']), run_at=max(run_at, now),
+                                          payload={'level': level}, replace=False)
+            count += 1
+        return count
+
+    async def on_due(self, alert_id: str, payload: Dict[str, Any]):
+        """Job handler: escalate if the alert is still waiting for a responder, then arm the next level."""
+        level = int(payload.get('level') or 1)
+        alert = await self.load_alert(alert_id)
+        if not alert or alert.get('status') not in ESCALATABLE_STATUSES:
+            # accepted, resolved or gone since the timer was armed
+            self.dismissed += 1
+            return
+        await self.escalate(alert, level)
+        self.escalated += 1
+        await self.track(alert, level + 1)
+
+    def stats(self):
+        return {'max_level': self.max_level, 'escalated': self.escalated, 'dismissed': self.dismissed}
@@ -1,41 +1,163 @@
+import os
 import time
-from typing import Optional
+from collections import OrderedDict
+from typing import Dict, List, Optional
 from backend import redis_client
 
-_CACHE = {}
 _TTL = 60  # seconds
+# Upper bound on in-process entries before least-recently-used ones are evicted
+_MAX_ENTRIES = int(os.environ.get('ETA_CACHE_MAX_ENTRIES', 50000))
+# Coordinates are rounded to this many decimals in keys (4 -> ~11 m)
+_KEY_PRECISION = int(os.environ.get('ETA_CACHE_PRECISION', 4))
+
+
+class TTLCache:
+    """Size-bounded LRU cache whose entries also expire after a TTL."""
+
+    def __init__(self, max_entries: int = _MAX_ENTRIES, ttl: int = _TTL, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key: str):
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        value, expires_at = item
+        if self._clock() >= expires_at:
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value, ttl: Optional[int] = None):
+        now = self._clock()
+        self._data[key] = (value, now + (self.ttl if ttl is None else ttl))
+        self._data.move_to_end(key)
+        # drop expired entries sitting at the cold end, then enforce the size bound
+        while self._data:
+            oldest_key, (_, expires_at) = next(iter(self._data.items()))
+            if expires_at > now or oldest_key == key:
+                break
+            del self._data[oldest_key]
+            self.expirations += 1
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'size': len(self._data),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
+
+
+_CACHE = TTLCache()
+_REDIS_STATS = {'hits': 0, 'misses': 0, 'errors': 0}
+
+
+def eta_key(origin: Dict[str, float], dest: Dict[str, float], precision: int = _KEY_PRECISION) -> str:
+    """Cache key for an origin/destination pair; nearby points share a key."""
+    return (f"eta:{round(float(origin['lat']), precision)},{round(float(origin['lng']), precision)}:"
+            f"{round(float(dest['lat']), precision)},{round(float(dest['lng']), precision)}")
 
-def _now():
-    return int(time.time())
 
 def get_cached(key: str) -> Optional[int]:
-    item = _CACHE.get(key)
-    if not item:
-        return None
-    val, exp = item
-    if _now() > exp:
-        _CACHE.pop(key, None)
-        return None
-    return val
+    return _CACHE.get(key)
+
 
 def set_cached(key: str, value: int, ttl: int = _TTL):
-    _CACHE[key] = (value, _now() + ttl)
+    _CACHE.set(key, value, ttl)
 
-async def get_cached_redis(key: str) -> Optional[int]:
+
+async def get_cached_redis(key: str, check_local: bool = True) -> Optional[int]:
+    """
+    Read-through lookup: in-process cache first, then Redis (filling the local tier on a hit).
+    Pass check_local=False when the caller has just missed the local tier itself.
+    """
+    if check_local:
+        value = _CACHE.get(key)
+        if value is not None:
+            return value
     try:
         if redis_client.redis is None:
             return None
         v = await redis_client.redis.get(key)
-        if not v:
+        if v is None:
+            _REDIS_STATS['misses'] += 1
             return None
-        return int(v)
+        _REDIS_STATS['hits'] += 1
+        value = int(v)
+        _CACHE.set(key, value)
+        return value
     except Exception:
+        _REDIS_STATS['errors'] += 1
         return None
 
+
 async def set_cached_redis(key: str, value: int, ttl: int = _TTL):
+    """Write-through: store in the in-process cache and in Redis."""
+    _CACHE.set(key, value, ttl)
     try:
         if redis_client.redis is None:
             return
         await redis_client.redis.set(key, str(value), ex=ttl)
     except Exception:
-        pass
+        _REDIS_STATS['errors'] += 1
+
+
+async def get_many_cached_redis(keys: List[str]) -> List[Optional[int]]:
+    """Redis tier lookup for several keys in one MGET round trip; hits fill the local tier."""
+    results: List[Optional[int]] = [None] * len(keys)
+    try:
+        if redis_client.redis is None or not keys:
+            return results
+        values = await redis_client.redis.mget(keys)
+        for i, v in enumerate(values):
+            if v is None:
+                _REDIS_STATS['misses'] += 1
+                continue
+            _REDIS_STATS['hits'] += 1
+            results[i] = int(v)
+            _CACHE.set(keys[i], results[i])
+    except Exception:
+        _REDIS_STATS['errors'] += 1
+    return results
+
+
+async def set_many_cached_redis(items: Dict[str, int], ttl: int = _TTL):
+    """Write-through for several keys; the Redis writes share one pipeline."""
+    for key, value in items.items():
+        _CACHE.set(key, value, ttl)
+    try:
+        if redis_client.redis is None or not items:
+            return
+        pipe = redis_client.redis.pipeline()
+        for key, value in items.items():
+            pipe.set(key, str(value), ex=ttl)
+        await pipe.execute()
+    except Exception:
+        _REDIS_STATS['errors'] += 1
+
+
+def cache_stats() -> Dict[str, Dict[str, int]]:
+    return {'local': _CACHE.stats(), 'redis': dict(_REDIS_STATS)}
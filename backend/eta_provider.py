@@ -0,0 +1,218 @@
+"""
+Async ETA provider.
+Routes ETA lookups through a pluggable Directions backend using one pooled
+HTTP client, coalesces concurrent lookups for the same origin/destination
+pair and caps the number of requests in flight.
+"""
+import abc
+import asyncio
+import os
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+
+from backend.eta_cache import eta_key, get_cached, get_cached_redis, set_cached_redis, get_many_cached_redis, set_many_cached_redis
+from backend.utils import haversine_distance, haversine_batch, fallback_eta_batch, FALLBACK_SPEED_M_S
+
+GOOGLE_DIRECTIONS_KEY = os.environ.get('GOOGLE_DIRECTIONS_KEY')
+# Point this at a stand-in server to exercise the HTTP path without Google
+DIRECTIONS_BASE_URL = os.environ.get('DIRECTIONS_BASE_URL', 'https://maps.googleapis.com/maps/api')
+ETA_MAX_CONCURRENCY = int(os.environ.get('ETA_MAX_CONCURRENCY', 10))
+ETA_TIMEOUT_SECONDS = float(os.environ.get('ETA_TIMEOUT_SECONDS', 5))
+# Distance Matrix API allows at most 25 origins per request
+MATRIX_MAX_ORIGINS = 25
+# Straight-line estimates are only kept briefly so a recovered provider is asked again soon
+ETA_FALLBACK_TTL_SECONDS = int(os.environ.get('ETA_FALLBACK_TTL_SECONDS', 10))
+
+
+def _latlng(point: Dict[str, float]) -> str:
+    return f"{point['lat']},{point['lng']}"
+
+
+class DirectionsBackend(abc.ABC):
+    """Resolves a single origin -> destination pair to a travel time in seconds."""
+
+    # False for backends that never leave the process
+    remote = True
+
+    @abc.abstractmethod
+    async def route_seconds(self, client: httpx.AsyncClient, origin: Dict[str, float], dest: Dict[str, float]) -> Optional[int]:
+        """Travel time in seconds, or None if the pair could not be routed."""
+
+    async def matrix_seconds(self, client: httpx.AsyncClient, origins: List[Dict[str, float]], dest: Dict[str, float]) -> List[Optional[int]]:
+        """Travel times from each origin to dest; None for pairs that could not be routed."""
+        results = await asyncio.gather(*[self.route_seconds(client, o, dest) for o in origins], return_exceptions=True)
+        return [r if isinstance(r, int) else None for r in results]
+
+
+class GoogleDirectionsBackend(DirectionsBackend):
+    """Google Directions API, or any server speaking the same JSON shape."""
+
+    def __init__(self, api_key: Optional[str], base_url: str = DIRECTIONS_BASE_URL):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+
+    async def route_seconds(self, client, origin, dest):
+        params = {'origin': _latlng(origin), 'destination': _latlng(dest)}
+        if self.api_key:
+            params['key'] = self.api_key
+        resp = await client.get(f'{self.base_url}/directions/json', params=params)
+        data = resp.json()
+        if data.get('routes'):
+            return int(data['routes'][0]['legs'][0]['duration']['value'])
+        return None
+
+    async def matrix_seconds(self, client, origins, dest):
+        params = {'origins': '|'.join(_latlng(o) for o in origins), 'destinations': _latlng(dest)}
+        if self.api_key:
+            params['key'] = self.api_key
+        resp = await client.get(f'{self.base_url}/distancematrix/json', params=params)
+        data = resp.json()
+        results: List[Optional[int]] = [None] * len(origins)
+        for i, row in enumerate((data.get('rows') or [])[:len(origins)]):
+            element = (row.get('elements') or [{}])[0]
+            if element.get('status') == 'OK':
+                results[i] = int(element['duration']['value'])
+        return results
+
+
+class StraightLineBackend(DirectionsBackend):
+    """No routing provider: speed-based estimate over the great-circle distance."""
+
+    remote = False
+
+    async def route_seconds(self, client, origin, dest):
+        return None
+
+
+def default_backend() -> DirectionsBackend:
+    if GOOGLE_DIRECTIONS_KEY or os.environ.get('DIRECTIONS_BASE_URL'):
+        return GoogleDirectionsBackend(GOOGLE_DIRECTIONS_KEY, DIRECTIONS_BASE_URL)
+    return StraightLineBackend()
+
+
+class EtaProvider:
+    def __init__(self, backend: Optional[DirectionsBackend] = None,
+                 max_concurrency: int = ETA_MAX_CONCURRENCY,
+                 timeout: float = ETA_TIMEOUT_SECONDS, fallback_ttl: int = ETA_FALLBACK_TTL_SECONDS):
+        self.backend = backend or default_backend()
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.fallback_ttl = fallback_ttl
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.requests_sent = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            limits = httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency)
+            self._client = httpx.AsyncClient(timeout=self.timeout, limits=limits)
+        return self._client
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def set_backend(self, backend: DirectionsBackend):
+        self.backend = backend
+
+    @staticmethod
+    def cache_key(origin: Dict[str, float], dest: Dict[str, float]) -> str:
+        return eta_key(origin, dest)
+
+    async def eta_seconds(self, origin: Dict[str, float], dest: Dict[str, float]) -> Optional[int]:
+        """ETA in seconds from origin to dest; concurrent identical lookups share one request."""
+        key = self.cache_key(origin, dest)
+        cached = get_cached(key)
+        if cached is not None:
+            return cached
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._lookup(key, origin, dest))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t, k=key: self._inflight.pop(k, None))
+        # shield so one cancelled caller does not cancel the shared lookup
+        return await asyncio.shield(task)
+
+    async def _lookup(self, key: str, origin: Dict[str, float], dest: Dict[str, float]) -> int:
+        try:
+            cached = await get_cached_redis(key, check_local=False)
+            if cached is not None:
+                return cached
+            seconds = None
+            if self.backend.remote:
+                try:
+                    async with self.semaphore:
+                        self.requests_sent += 1
+                        seconds = await self.backend.route_seconds(self.client, origin, dest)
+                except Exception as e:
+                    print(f"⚠️ Directions lookup failed, using straight-line ETA: {e}")
+            if seconds is None:
+                seconds = fallback_eta_seconds(origin, dest)
+                await set_cached_redis(key, seconds, ttl=self.fallback_ttl)
+            else:
+                await set_cached_redis(key, seconds)
+            return seconds
+        except Exception as e:
+            print(f"⚠️ ETA lookup failed, using straight-line ETA: {e}")
+            return fallback_eta_seconds(origin, dest)
+
+    async def eta_matrix(self, origins: List[Dict[str, float]], dest: Dict[str, float]) -> List[int]:
+        """
+        ETAs in seconds from every origin to one destination.
+        Cache misses are resolved with a single distance-matrix request (chunked at
+        MATRIX_MAX_ORIGINS); pairs the provider cannot route get the straight-line estimate.
+        """
+        keys = [self.cache_key(o, dest) for o in origins]
+        results: List[Optional[int]] = [get_cached(k) for k in keys]
+        missing = [i for i, v in enumerate(results) if v is None]
+        for i, cached in zip(missing, await get_many_cached_redis([keys[i] for i in missing])):
+            results[i] = cached
+        missing = [i for i in missing if results[i] is None]
+        if not missing:
+            return results
+
+        if self.backend.remote:
+            for start in range(0, len(missing), MATRIX_MAX_ORIGINS):
+                chunk = missing[start:start + MATRIX_MAX_ORIGINS]
+                try:
+                    async with self.semaphore:
+                        self.requests_sent += 1
+                        seconds = await self.backend.matrix_seconds(self.client, [origins[i] for i in chunk], dest)
+                    for i, sec in zip(chunk, seconds):
+                        results[i] = sec
+                except Exception as e:
+                    print(f"⚠️ Distance matrix lookup failed, using straight-line ETA: {e}")
+
+        routed = {keys[i]: results[i] for i in missing if results[i] is not None}
+        if routed:
+            await set_many_cached_redis(routed)
+
+        failed = [i for i in missing if results[i] is None]
+        if failed:
+            dists = haversine_batch(dest['lat'], dest['lng'],
+                                    np.array([origins[i]['lat'] for i in failed], dtype=np.float64),
+                                    np.array([origins[i]['lng'] for i in failed], dtype=np.float64))
+            for i, eta in zip(failed, fallback_eta_batch(dists)):
+                results[i] = int(eta)
+            await set_many_cached_redis({keys[i]: results[i] for i in failed}, ttl=self.fallback_ttl)
+        return results
+
+
+def fallback_eta_seconds(origin: Dict[str, float], dest: Dict[str, float]) -> int:
+    dist = haversine_distance(origin['lat'], origin['lng'], dest['lat'], dest['lng'])
+    return int(dist / FALLBACK_SPEED_M_S)
+
+
+# Process-wide provider used by the API handlers
+eta_provider = EtaProvider()
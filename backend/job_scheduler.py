@@ -0,0 +1,249 @@
+"""
+Deferred jobs (auto-assign, escalation) on a min-heap with a durable queue.
+Each job is identified by kind and key (e.g. auto_assign/<alert id>), so
+rescheduling it replaces the earlier run time. A single task sleeps until the
+earliest deadline; pushes and pops are O(log n), and no coroutine sleeps per job.
+
+With Redis the job is also stored in a sorted set scored by its run time (plus
+a hash of payloads), so pending jobs survive restarts and deploys and are seen
+by every instance. A job's run time and payload are written by one script, so
+a job kept with replace=False also keeps the payload it was queued with.
+
+A due job is claimed by an atomic check-and-ZREM script: exactly one worker
+across instances gets it. Claiming is at-most-once: the job leaves the queue
+before its handler runs, so a handler that fails, or that is still running
+when stop() cancels it (or when the process dies), is not retried. Handlers
+that must not be lost reschedule themselves. Without Redis (or while it is
+unreachable) jobs live only in the local heap.
+"""
+import asyncio
+import heapq
+import json
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+JOBS_KEY = os.environ.get('JOBS_REDIS_KEY', 'safenow:jobs')
+# how often Redis is asked for jobs due soon (scheduled by other instances or before a restart)
+JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', 2.0))
+JOB_POLL_BATCH = 500
+
+# queue the job with its payload; with ARGV[3] == '0' an already queued job keeps
+# both its run time and its payload. Returns 1 if the job was written.
+SCHEDULE_SCRIPT = """
+if ARGV[3] == '0' and redis.call('ZSCORE', KEYS[1], ARGV[1]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], ARGV[2], ARGV[1])
+redis.call('HSET', KEYS[2], ARGV[1], ARGV[4])
+return 1
+"""
+
+# remove the job and return its payload only if it is still due (it may have been
+# rescheduled later, or claimed by another instance, since we read its score)
+CLAIM_SCRIPT = """
+local score = redis.call('ZSCORE', KEYS[1], ARGV[1])
+if not score or tonumber(score) > tonumber(ARGV[2]) then
+    return false
+end
+redis.call('ZREM', KEYS[1], ARGV[1])
+local payload = redis.call('HGET', KEYS[2], ARGV[1])
+redis.call('HDEL', KEYS[2], ARGV[1])
+return payload or ''
+"""
+
+Handler = Callable[[str, Dict[str, Any]], Awaitable[Any]]
+
+
+def job_id(kind: str, key: str) -> str:
+    return f'{kind}:{key}'
+
+
+class JobScheduler:
+    def __init__(self, key: str = JOBS_KEY, poll_interval: float = JOB_POLL_INTERVAL):
+        self.key = key
+        self.payload_key = f'{key}:payload'
+        self.poll_interval = poll_interval
+        self.redis = None
+        self._handlers: Dict[str, Handler] = {}
+        # (run_at, job id); superseded entries are skipped lazily when popped
+        self._heap: List[Tuple[float, str]] = []
+        self._due: Dict[str, float] = {}
+        # payloads of jobs that could not be written to Redis
+        self._local: Dict[str, Dict[str, Any]] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._running: set = set()
+        self._next_poll = 0.0
+        self.dispatched = 0
+        self.lost_claims = 0
+
+    def register(self, kind: str, handler: Handler):
+        """handler(key, payload) is awaited when a job of this kind is due."""
+        self._handlers[kind] = handler
+
+    def _push(self, jid: str, run_at: float):
+        if self._due.get(jid) == run_at:
+            return
+        self._due[jid] = run_at
+        heapq.heappush(self._heap, (run_at, jid))
+        # only an earlier deadline than the one being slept on needs a wakeup
+        if self._wakeup is not None and self._heap[0][1] == jid:
+            self._wakeup.set()
+
+    async def schedule(self, kind: str, key: str, delay: float = 0, run_at: Optional[float] = None,
+                       payload: Optional[Dict[str, Any]] = None, replace: bool = True) -> str:
+        """
+        Run job kind/key at run_at (epoch seconds), or delay seconds from now.
+        With replace=False an already scheduled job keeps its run time and payload.
+        """
+        jid = job_id(kind, key)
+        run_at = time.time() + delay if run_at is None else run_at
+        if not replace and jid in self._due:
+            return jid
+        data = {'kind': kind, 'key': key, 'payload': payload or {}}
+        if self.redis is not None:
+            try:
+                added = await self.redis.eval(SCHEDULE_SCRIPT, 2, self.key, self.payload_key,
+                                              jid, run_at, int(replace), json.dumps(data))
+                if not added:
+                    # already queued (e.g. by another instance); the poll will pick it up
+                    return jid
+                self._local.pop(jid, None)
+            except Exception as e:
+                print(f"⚠️ Job queue unavailable, keeping {jid} in memory: {e}")
+                self._local[jid] = data
+        else:
+            self._local[jid] = data
+        self._push(jid, run_at)
+        return jid
+
+    async def cancel(self, kind: str, key: str):
+        jid = job_id(kind, key)
+        self._due.pop(jid, None)
+        self._local.pop(jid, None)
+        if self.redis is not None:
+            try:
+                async with self.redis.pipeline(transaction=True) as pipe:
+                    pipe.zrem(self.key, jid)
+                    pipe.hdel(self.payload_key, jid)
+                    await pipe.execute()
+            except Exception as e:
+                print(f"⚠️ Could not cancel job {jid}: {e}")
+
+    async def start(self, redis=None):
+        """Start dispatching (call from the event loop); pending Redis jobs are picked up by the first poll."""
+        if self._task is not None:
+            return
+        if redis is not None:
+            try:
+                await redis.ping()
+            except Exception as e:
+                print(f"⚠️ Job queue unavailable, scheduling in memory: {e}")
+                redis = None
+        self.redis = redis
+        self._wakeup = asyncio.Event()
+        self._next_poll = 0.0
+        self._task = asyncio.create_task(self._run())
+        mode = 'Redis-backed' if redis is not None else 'in-memory'
+        print(f"⏱️  Job scheduler started ({mode}, {len(self._due)} jobs pending)")
+
+    async def _poll(self, now: float):
+        """Mirror jobs due before the next poll from Redis into the local heap."""
+        self._next_poll = now + self.poll_interval
+        try:
+            rows = await self.redis.zrangebyscore(self.key, '-inf', now + self.poll_interval,
+                                                  start=0, num=JOB_POLL_BATCH, withscores=True)
+        except Exception as e:
+            print(f"⚠️ Job queue poll failed: {e}")
+            return
+        for jid, run_at in rows:
+            self._push(jid.decode() if isinstance(jid, bytes) else jid, run_at)
+
+    async def _run(self):
+        while True:
+            now = time.time()
+            if self.redis is not None and now >= self._next_poll:
+                await self._poll(now)
+            deadline = self._heap[0][0] if self._heap else None
+            if self.redis is not None:
+                deadline = self._next_poll if deadline is None else min(deadline, self._next_poll)
+            delay = deadline - time.time() if deadline is not None else None
+            if delay is None or delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now:
+                run_at, jid = heapq.heappop(self._heap)
+                if self._due.get(jid) != run_at:
+                    continue
+                del self._due[jid]
+                data = await self._claim(jid, now)
+                if data is None:
+                    self.lost_claims += 1
+                    continue
+                self._dispatch(jid, data)
+
+    async def _claim(self, jid: str, now: float) -> Optional[Dict[str, Any]]:
+        data = self._local.pop(jid, None)
+        if data is not None or self.redis is None:
+            return data
+        try:
+            raw = await self.redis.eval(CLAIM_SCRIPT, 2, self.key, self.payload_key, jid, now)
+        except Exception as e:
+            print(f"⚠️ Could not claim job {jid}: {e}")
+            return None
+        if raw is None:
+            return None
+        if not raw:
+            kind, _, key = jid.partition(':')
+            return {'kind': kind, 'key': key, 'payload': {}}
+        return json.loads(raw)
+
+    def _dispatch(self, jid: str, data: Dict[str, Any]):
+        handler = self._handlers.get(data['kind'])
+        if handler is None:
+            print(f"⚠️ No handler for job {jid}")
+            return
+        task = asyncio.create_task(self._call(jid, handler, data))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+        self.dispatched += 1
+
+    @staticmethod
+    async def _call(jid: str, handler: Handler, data: Dict[str, Any]):
+        try:
+            await handler(data['key'], data.get('payload') or {})
+        except Exception as e:
+            print(f"⚠️ Job {jid} failed: {e}")
+
+    async def stop(self):
+        """Stop dispatching; jobs still queued in Redis run after the next start."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for task in list(self._running):
+            task.cancel()
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+    def stats(self):
+        return {
+            'durable': self.redis is not None,
+            'scheduled': len(self._due),
+            'in_memory': len(self._local),
+            'next_run_in_s': max(min(self._due.values()) - time.time(), 0) if self._due else None,
+            'dispatched': self.dispatched,
+            'lost_claims': self.lost_claims,
+        }
+
+
+job_scheduler = JobScheduler()
@@ -0,0 +1,109 @@
+"""
+Deadline-driven media expiry.
+Every stored file is pushed onto a min-heap keyed by its expiry time; a single
+task sleeps until the earliest deadline (or until an earlier one is scheduled),
+pops only what is due and releases those entries in a small thread pool (a
+file is unlinked once no entry references it), so the event loop never blocks
+on unlink and no tick walks the whole media index.
+"""
+import asyncio
+import heapq
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Set, Tuple
+
+# due items within this many seconds of each other are removed in one batch
+EXPIRY_BATCH_SLACK = 1.0
+
+
+class MediaExpiryScheduler:
+    def __init__(self, store, workers: int = 2, batch_slack: float = EXPIRY_BATCH_SLACK, counters=None):
+        self.store = store
+        # MediaCounters kept in step with each batch, if given
+        self.counters = counters
+        self.batch_slack = batch_slack
+        # (expires_ts, media id, filepath, size)
+        self._heap: List[Tuple[float, str, str, int]] = []
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='media-expiry')
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        # ids removed before their deadline; their heap items are skipped when popped
+        self._forgotten: Set[str] = set()
+        self.deleted_files = 0
+        self.deleted_bytes = 0
+
+    def schedule(self, media_id: str, expires_ts: float, filepath: str, size: int = 0):
+        heapq.heappush(self._heap, (expires_ts, media_id, filepath, size))
+        # only an earlier deadline than the one being slept on needs a wakeup
+        if self._wakeup is not None and self._heap[0][1] == media_id:
+            self._wakeup.set()
+
+    def forget(self, media_ids: Iterable[str]):
+        """Drop scheduled entries that were removed some other way (a rolled-back upload)."""
+        self._forgotten.update(media_ids)
+
+    def start(self):
+        """Rebuild the heap from the media index and start expiring (call from the event loop)."""
+        if self._task is not None:
+            return
+        self._heap = [tuple(row) for row in self.store.schedule()]
+        heapq.heapify(self._heap)
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        print(f"🗑️  Media expiry scheduler started ({len(self._heap)} files tracked)")
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            delay = self._heap[0][0] - time.time() if self._heap else None
+            if delay is None or delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+            due = []
+            horizon = time.time() + self.batch_slack
+            while self._heap and self._heap[0][0] <= horizon:
+                item = heapq.heappop(self._heap)
+                if item[1] in self._forgotten:
+                    self._forgotten.discard(item[1])
+                    continue
+                due.append(item)
+            if not due:
+                continue
+            try:
+                await loop.run_in_executor(self._executor, self._expire, due)
+            except Exception as e:
+                print(f"⚠️ Media expiry error: {e}")
+
+    def _expire(self, due: List[Tuple[float, str, str, int]]):
+        if self.counters is not None:
+            self.counters.expired(len(due))
+        removed = self.store.release(media_id for _, media_id, _, _ in due)
+        if self.counters is not None:
+            self.counters.removed(len(due))
+        deleted_size = sum(size for _, size in removed)
+        self.deleted_files += len(removed)
+        self.deleted_bytes += deleted_size
+        print(f"🗑️  Expired {len(due)} media entries, {len(removed)} files removed "
+              f"({deleted_size / 1024:.2f} KB freed)")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._executor.shutdown(wait=True)
+
+    def stats(self):
+        return {
+            'scheduled': len(self._heap),
+            'next_expiry_in_s': max(self._heap[0][0] - time.time(), 0) if self._heap else None,
+            'deleted_files': self.deleted_files,
+            'deleted_bytes': self.deleted_bytes,
+        }
@@ -5,97 +5,263 @@ Handles photo and audio file storage with automatic cleanup after 30 minutes
 import os
 import uuid
 import base64
+import hashlib
+import re
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
-import json
+from typing import List, Dict, Optional, Tuple
 from pathlib import Path
 import asyncio
 
+import aiofiles
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # optional: without Pillow photos are served only as uploaded
+    Image = None
+
+from backend.media_expiry import MediaExpiryScheduler
+from backend.media_stats import MediaCounters
+from backend.media_store import MediaStore
+
 # Media storage directory
 MEDIA_DIR = os.path.join(os.path.dirname(__file__), '..', 'media')
 PHOTOS_DIR = os.path.join(MEDIA_DIR, 'photos')
 AUDIO_DIR = os.path.join(MEDIA_DIR, 'audio')
 
-# Metadata file to track uploads and their expiry times
+# Index of uploads and their expiry times (SQLite, WAL mode)
+MEDIA_DB_FILE = os.path.join(MEDIA_DIR, 'media.sqlite3')
+# Previous JSON metadata file, imported into the index on first start
 METADATA_FILE = os.path.join(MEDIA_DIR, 'media_metadata.json')
 
 # Create directories if they don't exist
 os.makedirs(PHOTOS_DIR, exist_ok=True)
 os.makedirs(AUDIO_DIR, exist_ok=True)
 
+# Running totals for /media/stats, reconciled periodically against the disk
+media_counters = MediaCounters()
+media_store = MediaStore(MEDIA_DB_FILE, legacy_json=METADATA_FILE, counters=media_counters)
+# Deletes each file at its expiry time (started from the app's startup hook)
+media_expiry = MediaExpiryScheduler(media_store, counters=media_counters)
+
+# Upload limits (per file) and streaming parameters
+MAX_PHOTO_BYTES = int(os.environ.get('MAX_PHOTO_BYTES', 10 * 1024 * 1024))
+MAX_AUDIO_BYTES = int(os.environ.get('MAX_AUDIO_BYTES', 25 * 1024 * 1024))
+UPLOAD_QUEUE_CHUNKS = 4  # chunks buffered per file before the reader waits on the disk
+
+MEDIA_KINDS = {
+    'photo': {'dir': PHOTOS_DIR, 'url': '/media/photos', 'default_ext': 'jpg',
+              'extensions': {'jpg', 'jpeg', 'png', 'webp'}, 'max_bytes': MAX_PHOTO_BYTES},
+    'audio': {'dir': AUDIO_DIR, 'url': '/media/audio', 'default_ext': 'webm',
+              'extensions': {'webm', 'mp3', 'ogg', 'wav', 'm4a'}, 'max_bytes': MAX_AUDIO_BYTES},
+    # renditions generated from uploaded photos (never uploaded directly)
+    'photo_display': {'dir': PHOTOS_DIR, 'url': '/media/photos', 'default_ext': 'jpg',
+                      'extensions': set(), 'max_bytes': MAX_PHOTO_BYTES},
+    'photo_thumbnail': {'dir': PHOTOS_DIR, 'url': '/media/photos', 'default_ext': 'jpg',
+                        'extensions': set(), 'max_bytes': MAX_PHOTO_BYTES},
+}
+
+# Photo renditions: kind -> (filename suffix, longest side in px, JPEG quality), largest first
+PHOTO_RENDITIONS = {
+    'photo_display': ('display', int(os.environ.get('PHOTO_DISPLAY_MAX_PX', 1600)), 82),
+    'photo_thumbnail': ('thumb', int(os.environ.get('PHOTO_THUMBNAIL_MAX_PX', 320)), 70),
+}
+IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', 2))
+_image_pool: Optional[ProcessPoolExecutor] = None
+
+
+class MediaTooLarge(Exception):
+    """A file exceeded its per-file size cap."""
+
+
+def _media_info(kind: str, filename: str, expiry_time: str) -> Dict:
+    return {
+        'filename': filename,
+        'url': f"{MEDIA_KINDS[kind]['url']}/{filename}",
+        'expires_at': expiry_time
+    }
+
+
+async def _record_media(kind: str, alert_id: str, filename: str, filepath: str, size: int = 0,
+                        content_hash: Optional[str] = None, created: Optional[List[str]] = None,
+                        src: Optional[str] = None) -> Tuple[Optional[Dict], Optional[Dict]]:
+    """
+    Reference a stored file and index it for an alert in one step (src, a
+    finished temp file, is moved into place if the file is not stored yet).
+    Returns (public info, None) for a new entry, whose id is appended to created;
+    (None, existing entry) if the alert already has the file; (None, None) if
+    the file is not stored and no src was given.
+    """
+    # Calculate expiry time (30 minutes from now)
+    expires = datetime.now() + timedelta(minutes=30)
+    expiry_time = expires.isoformat()
+    entry, added = await asyncio.to_thread(media_store.index, {
+        'filename': filename,
+        'filepath': filepath,
+        'type': kind,
+        'alert_id': alert_id,
+        'size': size,
+        'content_hash': content_hash,
+        'created_at': datetime.now().isoformat(),
+        'expires_at': expiry_time
+    }, src)
+    if not added:
+        return None, entry
+    if created is not None:
+        created.append(entry['id'])
+    media_expiry.schedule(entry['id'], expires.timestamp(), filepath, entry['size'])
+    media_counters.added()
+    print(f"✓ {kind.replace('_', ' ').capitalize()} saved: {filename} (expires at {expiry_time})")
+    return _media_info(kind, filename, expiry_time), None
+
+
+def render_photo(src: str, targets: List[tuple]) -> Dict[str, int]:
+    """
+    Write downscaled JPEG renditions of src; targets are (path, max_px, quality),
+    largest first. Runs in a worker process. Returns the size of each file written.
+    """
+    sizes = {}
+    with Image.open(src) as image:
+        # let the JPEG decoder skip detail we are about to throw away
+        image.draft('RGB', (targets[0][1], targets[0][1]))
+        image = ImageOps.exif_transpose(image)
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        for path, max_px, quality in targets:
+            image.thumbnail((max_px, max_px))
+            image.save(path, 'JPEG', quality=quality, optimize=True, progressive=True)
+            sizes[path] = os.path.getsize(path)
+    return sizes
+
+
+def _get_image_pool() -> ProcessPoolExecutor:
+    global _image_pool
+    if _image_pool is None:
+        _image_pool = ProcessPoolExecutor(max_workers=IMAGE_WORKERS)
+    return _image_pool
+
+
+def shutdown_image_pool():
+    global _image_pool
+    if _image_pool is not None:
+        _image_pool.shutdown(wait=False, cancel_futures=True)
+        _image_pool = None
 
-def load_metadata() -> Dict:
-    """Load media metadata from file"""
-    if os.path.exists(METADATA_FILE):
-        try:
-            with open(METADATA_FILE, 'r') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Error loading metadata: {e}")
-    return {"files": []}
 
+def rendition_filename(filename: str, kind: str) -> str:
+    return f"{os.path.splitext(filename)[0]}_{PHOTO_RENDITIONS[kind][0]}.jpg"
 
-def save_metadata(metadata: Dict) -> None:
-    """Save media metadata to file"""
+
+RENDITION_URL_KEYS = {'photo_display': 'display_url', 'photo_thumbnail': 'thumbnail_url'}
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+async def _add_photo_renditions(info: Dict, filepath: str, alert_id: str, content_hash: str,
+                                created: Optional[List[str]] = None) -> Dict:
+    """Attach display_url/thumbnail_url to a stored photo's info (the original if rendering is unavailable)"""
+    info['display_url'] = info['thumbnail_url'] = info['url']
+    if Image is None:
+        return info
+    photos_dir = MEDIA_KINDS['photo']['dir']
+    pending = []
+    for kind, (_, max_px, quality) in PHOTO_RENDITIONS.items():
+        name = rendition_filename(info['filename'], kind)
+        path = os.path.join(photos_dir, name)
+        # identical content was rendered before: just take a reference
+        recorded, existing = await _record_media(kind, alert_id, name, path, 0, content_hash, created)
+        if recorded is None and existing is None:
+            pending.append((kind, name, path, f'{path}.{uuid.uuid4().hex[:8]}.part', max_px, quality))
+        else:
+            info[RENDITION_URL_KEYS[kind]] = (recorded or _media_info(kind, name, existing['expires_at']))['url']
+    if not pending:
+        return info
     try:
-        with open(METADATA_FILE, 'w') as f:
-            json.dump(metadata, f, indent=2)
+        sizes = await asyncio.get_running_loop().run_in_executor(
+            _get_image_pool(), render_photo, filepath,
+            [(tmp, max_px, quality) for _, _, _, tmp, max_px, quality in pending])
     except Exception as e:
-        print(f"Error saving metadata: {e}")
+        print(f"⚠️ Could not create renditions for {info['filename']}: {e}")
+        for *_, tmp, _, _ in pending:
+            await asyncio.to_thread(_remove_quietly, tmp)
+        return info
+    for kind, name, path, tmp, _, _ in pending:
+        recorded, existing = await _record_media(kind, alert_id, name, path, sizes[tmp], content_hash, created, tmp)
+        info[RENDITION_URL_KEYS[kind]] = (recorded or _media_info(kind, name, existing['expires_at']))['url']
+    return info
+
+
+async def _existing_info(kind: str, alert_id: str, entry: Dict) -> Dict:
+    """Info for a file this alert already has (a retried upload)"""
+    info = _media_info(kind, entry['filename'], entry['expires_at'])
+    if kind == 'photo':
+        for rendition_kind, key in RENDITION_URL_KEYS.items():
+            name = rendition_filename(entry['filename'], rendition_kind)
+            found = await asyncio.to_thread(media_store.find, alert_id,
+                                            os.path.join(MEDIA_KINDS['photo']['dir'], name))
+            info[key] = _media_info(rendition_kind, name, entry['expires_at'])['url'] if found else info['url']
+    return info
+
+
+async def _store_content(kind: str, alert_id: str, extension: str, content_hash: str, size: int,
+                         src: Optional[str] = None, content: Optional[bytes] = None,
+                         created: Optional[List[str]] = None) -> Dict:
+    """
+    Store content under its sha256 and index it for the alert. Bytes already
+    on disk are referenced instead of written again, and the same bytes sent
+    again for the same alert return the existing entry. The content comes
+    either as a finished temp file (src) or in memory (content). Ids of the
+    index entries added are appended to created.
+    """
+    spec = MEDIA_KINDS[kind]
+    filename = f"{content_hash}.{extension}"
+    filepath = os.path.join(spec['dir'], filename)
+    
+    info, existing = await _record_media(kind, alert_id, filename, filepath, size, content_hash, created, src)
+    if info is None and existing is None:
+        # first copy of these bytes: write them out, then move into place
+        tmp = os.path.join(spec['dir'], f'upload_{uuid.uuid4().hex}.part')
+        async with aiofiles.open(tmp, 'wb') as f:
+            await f.write(content)
+        info, existing = await _record_media(kind, alert_id, filename, filepath, size, content_hash, created, tmp)
+    if existing is not None:
+        # the same bytes again for this alert (a retry, possibly a concurrent one)
+        print(f"♻️  Duplicate {kind} for alert {alert_id}: {filename}")
+        return await _existing_info(kind, alert_id, existing)
+    
+    if kind == 'photo':
+        await _add_photo_renditions(info, filepath, alert_id, content_hash, created)
+    return info
 
 
-def generate_unique_filename(extension: str, prefix: str = "") -> str:
-    """Generate a unique filename with timestamp and UUID"""
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    unique_id = str(uuid.uuid4())[:8]
-    if prefix:
-        return f"{prefix}_{timestamp}_{unique_id}.{extension}"
-    return f"{timestamp}_{unique_id}.{extension}"
+async def _save_base64(kind: str, data: str, alert_id: str) -> Dict:
+    # Remove data URL prefix if present
+    if ',' in data:
+        data = data.split(',')[1]
+    
+    # Decode base64
+    content = base64.b64decode(data)
+    if len(content) > MEDIA_KINDS[kind]['max_bytes']:
+        raise MediaTooLarge(f"{kind} exceeds {MEDIA_KINDS[kind]['max_bytes']} bytes")
+    
+    return await _store_content(kind, alert_id, MEDIA_KINDS[kind]['default_ext'],
+                                hashlib.sha256(content).hexdigest(), len(content), content=content)
 
 
 async def save_photo(photo_data: str, alert_id: str) -> Dict:
     """
     Save a photo from base64 data
-    Returns dict with filename and URL
+    Returns dict with filename, URL and display/thumbnail rendition URLs
     """
     try:
-        # Remove data URL prefix if present
-        if ',' in photo_data:
-            photo_data = photo_data.split(',')[1]
-        
-        # Decode base64
-        photo_bytes = base64.b64decode(photo_data)
-        
-        # Generate filename
-        filename = generate_unique_filename('jpg', f'alert_{alert_id}')
-        filepath = os.path.join(PHOTOS_DIR, filename)
-        
-        # Save file
-        with open(filepath, 'wb') as f:
-            f.write(photo_bytes)
-        
-        # Calculate expiry time (30 minutes from now)
-        expiry_time = (datetime.now() + timedelta(minutes=30)).isoformat()
-        
-        # Update metadata
-        metadata = load_metadata()
-        metadata['files'].append({
-            'filename': filename,
-            'filepath': filepath,
-            'type': 'photo',
-            'alert_id': alert_id,
-            'created_at': datetime.now().isoformat(),
-            'expires_at': expiry_time
-        })
-        save_metadata(metadata)
-        
-        print(f"✓ Photo saved: {filename} (expires at {expiry_time})")
-        
-        return {
-            'filename': filename,
-            'url': f'/media/photos/{filename}',
-            'expires_at': expiry_time
-        }
+        return await _save_base64('photo', photo_data, alert_id)
+    except MediaTooLarge:
+        raise
     except Exception as e:
         print(f"Error saving photo: {e}")
         raise Exception(f"Failed to save photo: {str(e)}")
@@ -107,97 +273,116 @@ async def save_audio(audio_data: str, alert_id: str) -> Dict:
     Returns dict with filename and URL
     """
     try:
-        # Remove data URL prefix if present
-        if ',' in audio_data:
-            audio_data = audio_data.split(',')[1]
-        
-        # Decode base64
-        audio_bytes = base64.b64decode(audio_data)
-        
-        # Generate filename (webm or mp3)
-        filename = generate_unique_filename('webm', f'alert_{alert_id}')
-        filepath = os.path.join(AUDIO_DIR, filename)
-        
-        # Save file
-        with open(filepath, 'wb') as f:
-            f.write(audio_bytes)
-        
-        # Calculate expiry time (30 minutes from now)
-        expiry_time = (datetime.now() + timedelta(minutes=30)).isoformat()
-        
-        # Update metadata
-        metadata = load_metadata()
-        metadata['files'].append({
-            'filename': filename,
-            'filepath': filepath,
-            'type': 'audio',
-            'alert_id': alert_id,
-            'created_at': datetime.now().isoformat(),
-            'expires_at': expiry_time
-        })
-        save_metadata(metadata)
-        
-        print(f"✓ Audio saved: {filename} (expires at {expiry_time})")
-        
-        return {
-            'filename': filename,
-            'url': f'/media/audio/{filename}',
-            'expires_at': expiry_time
-        }
+        return await _save_base64('audio', audio_data, alert_id)
+    except MediaTooLarge:
+        raise
     except Exception as e:
         print(f"Error saving audio: {e}")
         raise Exception(f"Failed to save audio: {str(e)}")
 
 
-def cleanup_expired_media() -> Dict:
+class MediaWriter:
     """
-    Delete media files that have expired (older than 30 minutes)
-    Returns stats about cleaned up files
+    Streams one uploaded file to disk.
+    Chunks go through a small bounded queue to a writer task, so the request
+    reader only waits when the disk falls behind and memory stays at a few
+    chunks per file. The file is hashed as it streams, written under a
+    temporary .part name and stored content-addressed by finish(); abort()
+    removes it. If the disk write fails, the next write() or finish() raises
+    the error instead of waiting on a queue nobody drains.
     """
-    try:
-        metadata = load_metadata()
-        now = datetime.now()
-        
-        files_to_keep = []
-        deleted_count = 0
-        deleted_size = 0
-        
-        for file_info in metadata['files']:
-            expires_at = datetime.fromisoformat(file_info['expires_at'])
-            
-            # Check if file has expired
-            if now >= expires_at:
-                # Delete the file
-                filepath = file_info['filepath']
-                if os.path.exists(filepath):
-                    file_size = os.path.getsize(filepath)
-                    os.remove(filepath)
-                    deleted_count += 1
-                    deleted_size += file_size
-                    print(f"🗑️  Deleted expired {file_info['type']}: {file_info['filename']}")
-                else:
-                    print(f"⚠️  File not found: {filepath}")
-            else:
-                files_to_keep.append(file_info)
-        
-        # Update metadata with only non-expired files
-        metadata['files'] = files_to_keep
-        save_metadata(metadata)
-        
-        if deleted_count > 0:
-            print(f"✓ Cleanup complete: {deleted_count} files deleted ({deleted_size / 1024:.2f} KB freed)")
-        
-        return {
-            'deleted_count': deleted_count,
-            'deleted_size_kb': deleted_size / 1024,
-            'remaining_count': len(files_to_keep)
-        }
-    except Exception as e:
-        print(f"Error during cleanup: {e}")
-        return {
-            'error': str(e),
-            'deleted_count': 0
-        }
+
+    def __init__(self, kind: str, alert_id: str, original_name: str = ''):
+        spec = MEDIA_KINDS[kind]
+        extension = os.path.splitext(original_name)[1].lstrip('.').lower()
+        if extension not in spec['extensions']:
+            extension = spec['default_ext']
+        self.kind = kind
+        self.alert_id = alert_id
+        self.extension = extension
+        self.max_bytes = spec['max_bytes']
+        self.tmp_path = os.path.join(spec['dir'], f'upload_{uuid.uuid4().hex}.part')
+        self.size = 0
+        self._hash = hashlib.sha256()
+        # index entries added by finish(), for rolling back a failed upload
+        self.media_ids: List[str] = []
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=UPLOAD_QUEUE_CHUNKS)
+        self._task = asyncio.create_task(self._drain())
+
+    async def _drain(self):
+        async with aiofiles.open(self.tmp_path, 'wb') as f:
+            while True:
+                chunk = await self._queue.get()
+                if chunk is None:
+                    break
+                await f.write(chunk)
+
+    async def write(self, chunk: bytes):
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise MediaTooLarge(f"{self.kind} exceeds {self.max_bytes} bytes")
+        if self._task.done():
+            # surface a failed disk write instead of queueing forever
+            self._task.result()
+        self._hash.update(chunk)
+        await self._put(chunk)
+
+    async def _put(self, item: Optional[bytes]):
+        put = asyncio.ensure_future(self._queue.put(item))
+        done, _ = await asyncio.wait({put, self._task}, return_when=asyncio.FIRST_COMPLETED)
+        if put not in done:
+            # the writer task died with the queue full
+            put.cancel()
+            self._task.result()
+            raise OSError(f'{self.kind} writer stopped before the upload finished')
+
+    async def finish(self) -> Dict:
+        await self._put(None)
+        await self._task
+        return await _store_content(self.kind, self.alert_id, self.extension, self._hash.hexdigest(),
+                                    self.size, src=self.tmp_path, created=self.media_ids)
+
+    async def abort(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except (asyncio.CancelledError, Exception):
+            pass
+        await asyncio.to_thread(_remove_quietly, self.tmp_path)
+
+
+async def discard_media(media_ids: List[str]):
+    """Remove index entries added by an upload that failed (files are unlinked with their last reference)"""
+    if not media_ids:
+        return
+    media_expiry.forget(media_ids)
+    indexed = await asyncio.to_thread(media_store.sizes, media_ids)
+    await asyncio.to_thread(media_store.release, media_ids)
+    media_counters.removed(len(indexed), expired=False)
+
+
+# Served as /media/<collection>/<filename>
+MEDIA_COLLECTIONS = {'photos': 'photo', 'audio': 'audio'}
+MEDIA_CACHE_CONTROL = 'private, max-age=31536000, immutable'
+_MEDIA_FILENAME = re.compile(r'^[A-Za-z0-9_-][A-Za-z0-9_.-]*$')
+# sha256 name, optionally with a rendition suffix
+_CONTENT_ADDRESSED = re.compile(r'^([0-9a-f]{64}(?:_[a-z]+)?)\.')
+
+
+def media_file_path(collection: str, filename: str) -> Optional[str]:
+    """Path of a servable media file, or None for unknown collections and unsafe names"""
+    kind = MEDIA_COLLECTIONS.get(collection)
+    if kind is None or not _MEDIA_FILENAME.match(filename) or filename.endswith('.part'):
+        return None
+    return os.path.join(MEDIA_KINDS[kind]['dir'], filename)
+
+
+def media_etag(filename: str, stat_result: os.stat_result) -> str:
+    """Strong ETag: the content hash in the name, or size and mtime for older uploads"""
+    match = _CONTENT_ADDRESSED.match(filename)
+    if match:
+        return f'"{match.group(1)}"'
+    return f'"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
 
 
 def get_media_for_alert(alert_id: str) -> Dict:
@@ -205,26 +390,30 @@ def get_media_for_alert(alert_id: str) -> Dict:
     Get all media files associated with an alert
     """
     try:
-        metadata = load_metadata()
         photos = []
         audio = []
         
-        for file_info in metadata['files']:
-            if file_info.get('alert_id') == alert_id:
-                if file_info['type'] == 'photo':
-                    photos.append({
-                        'filename': file_info['filename'],
-                        'url': f"/media/photos/{file_info['filename']}",
-                        'created_at': file_info['created_at'],
-                        'expires_at': file_info['expires_at']
-                    })
-                elif file_info['type'] == 'audio':
-                    audio.append({
-                        'filename': file_info['filename'],
-                        'url': f"/media/audio/{file_info['filename']}",
-                        'created_at': file_info['created_at'],
-                        'expires_at': file_info['expires_at']
-                    })
+        entries = media_store.for_alert(alert_id)
+        renditions = {e['filename'] for e in entries if e['type'] in PHOTO_RENDITIONS}
+        for file_info in entries:
+            if file_info['type'] == 'photo':
+                url = f"/media/photos/{file_info['filename']}"
+                display, thumbnail = (rendition_filename(file_info['filename'], kind) for kind in PHOTO_RENDITIONS)
+                photos.append({
+                    'filename': file_info['filename'],
+                    'url': url,
+                    'display_url': f"/media/photos/{display}" if display in renditions else url,
+                    'thumbnail_url': f"/media/photos/{thumbnail}" if thumbnail in renditions else url,
+                    'created_at': file_info['created_at'],
+                    'expires_at': file_info['expires_at']
+                })
+            elif file_info['type'] == 'audio':
+                audio.append({
+                    'filename': file_info['filename'],
+                    'url': f"/media/audio/{file_info['filename']}",
+                    'created_at': file_info['created_at'],
+                    'expires_at': file_info['expires_at']
+                })
         
         return {
             'photos': photos,
@@ -240,45 +429,16 @@ def get_media_for_alert(alert_id: str) -> Dict:
 
 def get_all_media_stats() -> Dict:
     """
-    Get statistics about all stored media
+    Get statistics about all stored media (running counters, no disk access)
     """
-    try:
-        metadata = load_metadata()
-        now = datetime.now()
-        
-        total_files = len(metadata['files'])
-        expired_count = 0
-        active_count = 0
-        total_size = 0
-        
-        for file_info in metadata['files']:
-            expires_at = datetime.fromisoformat(file_info['expires_at'])
-            if now >= expires_at:
-                expired_count += 1
-            else:
-                active_count += 1
-            
-            # Get file size if exists
-            if os.path.exists(file_info['filepath']):
-                total_size += os.path.getsize(file_info['filepath'])
-        
-        return {
-            'total_files': total_files,
-            'active_files': active_count,
-            'expired_files': expired_count,
-            'total_size_mb': total_size / (1024 * 1024)
-        }
-    except Exception as e:
-        print(f"Error getting media stats: {e}")
-        return {
-            'total_files': 0,
-            'active_files': 0,
-            'expired_files': 0,
-            'total_size_mb': 0
-        }
+    return media_counters.snapshot()
 
 
-# Initialize metadata file if it doesn't exist
-if not os.path.exists(METADATA_FILE):
-    save_metadata({"files": []})
-    print("✓ Media service initialized")
+def reconcile_media_stats() -> Dict:
+    """
+    Recount media from the index and the files on disk (blocking; run in a thread)
+    """
+    drift = media_counters.reconcile(media_store)
+    if drift:
+        print(f"🔧 Media stats drift corrected: {drift}")
+    return drift
@@ -0,0 +1,94 @@
+"""
+Running counters behind GET /media/stats.
+Uploads, expiries and deletions adjust the counters as they happen so the
+endpoint answers in O(1); reconcile() recomputes them from the media index and
+the files on disk (run periodically in a worker thread) and repairs any drift.
+"""
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+MEDIA_RECONCILE_INTERVAL = int(os.environ.get('MEDIA_RECONCILE_INTERVAL', 600))
+
+
+class MediaCounters:
+    """
+    Index entries are counted as files, one per reference (an alert's photo,
+    audio clip or rendition); disk use is counted once per stored blob, since
+    identical content is shared between entries.
+    """
+
+    def __init__(self):
+        # updated from the event loop and the expiry worker threads
+        self._lock = threading.Lock()
+        self.active_files = 0
+        self.expired_files = 0
+        self.stored_files = 0
+        self.stored_bytes = 0
+        self.last_reconciled_at: Optional[str] = None
+        self.last_drift: Dict[str, int] = {}
+
+    def added(self, files: int = 1):
+        with self._lock:
+            self.active_files += files
+
+    def expired(self, files: int):
+        """Entries passed their deadline (still indexed until removed)."""
+        with self._lock:
+            self.active_files -= files
+            self.expired_files += files
+
+    def removed(self, files: int, expired: bool = True):
+        with self._lock:
+            if expired:
+                self.expired_files -= files
+            else:
+                self.active_files -= files
+
+    def stored(self, files: int, size: int):
+        """Blobs written to disk (positive) or unlinked (negative)."""
+        with self._lock:
+            self.stored_files += files
+            self.stored_bytes += size
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'total_files': self.active_files + self.expired_files,
+                'active_files': self.active_files,
+                'expired_files': self.expired_files,
+                'stored_files': self.stored_files,
+                'total_size_mb': self.stored_bytes / (1024 * 1024),
+                'last_reconciled_at': self.last_reconciled_at,
+                'last_drift': dict(self.last_drift),
+            }
+
+    def reconcile(self, store, now: Optional[float] = None) -> Dict[str, int]:
+        """
+        Recount from the index: each stored blob is sized on disk once, and
+        entries are counted if their blob is still there. Returns the drift
+        that was corrected.
+        """
+        now = time.time() if now is None else now
+        on_disk = {}
+        for filepath in store.blob_paths():
+            try:
+                on_disk[filepath] = os.path.getsize(filepath)
+            except OSError:
+                # indexed but gone from disk: nothing to count
+                continue
+        fresh = {'active_files': 0, 'expired_files': 0,
+                 'stored_files': len(on_disk), 'stored_bytes': sum(on_disk.values())}
+        for expires_ts, _, filepath, _ in store.schedule():
+            if filepath in on_disk:
+                fresh['expired_files' if expires_ts <= now else 'active_files'] += 1
+        with self._lock:
+            drift = {key: value - getattr(self, key) for key, value in fresh.items()
+                     if value != getattr(self, key)}
+            for key, value in fresh.items():
+                setattr(self, key, value)
+            self.last_reconciled_at = datetime.now().isoformat()
+            self.last_drift = drift
+        return drift
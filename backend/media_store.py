@@ -0,0 +1,306 @@
+"""
+Media metadata index backed by SQLite in WAL mode.
+Replaces media_metadata.json, which was parsed and rewritten whole for every
+upload (and could drop entries when two uploads raced). Each upload is now a
+single-row insert, and per-alert lookups and expiry sweeps are index hits on
+alert_id and expires_ts. Files are content-addressed: media_blobs counts the
+entries referencing each stored file, which is unlinked with the last one.
+An alert references a file at most once (a unique index on alert_id, filepath),
+so concurrent retries of the same upload add one entry between them.
+"""
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS media (
+    id TEXT PRIMARY KEY,
+    alert_id TEXT,
+    type TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    filepath TEXT NOT NULL,
+    size INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    expires_at TEXT NOT NULL,
+    expires_ts REAL NOT NULL,
+    content_hash TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_media_alert_id ON media (alert_id);
+CREATE INDEX IF NOT EXISTS idx_media_expires_ts ON media (expires_ts);
+CREATE TABLE IF NOT EXISTS media_meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS media_blobs (
+    filepath TEXT PRIMARY KEY,
+    content_hash TEXT,
+    size INTEGER NOT NULL DEFAULT 0,
+    refcount INTEGER NOT NULL
+);
+"""
+
+MEDIA_FIELDS = ('id', 'alert_id', 'type', 'filename', 'filepath', 'size', 'created_at', 'expires_at', 'expires_ts',
+                'content_hash')
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _timestamp(value) -> float:
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return datetime.fromisoformat(value).timestamp()
+
+
+class MediaStore:
+    def __init__(self, path: str, legacy_json: Optional[str] = None, counters=None):
+        self.path = path
+        # MediaCounters told about each blob written or unlinked, if given
+        self.counters = counters
+        # one connection shared by the event loop and worker threads, serialized by the lock
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.executescript(SCHEMA)
+            columns = {row['name'] for row in self._conn.execute('PRAGMA table_info(media)')}
+            if 'content_hash' not in columns:
+                # index created before content addressing
+                self._conn.execute('ALTER TABLE media ADD COLUMN content_hash TEXT')
+        if legacy_json:
+            self._migrate_json(legacy_json)
+        self._backfill_blobs()
+        self._unique_per_alert()
+
+    def _backfill_blobs(self):
+        """Reference counts for files indexed before media_blobs existed."""
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR IGNORE INTO media_blobs (filepath, content_hash, size, refcount) '
+                'SELECT filepath, MAX(content_hash), MAX(size), COUNT(*) FROM media '
+                'WHERE filepath NOT IN (SELECT filepath FROM media_blobs) GROUP BY filepath'
+            )
+
+    def _unique_per_alert(self):
+        """Drop duplicate (alert_id, filepath) entries left by earlier races, then enforce uniqueness."""
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'idx_media_alert_file'").fetchone():
+                return
+            self._conn.execute('BEGIN')
+            duplicates = self._conn.execute(
+                'SELECT filepath, COUNT(*) - 1 FROM media WHERE alert_id IS NOT NULL '
+                'GROUP BY alert_id, filepath HAVING COUNT(*) > 1').fetchall()
+            self._conn.execute(
+                'DELETE FROM media WHERE alert_id IS NOT NULL AND rowid NOT IN '
+                '(SELECT MIN(rowid) FROM media WHERE alert_id IS NOT NULL GROUP BY alert_id, filepath)')
+            self._conn.executemany('UPDATE media_blobs SET refcount = refcount - ? WHERE filepath = ?',
+                                   [(extra, filepath) for filepath, extra in duplicates])
+            self._conn.execute('CREATE UNIQUE INDEX idx_media_alert_file ON media (alert_id, filepath)')
+            self._conn.execute('COMMIT')
+
+    def _migrate_json(self, legacy_json: str):
+        """Import media_metadata.json once; the file is left in place."""
+        with self._lock:
+            done = self._conn.execute("SELECT 1 FROM media_meta WHERE key = 'migrated_json'").fetchone()
+        if done or not os.path.exists(legacy_json):
+            return
+        try:
+            with open(legacy_json, 'r') as f:
+                files = json.load(f).get('files', [])
+        except Exception as e:
+            print(f"Error loading legacy media metadata: {e}")
+            files = []
+        with self._lock:
+            self._conn.execute('BEGIN')
+            for entry in files:
+                if 'size' not in entry and os.path.exists(entry['filepath']):
+                    entry['size'] = os.path.getsize(entry['filepath'])
+                self._conn.execute(*self._insert_sql(entry))
+            self._conn.execute("INSERT INTO media_meta (key, value) VALUES ('migrated_json', ?)",
+                               (datetime.now().isoformat(),))
+            self._conn.execute('COMMIT')
+        if files:
+            print(f"✓ Migrated {len(files)} media entries from {os.path.basename(legacy_json)}")
+
+    @staticmethod
+    def _insert_sql(entry: Dict[str, Any], conflict: str = 'REPLACE'):
+        row = (
+            entry.get('id') or uuid.uuid4().hex,
+            entry.get('alert_id'),
+            entry['type'],
+            entry['filename'],
+            entry['filepath'],
+            entry.get('size', 0),
+            entry['created_at'],
+            entry['expires_at'],
+            _timestamp(entry['expires_at']),
+            entry.get('content_hash'),
+        )
+        return (f'INSERT OR {conflict} INTO media (id, alert_id, type, filename, filepath, size, created_at, expires_at, '
+                'expires_ts, content_hash) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', row)
+
+    def _query(self, sql: str, params: Iterable = ()) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(sql, tuple(params)).fetchall()
+        return [dict(row) for row in rows]
+
+    def add(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert one metadata entry (an id is assigned if missing)."""
+        entry = dict(entry)
+        entry.setdefault('id', uuid.uuid4().hex)
+        sql, row = self._insert_sql(entry)
+        with self._lock:
+            self._conn.execute(sql, row)
+        return entry
+
+    def find(self, alert_id: str, filepath: str) -> Optional[Dict[str, Any]]:
+        """The entry of alert_id that references filepath, if any (used to make retries idempotent)."""
+        rows = self._query(f"SELECT {', '.join(MEDIA_FIELDS)} FROM media WHERE alert_id = ? AND filepath = ? LIMIT 1",
+                           (alert_id, filepath))
+        return rows[0] if rows else None
+
+    def index(self, entry: Dict[str, Any], src: Optional[str] = None) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """
+        Take a reference on the stored file at entry['filepath'] and index entry,
+        as one step. Returns (entry, True) when added, with size set from the
+        stored file. If the alert already references the file, nothing changes
+        and (existing entry, False) is returned. If the file is not stored and
+        no src (a finished temp file to move into place) was given, returns
+        (None, False). A src that is not needed is removed. Blocking: call from
+        a worker thread.
+        """
+        entry = dict(entry)
+        entry.setdefault('id', uuid.uuid4().hex)
+        filepath = entry['filepath']
+        written = None
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                blob = self._conn.execute('SELECT size FROM media_blobs WHERE filepath = ?', (filepath,)).fetchone()
+                if blob is not None:
+                    entry['size'] = blob['size']
+                if self._conn.execute(*self._insert_sql(entry, conflict='IGNORE')).rowcount == 0:
+                    self._conn.execute('ROLLBACK')
+                    existing = self._conn.execute(
+                        f"SELECT {', '.join(MEDIA_FIELDS)} FROM media WHERE alert_id = ? AND filepath = ?",
+                        (entry['alert_id'], filepath)).fetchone()
+                    if src is not None:
+                        _remove_quietly(src)
+                    return dict(existing), False
+                if blob is not None:
+                    self._conn.execute('UPDATE media_blobs SET refcount = refcount + 1 WHERE filepath = ?', (filepath,))
+                    if src is not None:
+                        _remove_quietly(src)
+                elif src is None:
+                    self._conn.execute('ROLLBACK')
+                    return None, False
+                else:
+                    self._conn.execute('INSERT INTO media_blobs (filepath, content_hash, size, refcount) '
+                                       'VALUES (?, ?, ?, 1)', (filepath, entry.get('content_hash'), entry['size']))
+                    # moved under the lock so a concurrent release() can never unlink the new file
+                    os.replace(src, filepath)
+                    written = entry['size']
+                self._conn.execute('COMMIT')
+            except BaseException:
+                if self._conn.in_transaction:
+                    self._conn.execute('ROLLBACK')
+                raise
+        if written is not None and self.counters is not None:
+            self.counters.stored(1, written)
+        return entry, True
+
+    def acquire(self, filepath: str, size: int = 0, content_hash: Optional[str] = None,
+                src: Optional[str] = None) -> Optional[int]:
+        """
+        Take a reference on the stored file at filepath and return its size.
+        If it is not stored yet, src (a finished temp file) is moved into place;
+        without src None is returned and nothing changes. A src that turns out to
+        be a duplicate is removed. Blocking: call from a worker thread.
+        """
+        with self._lock:
+            row = self._conn.execute('SELECT size FROM media_blobs WHERE filepath = ?', (filepath,)).fetchone()
+            if row is not None:
+                self._conn.execute('UPDATE media_blobs SET refcount = refcount + 1 WHERE filepath = ?', (filepath,))
+                if src is not None:
+                    os.remove(src)
+                return row['size']
+            if src is None:
+                return None
+            # moved under the lock so a concurrent release() can never unlink the new file
+            os.replace(src, filepath)
+            self._conn.execute('INSERT INTO media_blobs (filepath, content_hash, size, refcount) VALUES (?, ?, ?, 1)',
+                               (filepath, content_hash, size))
+        if self.counters is not None:
+            self.counters.stored(1, size)
+        return size
+
+    def release(self, ids: Iterable[str]) -> List[tuple]:
+        """
+        Delete entries and drop their file references; files left with no
+        references are unlinked. Returns (filepath, size) of each file removed.
+        Blocking: call from a worker thread.
+        """
+        ids = list(ids)
+        removed = []
+        if not ids:
+            return removed
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                for media_id in ids:
+                    row = self._conn.execute('SELECT filepath, size FROM media WHERE id = ?', (media_id,)).fetchone()
+                    if row is None:
+                        continue
+                    self._conn.execute('DELETE FROM media WHERE id = ?', (media_id,))
+                    filepath = row['filepath']
+                    self._conn.execute('UPDATE media_blobs SET refcount = refcount - 1 WHERE filepath = ?', (filepath,))
+                    blob = self._conn.execute('SELECT size, refcount FROM media_blobs WHERE filepath = ?',
+                                              (filepath,)).fetchone()
+                    if blob is not None and blob['refcount'] > 0:
+                        continue
+                    self._conn.execute('DELETE FROM media_blobs WHERE filepath = ?', (filepath,))
+                    try:
+                        os.remove(filepath)
+                        removed.append((filepath, blob['size'] if blob is not None else row['size']))
+                    except FileNotFoundError:
+                        print(f"⚠️  File not found: {filepath}")
+                self._conn.execute('COMMIT')
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+        if self.counters is not None and removed:
+            self.counters.stored(-len(removed), -sum(size for _, size in removed))
+        return removed
+
+    def sizes(self, ids: Iterable[str]) -> Dict[str, int]:
+        """Indexed size of each entry in ids that exists."""
+        ids = list(ids)
+        if not ids:
+            return {}
+        rows = self._query(f"SELECT id, size FROM media WHERE id IN ({', '.join('?' * len(ids))})", ids)
+        return {row['id']: row['size'] for row in rows}
+
+    def for_alert(self, alert_id: str) -> List[Dict[str, Any]]:
+        return self._query(f"SELECT {', '.join(MEDIA_FIELDS)} FROM media WHERE alert_id = ? ORDER BY created_at",
+                           (alert_id,))
+
+    def blob_paths(self) -> List[str]:
+        """Path of every stored file (one per content hash)."""
+        with self._lock:
+            return [row[0] for row in self._conn.execute('SELECT filepath FROM media_blobs')]
+
+    def schedule(self) -> List[tuple]:
+        """(expires_ts, id, filepath, size) for every entry, for rebuilding an expiry heap."""
+        with self._lock:
+            return self._conn.execute('SELECT expires_ts, id, filepath, size FROM media ORDER BY expires_ts').fetchall()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
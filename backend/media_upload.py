@@ -0,0 +1,106 @@
+"""
+Streaming multipart/form-data receiver for alert media.
+The request body is fed to python-multipart chunk by chunk and each file part
+is handed to a MediaWriter as it arrives, so nothing is base64-decoded or
+buffered whole in memory. A file's final move and indexing run as a task while
+the next part is still being received, so the files of one alert are processed
+concurrently. Form fields: "photos" (repeatable) and "audio" (at most one).
+"""
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # older python-multipart releases
+    from multipart.multipart import MultipartParser, parse_options_header
+
+from backend.media_service import MediaWriter, discard_media
+
+# form field name -> media kind
+UPLOAD_FIELDS = {'photos': 'photo', 'photo': 'photo', 'audio': 'audio'}
+MAX_UPLOAD_FILES = 10
+
+
+async def receive_media_upload(stream: AsyncIterator[bytes], content_type: str, alert_id: str) -> Dict[str, List[Dict]]:
+    """
+    Store every file part of a multipart body for alert_id.
+    Raises ValueError for a malformed body or a second audio file and
+    MediaTooLarge when a file is over its cap; in every case nothing from the
+    upload is kept, including files that were already stored and indexed.
+    """
+    mimetype, options = parse_options_header(content_type)
+    boundary = options.get(b'boundary')
+    if mimetype != b'multipart/form-data' or not boundary:
+        raise ValueError('Expected multipart/form-data with a boundary')
+
+    # parser callbacks are synchronous: collect events and act on them after each chunk
+    events: list = []
+    headers: Dict[bytes, bytes] = {}
+    header = [b'', b'']
+
+    def on_header_field(data, start, end):
+        header[0] += data[start:end]
+
+    def on_header_value(data, start, end):
+        header[1] += data[start:end]
+
+    def on_header_end():
+        headers[header[0].lower()] = header[1]
+        header[0], header[1] = b'', b''
+
+    def on_headers_finished():
+        events.append(('begin', dict(headers)))
+        headers.clear()
+
+    callbacks = {
+        'on_header_field': on_header_field,
+        'on_header_value': on_header_value,
+        'on_header_end': on_header_end,
+        'on_headers_finished': on_headers_finished,
+        'on_part_data': lambda data, start, end: events.append(('data', data[start:end])),
+        'on_part_end': lambda: events.append(('end', None)),
+    }
+    parser = MultipartParser(boundary, callbacks)
+
+    writer: Optional[MediaWriter] = None
+    writers: List[MediaWriter] = []
+    finishing: List[asyncio.Task] = []
+    try:
+        async for chunk in stream:
+            try:
+                parser.write(chunk)
+            except Exception as e:
+                raise ValueError(f'Invalid multipart body: {e}')
+            for event, value in events:
+                if event == 'begin':
+                    _, disposition = parse_options_header(value.get(b'content-disposition', b''))
+                    kind = UPLOAD_FIELDS.get(disposition.get(b'name', b'').decode('latin-1'))
+                    writer = None
+                    if kind and b'filename' in disposition:
+                        if len(writers) >= MAX_UPLOAD_FILES:
+                            raise ValueError(f'At most {MAX_UPLOAD_FILES} files per upload')
+                        if kind == 'audio' and any(w.kind == 'audio' for w in writers):
+                            raise ValueError('At most one audio file per upload')
+                        writer = MediaWriter(kind, alert_id, disposition[b'filename'].decode('utf-8', 'replace'))
+                        writers.append(writer)
+                elif event == 'data':
+                    if writer is not None:
+                        await writer.write(value)
+                elif writer is not None:
+                    finishing.append(asyncio.create_task(writer.finish()))
+                    writer = None
+            events.clear()
+        if writer is not None or len(finishing) < len(writers):
+            raise ValueError('Multipart body ended inside a file part')
+        saved = await asyncio.gather(*finishing)
+    except BaseException:
+        # let files already being stored finish, then roll every one of them back
+        await asyncio.gather(*finishing, return_exceptions=True)
+        await asyncio.gather(*(w.abort() for w in writers), return_exceptions=True)
+        await discard_media([media_id for w in writers for media_id in w.media_ids])
+        raise
+
+    result: Dict[str, List[Dict]] = {'photo': [], 'audio': []}
+    for file_writer, info in zip(writers, saved):
+        result[file_writer.kind].append(info)
+    return result
@@ -38,7 +38,9 @@ alerts = Table(
     Column('eta_minutes', Integer),
     Column('resolved_at', DateTime(timezone=True)),
     Column('marked_done_at', DateTime(timezone=True)),  # When marked as done
-    Column('auto_delete_at', DateTime(timezone=True))   # Scheduled deletion time
+    Column('auto_delete_at', DateTime(timezone=True)),  # Scheduled deletion time
+    Column('category_id', UUID(as_uuid=True)),
+    Column('deleted_at', DateTime(timezone=True))
 )
 
 responders = Table(
@@ -53,5 +55,7 @@ responders = Table(
     Column('last_location', JSON),
     Column('capabilities', JSON),
     Column('created_at', DateTime(timezone=True), server_default=func.now()),
-    Column('updated_at', DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    Column('updated_at', DateTime(timezone=True), server_default=func.now(), onupdate=func.now()),
+    Column('reserved_for', UUID(as_uuid=True)),       # alert an auto-assign reservation is for
+    Column('reserved_until', DateTime(timezone=True))  # heartbeats keep the responder busy until then
 )
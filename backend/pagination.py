@@ -0,0 +1,135 @@
+"""
+Keyset pagination and column projection for alert listings.
+Pages are addressed by an opaque cursor holding the (sort key, id) of the last
+row served, so each page is an index range scan no matter how deep it is.
+The DB-down fallbacks page the in-memory store with the same cursors.
+"""
+import base64
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.models import alerts
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+ALERT_COLUMNS = [c.name for c in alerts.columns]
+# Large JSONB columns left out of listings unless asked for with fields=
+HEAVY_ALERT_COLUMNS = {'route_trace', 'attachments'}
+DEFAULT_ALERT_COLUMNS = [c for c in ALERT_COLUMNS if c not in HEAVY_ALERT_COLUMNS]
+
+
+def alert_columns(fields: Optional[str], prefix: str = 'a.', required: Tuple[str, ...] = ('id', 'created_at')) -> str:
+    """
+    SELECT list for alerts. fields is a comma-separated subset of column names;
+    the `required` columns are always included because cursors are built from them.
+    """
+    if not fields:
+        names = DEFAULT_ALERT_COLUMNS
+    else:
+        requested = [f.strip() for f in fields.split(',') if f.strip()]
+        unknown = [f for f in requested if f not in ALERT_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        names = [c for c in ALERT_COLUMNS if c in requested or c in required]
+    return ', '.join(f'{prefix}{c}' for c in names)
+
+
+def page_size(limit: Optional[int], default: Optional[int] = DEFAULT_PAGE_SIZE) -> Optional[int]:
+    """Rows per page; None (default=None and no limit sent) means the whole listing."""
+    if limit is None:
+        return default
+    return max(1, min(int(limit), MAX_PAGE_SIZE))
+
+
+def fetch_limit(limit: Optional[int]) -> Optional[int]:
+    """Value bound to LIMIT: one extra row tells whether there is a next page (NULL = no limit)."""
+    return None if limit is None else limit + 1
+
+
+def encode_cursor(sort_value: datetime, row_id: Any) -> str:
+    raw = json.dumps([sort_value.isoformat(), str(row_id)])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(sort_value), row_id
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def keyset_clause(cursor: Optional[str], sort_expr: str, id_expr: str, values: Dict[str, Any]) -> str:
+    """
+    'AND (sort, id) < (...)' for a descending listing, adding the bind values;
+    empty string for the first page.
+    """
+    if not cursor:
+        return ''
+    values['cursor_sort'], values['cursor_id'] = decode_cursor(cursor)
+    return f' AND ({sort_expr}, {id_expr}) < (:cursor_sort, CAST(:cursor_id AS UUID))'
+
+
+def split_page(rows: List[Any], limit: int, sort_fields: Tuple[str, ...] = ('created_at',)) -> Tuple[List[Any], Optional[str]]:
+    """
+    Trim rows (records or dicts) fetched with LIMIT limit + 1 to one page and
+    build the cursor for the next page (None on the last page). The sort key is
+    the first non-null of sort_fields, matching a COALESCE(...) ordering.
+    """
+    if limit is None or len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    sort_value = None
+    for field in sort_fields:
+        try:
+            sort_value = last[field]
+        except KeyError:
+            continue
+        if sort_value is not None:
+            break
+    if not isinstance(sort_value, datetime):
+        return rows, None
+    return rows, encode_cursor(sort_value, last['id'])
+
+
+def _as_datetime(value) -> Optional[datetime]:
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def page_records(records: List[Dict[str, Any]], cursor: Optional[str], limit: Optional[int],
+                 sort_fields: Tuple[str, ...] = ('created_at',)) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    One page of in-memory alerts ordered like the SQL listings, (sort key, id)
+    descending, starting after cursor. Rows without a sort key come last and
+    cannot be paged past. Returns the page and the next cursor.
+    """
+    keyed = []
+    for record in records:
+        sort_value = None
+        for field in sort_fields:
+            sort_value = _as_datetime(record.get(field))
+            if sort_value is not None:
+                break
+        keyed.append(((sort_value is not None, sort_value or datetime.min.replace(tzinfo=timezone.utc),
+                       str(record.get('id'))), record))
+    keyed.sort(key=lambda item: item[0], reverse=True)
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        bound = (True, _as_datetime(sort_value), str(row_id))
+        keyed = [item for item in keyed if item[0] < bound]
+    if limit is None or len(keyed) <= limit:
+        return [record for _, record in keyed], None
+    keyed = keyed[:limit]
+    (has_sort, sort_value, row_id), _ = keyed[-1]
+    return [record for _, record in keyed], encode_cursor(sort_value, row_id) if has_sort else None
@@ -0,0 +1,256 @@
+"""
+In-process responder registry with a grid-cell spatial index.
+Kept up to date by /responders/heartbeat so auto-assign and broadcast can
+answer k-nearest-available queries without touching the database.
+Available responders are also indexed per tag (their responder_type and each
+capability), so a query for e.g. firefighters walks only their grid and never
+measures distances to responders who could not take the alert.
+"""
+import json
+import math
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from backend.utils import haversine_batch, top_k_indices
+
+# Cell size in degrees (~1.1 km of latitude)
+CELL_SIZE_DEG = 0.01
+# Metres per degree of latitude
+_M_PER_DEG = 111320.0
+# Below this many indexed responders a plain scan beats walking rings
+_SCAN_THRESHOLD = 64
+# Default search radius cap for nearest() (metres)
+DEFAULT_MAX_DISTANCE_M = 50000.0
+
+
+def _parse_tags(responder: Dict[str, Any]) -> frozenset:
+    """Lower-cased responder_type plus capabilities (a list or its JSON string)."""
+    capabilities = responder.get('capabilities') or []
+    if isinstance(capabilities, str):
+        try:
+            capabilities = json.loads(capabilities)
+        except Exception:
+            capabilities = []
+    tags = {str(c).lower() for c in capabilities if c} if isinstance(capabilities, (list, tuple, set)) else set()
+    if responder.get('responder_type'):
+        tags.add(str(responder['responder_type']).lower())
+    return frozenset(tags)
+
+
+def _parse_location(loc) -> Optional[Dict[str, float]]:
+    """Normalize a location (dict or JSON string) to {'lat', 'lng'} floats"""
+    if not loc:
+        return None
+    if isinstance(loc, str):
+        try:
+            loc = json.loads(loc)
+        except Exception:
+            return None
+    try:
+        return {'lat': float(loc.get('lat')), 'lng': float(loc.get('lng'))}
+    except Exception:
+        return None
+
+
+class ResponderRegistry:
+    """Responders keyed by id, with available ones bucketed into grid cells."""
+
+    def __init__(self, cell_size: float = CELL_SIZE_DEG):
+        self.cell_size = cell_size
+        self._responders: Dict[str, Dict[str, Any]] = {}
+        # cell -> {responder_id: (lat, lng)} for available responders only
+        self._cells: Dict[Tuple[int, int], Dict[str, Tuple[float, float]]] = {}
+        # responder_id -> cell it is currently indexed under
+        self._cell_of: Dict[str, Tuple[int, int]] = {}
+        # tag -> cell -> {responder_id: (lat, lng)}, the same index split by tag
+        self._tagged: Dict[str, Dict[Tuple[int, int], Dict[str, Tuple[float, float]]]] = {}
+        # responder_id -> tags it is currently indexed under
+        self._tags_of: Dict[str, frozenset] = {}
+        self._tag_counts: Dict[str, int] = {}
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return (int(math.floor(lat / self.cell_size)), int(math.floor(lng / self.cell_size)))
+
+    def __len__(self):
+        return len(self._responders)
+
+    def __contains__(self, responder_id):
+        return responder_id in self._responders
+
+    def get(self, responder_id: str) -> Optional[Dict[str, Any]]:
+        return self._responders.get(str(responder_id))
+
+    def values(self):
+        return self._responders.values()
+
+    def available_count(self, tags: Optional[Iterable[str]] = None) -> int:
+        """Available responders, or an upper bound of those carrying any of tags."""
+        if tags is None:
+            return len(self._cell_of)
+        return sum(self._tag_counts.get(str(t).lower(), 0) for t in set(tags))
+
+    def upsert(self, responder: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert or update a responder record and re-index it"""
+        rid = str(responder['id'])
+        record = self._responders.get(rid, {})
+        previous_loc = record.get('last_location')
+        record.update(responder)
+        record['id'] = rid
+        loc = _parse_location(responder.get('last_location') or responder.get('location'))
+        record['last_location'] = loc or previous_loc
+        record.setdefault('status', 'available')
+        record['last_heartbeat'] = responder.get('last_heartbeat') or datetime.utcnow().isoformat()
+        self._responders[rid] = record
+        self._reindex(rid, record)
+        return record
+
+    def set_status(self, responder_id: str, status: str) -> Optional[Dict[str, Any]]:
+        record = self._responders.get(str(responder_id))
+        if record is None:
+            return None
+        record['status'] = status
+        self._reindex(record['id'], record)
+        return record
+
+    def remove(self, responder_id: str) -> None:
+        rid = str(responder_id)
+        self._unindex(rid)
+        self._responders.pop(rid, None)
+
+    @staticmethod
+    def _drop(grid, cell, rid: str) -> None:
+        bucket = grid.get(cell)
+        if bucket is not None:
+            bucket.pop(rid, None)
+            if not bucket:
+                del grid[cell]
+
+    def _unindex(self, rid: str) -> None:
+        cell = self._cell_of.pop(rid, None)
+        if cell is None:
+            return
+        self._drop(self._cells, cell, rid)
+        for tag in self._tags_of.pop(rid, ()):
+            grid = self._tagged[tag]
+            self._drop(grid, cell, rid)
+            self._tag_counts[tag] -= 1
+            if not grid:
+                del self._tagged[tag]
+                del self._tag_counts[tag]
+
+    def _reindex(self, rid: str, record: Dict[str, Any]) -> None:
+        self._unindex(rid)
+        loc = record.get('last_location')
+        if record.get('status') != 'available' or not loc:
+            return
+        cell = self._cell(loc['lat'], loc['lng'])
+        point = (loc['lat'], loc['lng'])
+        self._cells.setdefault(cell, {})[rid] = point
+        self._cell_of[rid] = cell
+        tags = _parse_tags(record)
+        self._tags_of[rid] = tags
+        for tag in tags:
+            self._tagged.setdefault(tag, {}).setdefault(cell, {})[rid] = point
+            self._tag_counts[tag] = self._tag_counts.get(tag, 0) + 1
+
+    def _ring(self, center: Tuple[int, int], r: int):
+        """Yield cell keys on the Chebyshev ring of radius r around center"""
+        ci, cj = center
+        if r == 0:
+            yield center
+            return
+        for dj in range(-r, r + 1):
+            yield (ci - r, cj + dj)
+            yield (ci + r, cj + dj)
+        for di in range(-r + 1, r):
+            yield (ci + di, cj - r)
+            yield (ci + di, cj + r)
+
+    def _ring_buckets(self, grids, center: Tuple[int, int], max_rings: int):
+        """
+        Yield (r, buckets in ring r) outwards from center up to max_rings. Once
+        the rings walked cover more cells than are occupied, the occupied cells
+        still ahead are grouped by ring instead, so empty rings (sparse areas,
+        wide radii) cost nothing.
+        """
+        occupied = sum(len(grid) for grid in grids)
+        r = 0
+        while r <= max_rings and (2 * r + 1) ** 2 <= occupied:
+            ring = list(self._ring(center, r))
+            yield r, [grid[c] for grid in grids for c in ring if c in grid]
+            r += 1
+        if r > max_rings:
+            return
+        ci, cj = center
+        ahead: Dict[int, list] = {}
+        for grid in grids:
+            for (i, j), bucket in grid.items():
+                ring = max(abs(i - ci), abs(j - cj))
+                if r <= ring <= max_rings:
+                    ahead.setdefault(ring, []).append(bucket)
+        for ring in sorted(ahead):
+            yield ring, ahead[ring]
+
+    def nearest(self, lat: float, lng: float, k: int = 1,
+                max_distance_m: float = DEFAULT_MAX_DISTANCE_M,
+                tags: Optional[Iterable[str]] = None) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        Return up to k available responders nearest to (lat, lng)
+        as (responder, distance_m) pairs, closest first. With tags, only
+        responders whose type or capabilities include one of them are considered.
+        """
+        lat = float(lat)
+        lng = float(lng)
+        if tags is None:
+            grids = [self._cells]
+        else:
+            grids = [self._tagged[t] for t in {str(t).lower() for t in tags} if t in self._tagged]
+        count = self.available_count(tags)
+        if k <= 0 or not count:
+            return []
+
+        ids: List[str] = []
+        dists = np.empty(0, dtype=np.float64)
+        seen = set() if len(grids) > 1 else None
+        if count <= _SCAN_THRESHOLD:
+            ids, lats, lngs = self._collect([bucket for grid in grids for bucket in grid.values()], seen)
+            dists = haversine_batch(lat, lng, lats, lngs)
+        else:
+            center = self._cell(lat, lng)
+            # Smallest ground width of one cell near this latitude
+            cell_m = self.cell_size * _M_PER_DEG * max(math.cos(math.radians(min(abs(lat) + self.cell_size, 89.0))), 0.01)
+            max_rings = int(max_distance_m / cell_m) + 1
+            for r, buckets in self._ring_buckets(grids, center, max_rings):
+                if buckets:
+                    ring_ids, lats, lngs = self._collect(buckets, seen)
+                    ids.extend(ring_ids)
+                    dists = np.concatenate((dists, haversine_batch(lat, lng, lats, lngs)))
+                # Anything outside rings 0..r is at least r cells away
+                if len(ids) >= k and np.partition(dists, k - 1)[k - 1] <= r * cell_m:
+                    break
+
+        order = top_k_indices(dists, k)
+        return [(self._responders[ids[i]], float(dists[i])) for i in order if dists[i] <= max_distance_m]
+
+    @staticmethod
+    def _collect(buckets, seen: Optional[set] = None):
+        ids = []
+        lats = []
+        lngs = []
+        for bucket in buckets:
+            for rid, (rlat, rlng) in bucket.items():
+                if seen is not None:
+                    # a responder with several matching tags sits in several grids
+                    if rid in seen:
+                        continue
+                    seen.add(rid)
+                ids.append(rid)
+                lats.append(rlat)
+                lngs.append(rlng)
+        return ids, lats, lngs
+
+
+# Process-wide registry used by the API handlers
+responder_registry = ResponderRegistry()
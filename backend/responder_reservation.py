@@ -0,0 +1,164 @@
+"""
+Atomic responder reservation.
+Auto-assign reserves a responder before writing the assignment, so a responder
+is never handed two alerts by concurrent batches, workers or instances. The
+reservation is a compare-and-set on the responder's status:
+
+  1. Postgres: UPDATE responders SET status = 'busy' WHERE status = 'available'
+     RETURNING id; exactly one concurrent caller gets the row back. The row
+     also records the alert and a hold deadline (reserved_for, reserved_until)
+     so a heartbeat arriving before assigned_to is written keeps it busy.
+  2. Database down: a Redis SET NX key per responder, shared by all instances.
+  3. No Redis either: the in-process registry, whose check-and-set runs
+     without yielding to the event loop.
+
+Whichever way it was taken, the registry marks the responder busy so nearest()
+stops offering it. release() makes it available again (decline, resolve).
+"""
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from backend import redis_client as redis_client_module
+from backend.db import database
+from backend.responder_registry import responder_registry
+
+# Redis reservations expire in case a release is lost with its process
+RESERVATION_TTL = int(os.environ.get('RESPONDER_RESERVATION_TTL', 6 * 3600))
+RESERVATION_KEY = 'safenow:responder:{}:reservation'
+# How long a DB reservation outlasts heartbeats without an assignment (a process
+# that dies between reserving and assigning frees the responder after this)
+RESERVATION_HOLD_S = int(os.environ.get('RESPONDER_RESERVATION_HOLD', 120))
+
+RESERVE_SQL = ("UPDATE responders SET status = 'busy', reserved_for = :alert_id, reserved_until = :reserved_until, "
+               "updated_at = now() WHERE id = :id AND status = 'available' RETURNING id")
+# only frees a responder that is unreserved or reserved for this alert
+RELEASE_SQL = ("UPDATE responders SET status = 'available', reserved_for = NULL, reserved_until = NULL, "
+               "updated_at = now() WHERE id = :id AND status = 'busy' "
+               "AND (reserved_for IS NULL OR reserved_for = :alert_id) RETURNING id")
+# Heartbeat upsert: 'available' does not free a responder that is reserved or has an active alert
+HEARTBEAT_SQL = (
+    "INSERT INTO responders (id, user_id, responder_type, status, last_location, created_at, updated_at) "
+    "VALUES (:id, :user_id, :responder_type, :status, :last_location, now(), now()) "
+    "ON CONFLICT (id) DO UPDATE SET status = CASE WHEN :status = 'available' AND ("
+    "responders.reserved_until > now() OR EXISTS (SELECT 1 FROM alerts WHERE assigned_to = responders.id "
+    "AND status IN ('assigned', 'accepted', 'in_progress'))) THEN 'busy' ELSE :status END, "
+    "last_location = :last_location, updated_at = now()"
+)
+
+# delete the reservation only if it is still held for this alert
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class ResponderReservations:
+    def __init__(self, database=None, registry=None, ttl: int = RESERVATION_TTL, hold: int = RESERVATION_HOLD_S):
+        self.database = database
+        self.registry = registry
+        self.ttl = ttl
+        self.hold = hold
+        # responder id -> alert id for reservations taken by this process
+        self._held: Dict[str, str] = {}
+        self.reserved = 0
+        self.lost = 0
+
+    def holds(self, responder_id) -> bool:
+        return str(responder_id) in self._held
+
+    def holder(self, responder_id) -> Optional[str]:
+        return self._held.get(str(responder_id))
+
+    async def reserve(self, responder_id, alert_id) -> bool:
+        """Mark the responder busy for alert_id; False if someone else got it first."""
+        rid = str(responder_id)
+        won = await self._reserve_db(rid, str(alert_id))
+        if won is None:
+            won = await self._reserve_redis(rid, str(alert_id))
+        if won is None:
+            won = self._reserve_local(rid)
+        if self.registry is not None:
+            # won or lost, the responder is no longer available
+            self.registry.set_status(rid, 'busy')
+        if won:
+            self._held[rid] = str(alert_id)
+            self.reserved += 1
+        else:
+            self.lost += 1
+        return won
+
+    async def _reserve_db(self, rid: str, alert_id: str) -> Optional[bool]:
+        if self.database is None:
+            return None
+        values = {'id': rid, 'alert_id': alert_id,
+                  'reserved_until': datetime.utcnow() + timedelta(seconds=self.hold)}
+        try:
+            row = await self.database.fetch_one(RESERVE_SQL, values=values)
+        except Exception:
+            return None
+        return row is not None
+
+    async def _reserve_redis(self, rid: str, alert_id: str) -> Optional[bool]:
+        redis = redis_client_module.redis
+        if redis is None:
+            return None
+        if not self._locally_available(rid):
+            return False
+        try:
+            return bool(await redis.set(RESERVATION_KEY.format(rid), alert_id, nx=True, ex=self.ttl))
+        except Exception:
+            return None
+
+    def _locally_available(self, rid: str) -> bool:
+        if rid in self._held:
+            return False
+        record = self.registry.get(rid) if self.registry is not None else None
+        return record is None or record.get('status') == 'available'
+
+    def _reserve_local(self, rid: str) -> bool:
+        # no await between the check and the set: atomic within this process
+        return self._locally_available(rid)
+
+    async def release(self, responder_id, alert_id=None):
+        """
+        Make the responder available again: only if alert_id, when given, holds it
+        here, and in the database only if it is not reserved for another alert.
+        """
+        if not responder_id:
+            return
+        rid = str(responder_id)
+        held_for = self._held.get(rid)
+        if alert_id is not None and held_for is not None and held_for != str(alert_id):
+            return
+        self._held.pop(rid, None)
+        for_alert = held_for or (str(alert_id) if alert_id is not None else None)
+        freed = True
+        if self.database is not None:
+            try:
+                row = await self.database.fetch_one(RELEASE_SQL, values={'id': rid, 'alert_id': for_alert})
+                # still busy: reserved for another alert, possibly by another instance
+                freed = row is not None or await self._available_in_db(rid)
+            except Exception:
+                pass
+        redis = redis_client_module.redis
+        if redis is not None and for_alert:
+            try:
+                await redis.eval(RELEASE_SCRIPT, 1, RESERVATION_KEY.format(rid), for_alert)
+            except Exception:
+                pass
+        if self.registry is not None:
+            self.registry.set_status(rid, 'available' if freed else 'busy')
+
+    async def _available_in_db(self, rid: str) -> bool:
+        row = await self.database.fetch_one("SELECT status FROM responders WHERE id = :id", values={'id': rid})
+        return row is None or row['status'] == 'available'
+
+    def stats(self) -> Dict[str, Any]:
+        return {'held': len(self._held), 'reserved': self.reserved, 'lost': self.lost}
+
+
+# Process-wide reservations used by auto-assign
+responder_reservations = ResponderReservations(database, responder_registry)
@@ -0,0 +1,93 @@
+"""
+Row -> response encoding shared by the API handlers.
+encode_row converts a DB record in one pass (UUID -> str, datetime -> ISO 8601,
+JSONB text -> objects) and FastJSONResponse/dumps render with orjson when it is
+installed, falling back to the standard json module. With orjson, UUIDs and
+datetimes are left for its C encoder, which writes the same strings.
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional
+from uuid import UUID
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+# Columns stored as JSON/JSONB; asyncpg hands these back as text
+JSON_COLUMNS = frozenset({
+    'location', 'attachments', 'route_trace', 'last_location', 'capabilities',
+    'contact', 'metadata', 'required_responder_types', 'payload',
+})
+
+_PLAIN_TYPES = frozenset({str, int, float, bool, list, dict, type(None)})
+# Types passed through untouched because dumps() encodes them natively
+_PASSTHROUGH_TYPES = _PLAIN_TYPES | ({datetime, date, UUID} if orjson else set())
+
+
+def _load_json(value: str):
+    try:
+        return orjson.loads(value) if orjson else json.loads(value)
+    except ValueError:
+        return value
+
+
+_ENCODERS = {datetime: datetime.isoformat, date: date.isoformat, UUID: UUID.__str__, Decimal: float}
+
+
+def encode_value(value: Any) -> Any:
+    encoder = _ENCODERS.get(type(value))
+    if encoder is not None:
+        return encoder(value)
+    # driver-specific subclasses (e.g. asyncpg's UUID)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def encode_row(row: Any, json_columns: frozenset = JSON_COLUMNS) -> Optional[Dict[str, Any]]:
+    """One dict ready for dumps()/FastJSONResponse from a DB record or plain dict."""
+    if row is None:
+        return None
+    items = row.items() if isinstance(row, dict) else row._mapping.items()
+    out = {}
+    for key, value in items:
+        cls = value.__class__
+        if cls in _PASSTHROUGH_TYPES:
+            if cls is str and key in json_columns:
+                value = _load_json(value)
+        else:
+            encoder = _ENCODERS.get(cls)
+            value = encoder(value) if encoder is not None else encode_value(value)
+        out[key] = value
+    return out
+
+
+def encode_rows(rows: Iterable[Any], json_columns: frozenset = JSON_COLUMNS) -> List[Dict[str, Any]]:
+    return [encode_row(row, json_columns) for row in rows]
+
+
+def _default(value: Any) -> Any:
+    encoded = encode_value(value)
+    return str(value) if encoded is value else encoded
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson (or json as a fallback)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
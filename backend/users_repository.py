@@ -0,0 +1,135 @@
+"""
+In-memory users repository backed by data/users.json.
+The file is parsed once and kept in memory; lookups only stat the file (at most
+once per `check_interval` seconds) and re-read it when its mtime changed, e.g.
+after an operator edited it by hand. Writes go through the repository and are
+persisted atomically with save(), so the login path never reads from disk.
+A reload only keeps the users written in memory since the last save; every
+other entry comes from the file, so a newer edit on disk is never overwritten
+by a stale in-memory copy.
+"""
+import json
+import os
+import time
+from typing import Any, Dict, Iterator, Optional, Set
+
+from backend.alert_journal import write_atomic
+
+USERS_CHECK_INTERVAL = float(os.environ.get('USERS_FILE_CHECK_INTERVAL', 2.0))
+
+
+class UsersRepository:
+    def __init__(self, path: str, defaults: Optional[Dict[str, Dict[str, Any]]] = None,
+                 check_interval: float = USERS_CHECK_INTERVAL):
+        self.path = path
+        # entries that always win over the file (the demo accounts)
+        self.defaults = defaults or {}
+        self.check_interval = check_interval
+        self._users: Dict[str, Dict[str, Any]] = dict(self.defaults)
+        self._mtime: Optional[float] = None
+        self._next_check = 0.0
+        self._loaded = False
+        # users written since the last save
+        self._dirty: Set[str] = set()
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """(Re)read the file now, merging the defaults on top."""
+        users: Dict[str, Dict[str, Any]] = {}
+        mtime = None
+        if os.path.exists(self.path):
+            try:
+                mtime = os.stat(self.path).st_mtime
+                with open(self.path, 'r') as f:
+                    users = json.load(f)
+            except Exception as e:
+                print(f"Error loading users: {e}")
+        # keep in-memory writes that have not been saved yet
+        for phone in self._dirty:
+            if phone in self._users:
+                users[phone] = self._users[phone]
+        users.update(self.defaults)
+        self._users = users
+        self._mtime = mtime
+        self._loaded = True
+        self._next_check = time.monotonic() + self.check_interval
+        return self._users
+
+    def _refresh(self):
+        if not self._loaded:
+            self.load()
+            return
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            mtime = None
+        if mtime != self._mtime:
+            self.load()
+
+    # -- reads ---------------------------------------------------------------
+
+    def get(self, phone: str, default=None) -> Optional[Dict[str, Any]]:
+        self._refresh()
+        return self._users.get(phone, default)
+
+    def __getitem__(self, phone: str) -> Dict[str, Any]:
+        self._refresh()
+        return self._users[phone]
+
+    def __contains__(self, phone) -> bool:
+        self._refresh()
+        return phone in self._users
+
+    def __iter__(self) -> Iterator[str]:
+        self._refresh()
+        return iter(list(self._users))
+
+    def __len__(self):
+        self._refresh()
+        return len(self._users)
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        self._refresh()
+        return dict(self._users)
+
+    # -- writes ----------------------------------------------------------------
+
+    def put(self, phone: str, user: Dict[str, Any]) -> Dict[str, Any]:
+        """Store a user in memory; persisted by the next save()."""
+        self._refresh()
+        self._users[phone] = user
+        self._dirty.add(phone)
+        return user
+
+    __setitem__ = put
+
+    def replace(self, users: Dict[str, Dict[str, Any]]):
+        self._users = dict(users)
+        self._users.update(self.defaults)
+        self._loaded = True
+        self._dirty = set(self._users)
+
+    def save(self) -> bool:
+        """Write all users atomically; returns False if nothing changed or the write failed."""
+        if not self._dirty:
+            return False
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            mtime = None
+        if mtime != self._mtime:
+            # the file changed since it was read: merge it before writing it back
+            self.load()
+        try:
+            write_atomic(self.path, json.dumps(self._users, indent=2, default=str).encode('utf-8'))
+        except Exception as e:
+            print(f"Error saving users: {e}")
+            return False
+        # our own write must not look like an external edit
+        self._mtime = os.stat(self.path).st_mtime
+        self._dirty = set()
+        print(f"Saved {len(self._users)} users to persistent storage")
+        return True
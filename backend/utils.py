@@ -1,15 +1,15 @@
 import math
-from typing import Dict, Any, Optional
-import os
-import requests
-from backend.eta_cache import get_cached, set_cached, get_cached_redis, set_cached_redis
+from typing import Dict, Any, Optional, List, Tuple
+import numpy as np
 
-GOOGLE_DIRECTIONS_KEY = os.environ.get('GOOGLE_DIRECTIONS_KEY')
+EARTH_RADIUS_M = 6371000.0
+# Fallback travel speed when no routing provider is available: 40 km/h
+FALLBACK_SPEED_M_S = 11.11
 
 
 def haversine_distance(lat1, lon1, lat2, lon2):
     # returns distance in meters
-    R = 6371000.0
+    R = EARTH_RADIUS_M
     phi1 = math.radians(lat1)
     phi2 = math.radians(lat2)
     dphi = math.radians(lat2 - lat1)
@@ -19,9 +19,44 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     return R * c
 
 
-def pick_nearest_responder(alert_loc: Dict[str, float], responders: list) -> Optional[Dict[str, Any]]:
-    best = None
-    best_dist = None
+def haversine_batch(lat: float, lng: float, lats, lngs) -> np.ndarray:
+    """
+    Distances in meters from one point to N points.
+    lats/lngs: sequences or arrays of length N
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lngs = np.asarray(lngs, dtype=np.float64)
+    phi1 = math.radians(lat)
+    phi2 = np.radians(lats)
+    dphi = phi2 - phi1
+    dlambda = np.radians(lngs) - math.radians(lng)
+    a = np.sin(dphi / 2.0) ** 2 + math.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2.0) ** 2
+    return 2.0 * EARTH_RADIUS_M * np.arctan2(np.sqrt(a), np.sqrt(1.0 - a))
+
+
+def fallback_eta_batch(distances) -> np.ndarray:
+    """Speed-based ETA in whole seconds for an array of distances in meters"""
+    return (np.asarray(distances, dtype=np.float64) / FALLBACK_SPEED_M_S).astype(np.int64)
+
+
+def top_k_indices(values, k: int) -> np.ndarray:
+    """Indices of the k smallest values, in ascending order of value"""
+    values = np.asarray(values)
+    n = values.shape[0]
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        idx = np.argpartition(values, k - 1)[:k]
+    else:
+        idx = np.arange(n)
+    return idx[np.argsort(values[idx], kind='stable')]
+
+
+def responder_coordinates(responders: list) -> Tuple[list, np.ndarray, np.ndarray]:
+    """Split responders into those with a usable last_location and their coordinate arrays"""
+    located = []
+    lats = []
+    lngs = []
     for r in responders:
         loc = r.get('last_location') or {}
         try:
@@ -29,59 +64,41 @@ def pick_nearest_responder(alert_loc: Dict[str, float], responders: list) -> Opt
             rlng = float(loc.get('lng'))
         except Exception:
             continue
-        dist = haversine_distance(alert_loc['lat'], alert_loc['lng'], rlat, rlng)
-        if best is None or dist < best_dist:
-            best = r
-            best_dist = dist
-    return best
+        located.append(r)
+        lats.append(rlat)
+        lngs.append(rlng)
+    return located, np.array(lats, dtype=np.float64), np.array(lngs, dtype=np.float64)
+
+
+def rank_candidates(alert_loc: Dict[str, float], responders: list, k: Optional[int] = None) -> List[Tuple[Dict[str, Any], float, int]]:
+    """
+    Rank responders by straight-line distance to the alert in one vectorized pass.
+    Returns up to k (responder, distance_m, fallback_eta_s) tuples, closest first.
+    """
+    located, lats, lngs = responder_coordinates(responders)
+    if not located:
+        return []
+    dists = haversine_batch(float(alert_loc['lat']), float(alert_loc['lng']), lats, lngs)
+    etas = fallback_eta_batch(dists)
+    order = top_k_indices(dists, len(located) if k is None else k)
+    return [(located[i], float(dists[i]), int(etas[i])) for i in order]
+
+
+def pick_nearest_responder(alert_loc: Dict[str, float], responders: Optional[list] = None) -> Optional[Dict[str, Any]]:
+    if responders is None:
+        # look up the nearest available responder in the spatial index
+        from backend.responder_registry import responder_registry
+        nearest = responder_registry.nearest(alert_loc['lat'], alert_loc['lng'], k=1)
+        return nearest[0][0] if nearest else None
+    ranked = rank_candidates(alert_loc, responders, k=1)
+    return ranked[0][0] if ranked else None
 
 
-def estimate_eta_seconds(origin: Dict[str,float], dest: Dict[str,float]) -> Optional[int]:
+async def estimate_eta_seconds(origin: Dict[str,float], dest: Dict[str,float]) -> Optional[int]:
     """
     Estimate ETA in seconds between origin and dest.
-    If GOOGLE_DIRECTIONS_KEY is set, use Directions API. Otherwise fallback to simple speed-based estimate.
+    Uses the shared async ETA provider (Directions API when configured, otherwise a speed-based estimate).
     origin/dest: {'lat':..,'lng':..}
     """
-    try:
-        key = f"eta:{origin['lat']},{origin['lng']}:{dest['lat']},{dest['lng']}"
-        # check in-memory cache
-        cached = get_cached(key)
-        if cached is not None:
-            return cached
-        # check redis cache async (best-effort)
-        try:
-            r_cached = None
-            import asyncio
-            loop = asyncio.get_event_loop()
-            r_cached = loop.run_until_complete(get_cached_redis(key))
-            if r_cached:
-                set_cached(key, r_cached)
-                return r_cached
-        except Exception:
-            pass
-
-        if GOOGLE_DIRECTIONS_KEY:
-            url = 'https://maps.googleapis.com/maps/api/directions/json'
-            params = {'origin': f"{origin['lat']},{origin['lng']}", 'destination': f"{dest['lat']},{dest['lng']}", 'key': GOOGLE_DIRECTIONS_KEY}
-            resp = requests.get(url, params=params, timeout=5)
-            data = resp.json()
-            if data.get('routes'):
-                sec = data['routes'][0]['legs'][0]['duration']['value']
-                set_cached(key, int(sec))
-                try:
-                    loop.run_until_complete(set_cached_redis(key, int(sec)))
-                except Exception:
-                    pass
-                return int(sec)
-        # fallback: assume average speed 40 km/h -> ~11.11 m/s
-        dist = haversine_distance(origin['lat'], origin['lng'], dest['lat'], dest['lng'])
-        speed_m_s = 11.11
-        eta = int(dist / speed_m_s)
-        set_cached(key, eta)
-        try:
-            loop.run_until_complete(set_cached_redis(key, eta))
-        except Exception:
-            pass
-        return eta
-    except Exception:
-        return None
+    from backend.eta_provider import eta_provider
+    return await eta_provider.eta_seconds(origin, dest)
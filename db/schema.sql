@@ -231,6 +231,10 @@ ALTER TABLE users ADD COLUMN deleted_at TIMESTAMP WITH TIME ZONE;
 ALTER TABLE alerts ADD COLUMN deleted_at TIMESTAMP WITH TIME ZONE;
 ALTER TABLE responders ADD COLUMN deleted_at TIMESTAMP WITH TIME ZONE;
 
+-- Auto-assign reservations: heartbeats keep a reserved responder busy until reserved_until
+ALTER TABLE responders ADD COLUMN reserved_for UUID;
+ALTER TABLE responders ADD COLUMN reserved_until TIMESTAMP WITH TIME ZONE;
+
 -- Geographic Indexes and Enhanced Location Management
 CREATE INDEX idx_users_location_gist ON users USING GIST(last_location);
 CREATE INDEX idx_alerts_location_gin ON alerts USING GIN(location);
@@ -258,6 +262,10 @@ CREATE INDEX idx_user_sessions_user_active ON user_sessions(user_id, is_active);
 CREATE INDEX idx_audit_logs_resource ON audit_logs(resource_type, resource_id);
 CREATE INDEX idx_response_metrics_alert_id ON response_metrics(alert_id);
 
+-- Keyset pagination for alert listings: (created_at, id) and (resolution time, id)
+CREATE INDEX idx_alerts_created_at_id ON alerts(created_at DESC, id DESC);
+CREATE INDEX idx_alerts_closed_at_id ON alerts((COALESCE(resolved_at, marked_done_at)) DESC, id DESC) WHERE status IN ('resolved', 'done');
+
 -- Composite indexes for common queries
 CREATE INDEX idx_alerts_location_status_type ON alerts USING GIN(location, status, type);
 CREATE INDEX idx_responders_location_status_type ON responders USING GIN(last_location, status, responder_type);
@@ -118,16 +118,21 @@ const EmergencyPage = () => {
       // Upload media if captured
       if (capturedMedia.hasMedia) {
         try {
-          const mediaUploadResponse = await fetch(`${API_BASE}/alerts/upload_media`, {
+          // Send the captured files as multipart so the server can stream them to disk
+          const formData = new FormData();
+          const toBlob = async (dataUrl) => (await fetch(dataUrl)).blob();
+          for (const [index, photo] of capturedMedia.photos.entries()) {
+            formData.append('photos', await toBlob(photo), `photo_${index + 1}.jpg`);
+          }
+          if (capturedMedia.audio) {
+            formData.append('audio', await toBlob(capturedMedia.audio), 'recording.webm');
+          }
+          const mediaUploadResponse = await fetch(`${API_BASE}/alerts/${alertId}/media`, {
             method: 'POST',
             headers: {
-              'Content-Type': 'application/json',
+              'Authorization': `Bearer ${localStorage.getItem('token')}`
             },
-            body: JSON.stringify({
-              alert_id: alertId,
-              photos: capturedMedia.photos,
-              audio: capturedMedia.audio
-            })
+            body: formData
           });
 
           if (!mediaUploadResponse.ok) {
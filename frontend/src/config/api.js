@@ -16,6 +16,7 @@ export const config = {
       create: `${API_BASE_URL}/alerts`,
       list: `${API_BASE_URL}/alerts`,
       uploadMedia: `${API_BASE_URL}/alerts/upload_media`,
+      media: (id) => `${API_BASE_URL}/alerts/${id}/media`,
       userDashboard: `${API_BASE_URL}/alerts/user/dashboard`,
       userRecent: `${API_BASE_URL}/alerts/user/recent`
     },
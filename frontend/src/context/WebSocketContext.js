@@ -25,6 +25,8 @@ export const WebSocketProvider = ({ children }) => {
   const [notifications, setNotifications] = useState([]);
   const reconnectTimeoutRef = useRef(null);
   const reconnectAttempts = useRef(0);
+  const changeCursorRef = useRef(null);
+  const changeEtagRef = useRef(null);
 
   const maxReconnectAttempts = 5;
   const baseReconnectDelay = 1000; // 1 second
@@ -35,10 +37,10 @@ export const WebSocketProvider = ({ children }) => {
       loadAlertsFromDatabase();
       connect();
       
-      // Set up polling as fallback for real-time updates
+      // Set up delta-sync polling as fallback for real-time updates
       const pollInterval = setInterval(() => {
         if (isAuthenticated) {
-          loadAlertsFromDatabase();
+          syncAlertChanges();
         }
       }, 10000); // Poll every 10 seconds
       
@@ -55,6 +57,10 @@ export const WebSocketProvider = ({ children }) => {
   const loadAlertsFromDatabase = async () => {
     try {
       const headers = getAuthHeaders();
+      // take the change-feed cursor first so nothing between the two requests is missed
+      const feed = await axios.get(`${API_BASE_URL}/alerts/changes`, { headers });
+      changeCursorRef.current = feed.data.cursor;
+      changeEtagRef.current = null;
       const response = await axios.get(`${API_BASE_URL}/alerts?status=open`, { headers });
       
       // Only update if alerts have changed to prevent unnecessary re-renders
@@ -75,6 +81,48 @@ export const WebSocketProvider = ({ children }) => {
     }
   };
 
+  const syncAlertChanges = async () => {
+    if (!changeCursorRef.current) {
+      return loadAlertsFromDatabase();
+    }
+    try {
+      const headers = { ...getAuthHeaders() };
+      if (changeEtagRef.current) {
+        headers['If-None-Match'] = changeEtagRef.current;
+      }
+      const response = await axios.get(`${API_BASE_URL}/alerts/changes`, {
+        headers,
+        params: { cursor: changeCursorRef.current },
+        validateStatus: status => status === 200 || status === 304,
+      });
+      if (response.status === 304) return;
+
+      const { cursor, reset, changes } = response.data;
+      if (reset) {
+        return loadAlertsFromDatabase();
+      }
+      changeCursorRef.current = cursor;
+      changeEtagRef.current = response.headers.etag || null;
+      if (!changes.length) return;
+
+      setAlerts(prev => {
+        const byId = new Map(prev.map(alert => [String(alert.id), alert]));
+        changes.forEach(change => {
+          if (change.op === 'delete') {
+            byId.delete(change.id);
+          } else if (change.op === 'upsert') {
+            byId.set(change.id, { ...byId.get(change.id), ...change.alert });
+          } else if (byId.has(change.id)) {
+            byId.set(change.id, { ...byId.get(change.id), ...change.alert });
+          }
+        });
+        return Array.from(byId.values()).sort((a, b) => new Date(b.created_at) - new Date(a.created_at));
+      });
+    } catch (error) {
+      console.error('Failed to sync alert changes:', error);
+    }
+  };
+
   const markAlertAsDone = async (alertId) => {
     try {
       const headers = getAuthHeaders();
@@ -302,6 +350,21 @@ export const WebSocketProvider = ({ children }) => {
         });
         break;
 
+      case 'alert_escalated':
+        setAlerts(prev =>
+          prev.map(alert =>
+            alert.id === data.alert_id
+              ? { ...alert, escalation_level: data.escalation_level }
+              : alert
+          )
+        );
+
+        toast(`Alert escalated to level ${data.escalation_level}`, {
+          duration: 4000,
+          icon: '⏫',
+        });
+        break;
+
       case 'responder_update':
         setResponders(prev => {
           const existing = prev.findIndex(r => r.id === data.responder.id);
@@ -0,0 +1,101 @@
+"""Benchmark DB-down fallback queries: full scans of ALERTS vs AlertStore indexes.
+Run with: python tools/bench_alert_store.py
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.alert_store import AlertStore
+
+ALERTS_COUNT = 100000
+USERS = 5000
+OPEN_STATUSES = ('pending', 'assigned', 'in_progress')
+
+
+def make_alerts(n):
+    random.seed(n)
+    now = datetime.utcnow()
+    alerts = {}
+    for i in range(n):
+        status = random.choice(['pending', 'assigned', 'in_progress', 'resolved', 'resolved', 'done'])
+        alert = {'id': f'a{i}', 'user_id': f'u{random.randrange(USERS)}', 'status': status, 'type': 'medical'}
+        if status in ('resolved', 'done'):
+            alert['resolved_at'] = (now - timedelta(minutes=random.randrange(60 * 72))).isoformat()
+        alerts[alert['id']] = alert
+    return alerts
+
+
+# the scans the fallback branches in app.py used to run
+def scan_resolved_since(alerts, cutoff, user_id=None):
+    out = []
+    for alert in alerts.values():
+        if user_id is not None and alert.get('user_id') != user_id:
+            continue
+        if alert.get('status') in ['resolved', 'done']:
+            resolved_at = alert.get('resolved_at') or alert.get('marked_done_at')
+            if resolved_at and datetime.fromisoformat(resolved_at.replace('Z', '+00:00')) >= cutoff:
+                out.append(alert)
+    return out
+
+
+def scan_open(alerts, user_id=None):
+    return [a for a in alerts.values()
+            if a.get('status') in OPEN_STATUSES and (user_id is None or a.get('user_id') == user_id)]
+
+
+def scan_resolved_before(alerts, cutoff):
+    out = []
+    for alert_id, alert in alerts.items():
+        if alert.get('status') in ['resolved', 'done']:
+            resolved_at = alert.get('resolved_at') or alert.get('marked_done_at')
+            if resolved_at and datetime.fromisoformat(resolved_at.replace('Z', '+00:00')) < cutoff:
+                out.append(alert_id)
+    return out
+
+
+def best_of(fn, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    alerts = make_alerts(ALERTS_COUNT)
+    store = AlertStore()
+    start = time.perf_counter()
+    store.load(alerts)
+    load_ms = (time.perf_counter() - start) * 1000
+    cutoff = datetime.utcnow() - timedelta(hours=24)
+    user = 'u42'
+
+    cases = [
+        ('user recent (24h)', lambda: scan_resolved_since(alerts, cutoff, user), lambda: store.resolved_since(cutoff, user_id=user)),
+        ('user dashboard open', lambda: scan_open(alerts, user), lambda: store.by_user(user, OPEN_STATUSES)),
+        ('open alerts', lambda: scan_open(alerts), lambda: store.by_status(OPEN_STATUSES)),
+        ('admin recent (24h)', lambda: scan_resolved_since(alerts, cutoff), lambda: store.resolved_since(cutoff)),
+        ('cleanup (>24h)', lambda: scan_resolved_before(alerts, cutoff), lambda: store.resolved_before(cutoff)),
+    ]
+    print("=" * 60)
+    print(f"ALERT STORE FALLBACK BENCHMARK ({ALERTS_COUNT} alerts, index build {load_ms:.0f} ms)")
+    print("=" * 60)
+    print(f"{'Query':<22} {'Scan ms':>10} {'Index ms':>10} {'Speedup':>10}")
+    print("-" * 60)
+    for name, scan, indexed in cases:
+        assert sorted(a if isinstance(a, str) else a['id'] for a in scan()) == \
+            sorted(a if isinstance(a, str) else a['id'] for a in indexed()), name
+        scan_t = best_of(scan)
+        index_t = best_of(indexed)
+        print(f"{name:<22} {scan_t * 1000:>10.2f} {index_t * 1000:>10.3f} {scan_t / index_t:>9.0f}x")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
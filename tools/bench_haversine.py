@@ -0,0 +1,74 @@
+"""Benchmark scalar vs vectorized candidate ranking.
+Run with: python tools/bench_haversine.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.utils import haversine_distance, haversine_batch, fallback_eta_batch, top_k_indices, responder_coordinates, rank_candidates, FALLBACK_SPEED_M_S
+
+ALERT = {'lat': 28.6139, 'lng': 77.2090}
+SIZES = [1000, 10000, 100000]
+TOP_K = 20
+
+
+def make_responders(n):
+    random.seed(n)
+    return [
+        {'id': str(i), 'last_location': {'lat': 28.3 + random.random() * 0.6, 'lng': 76.9 + random.random() * 0.6}}
+        for i in range(n)
+    ]
+
+
+def rank_scalar(alert_loc, responders, k):
+    # the previous per-responder loop: one haversine + ETA per candidate, then sort
+    scored = []
+    for r in responders:
+        loc = r['last_location']
+        dist = haversine_distance(alert_loc['lat'], alert_loc['lng'], loc['lat'], loc['lng'])
+        scored.append((dist, int(dist / FALLBACK_SPEED_M_S), r['id']))
+    scored.sort()
+    return scored[:k]
+
+
+def best_of(fn, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    print("=" * 60)
+    print("CANDIDATE RANKING BENCHMARK (top %d)" % TOP_K)
+    print("=" * 60)
+    # Vector: rank_candidates on responder dicts; Kernel: batch math on prebuilt arrays
+    print(f"{'Responders':>10} {'Scalar ms':>11} {'Vector ms':>11} {'Speedup':>9} {'Kernel ms':>11} {'Speedup':>9}")
+    print("-" * 60)
+    for n in SIZES:
+        responders = make_responders(n)
+        scalar_ids = [rid for _, _, rid in rank_scalar(ALERT, responders, TOP_K)]
+        vector_ids = [r['id'] for r, _, _ in rank_candidates(ALERT, responders, k=TOP_K)]
+        assert scalar_ids == vector_ids, "rankings differ"
+        scalar = best_of(lambda: rank_scalar(ALERT, responders, TOP_K))
+        vector = best_of(lambda: rank_candidates(ALERT, responders, k=TOP_K))
+        _, lats, lngs = responder_coordinates(responders)
+
+        def kernel():
+            dists = haversine_batch(ALERT['lat'], ALERT['lng'], lats, lngs)
+            fallback_eta_batch(dists)
+            top_k_indices(dists, TOP_K)
+
+        kern = best_of(kernel)
+        print(f"{n:>10} {scalar * 1000:>11.2f} {vector * 1000:>11.2f} {scalar / vector:>8.1f}x {kern * 1000:>11.3f} {scalar / kern:>8.1f}x")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Benchmark one media expiry tick: full metadata sweep vs popping due items off the heap.
+Run with: python tools/bench_media_expiry.py
+"""
+import heapq
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.media_expiry import MediaExpiryScheduler
+from backend.media_store import MediaStore
+
+TRACKED = 10000
+DUE = 50
+
+
+def make_files(tmp, prefix):
+    now = datetime.now()
+    entries = []
+    for i in range(TRACKED):
+        path = os.path.join(tmp, f'{prefix}_{i}.jpg')
+        with open(path, 'wb') as f:
+            f.write(b'x' * 64)
+        expires = now - timedelta(seconds=1) if i < DUE else now + timedelta(minutes=30)
+        entries.append({'filename': os.path.basename(path), 'filepath': path, 'type': 'photo', 'alert_id': f'a{i}',
+                        'size': 64, 'created_at': now.isoformat(), 'expires_at': expires.isoformat()})
+    return entries
+
+
+# what cleanup_expired_media did every 5 minutes
+def sweep(metadata_file):
+    with open(metadata_file) as f:
+        metadata = json.load(f)
+    now = datetime.now()
+    keep, deleted = [], 0
+    for file_info in metadata['files']:
+        if now >= datetime.fromisoformat(file_info['expires_at']):
+            if os.path.exists(file_info['filepath']):
+                os.path.getsize(file_info['filepath'])
+                os.remove(file_info['filepath'])
+                deleted += 1
+        else:
+            keep.append(file_info)
+    metadata['files'] = keep
+    with open(metadata_file, 'w') as f:
+        json.dump(metadata, f, indent=2)
+    return deleted
+
+
+def heap_tick(scheduler):
+    due = []
+    now = time.time()
+    while scheduler._heap and scheduler._heap[0][0] <= now:
+        due.append(heapq.heappop(scheduler._heap))
+    scheduler._expire(due)
+    return len(due)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        metadata_file = os.path.join(tmp, 'media_metadata.json')
+        with open(metadata_file, 'w') as f:
+            json.dump({'files': make_files(tmp, 'sweep')}, f, indent=2)
+        start = time.perf_counter()
+        assert sweep(metadata_file) == DUE
+        sweep_ms = (time.perf_counter() - start) * 1000
+
+        store = MediaStore(os.path.join(tmp, 'media.sqlite3'))
+        scheduler = MediaExpiryScheduler(store)
+        for entry in make_files(tmp, 'heap'):
+            entry = store.add(entry)
+            scheduler.schedule(entry['id'], datetime.fromisoformat(entry['expires_at']).timestamp(),
+                               entry['filepath'], entry['size'])
+        start = time.perf_counter()
+        assert heap_tick(scheduler) == DUE
+        heap_ms = (time.perf_counter() - start) * 1000
+        scheduler._executor.shutdown()
+
+    print("=" * 60)
+    print(f"MEDIA EXPIRY TICK BENCHMARK ({TRACKED} tracked files, {DUE} due)")
+    print("=" * 60)
+    print(f"{'full metadata sweep':<30} {sweep_ms:>10.1f} ms")
+    print(f"{'heap pop + unlink due only':<30} {heap_ms:>10.1f} ms")
+    print(f"{'speedup':<30} {sweep_ms / heap_ms:>10.0f}x")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Benchmark media metadata writes and per-alert lookups: JSON file rewrite vs the SQLite index.
+Run with: python tools/bench_media_metadata.py
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.media_store import MediaStore
+
+EXISTING = 20000
+UPLOADS = 200
+ALERTS = 2000
+
+
+def make_entry(i):
+    now = datetime.now()
+    return {'filename': f'alert_{i % ALERTS}_{i}.jpg', 'filepath': f'/media/photos/alert_{i % ALERTS}_{i}.jpg',
+            'type': 'photo', 'alert_id': f'alert-{i % ALERTS}', 'size': 150000,
+            'created_at': now.isoformat(), 'expires_at': (now + timedelta(minutes=30)).isoformat()}
+
+
+# what save_photo/get_media_for_alert did before: parse and rewrite the whole list
+def json_add(path, entry):
+    with open(path) as f:
+        metadata = json.load(f)
+    metadata['files'].append(entry)
+    with open(path, 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+
+def json_for_alert(path, alert_id):
+    with open(path) as f:
+        metadata = json.load(f)
+    return [e for e in metadata['files'] if e.get('alert_id') == alert_id]
+
+
+def timed(fn, n):
+    start = time.perf_counter()
+    for i in range(n):
+        fn(i)
+    return (time.perf_counter() - start) / n * 1000
+
+
+def main():
+    entries = [make_entry(i) for i in range(EXISTING)]
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, 'media_metadata.json')
+        with open(json_path, 'w') as f:
+            json.dump({'files': entries}, f, indent=2)
+        store = MediaStore(os.path.join(tmp, 'media.sqlite3'), legacy_json=json_path)
+
+        json_write = timed(lambda i: json_add(json_path, make_entry(EXISTING + i)), UPLOADS)
+        store_write = timed(lambda i: store.add(make_entry(EXISTING + i)), UPLOADS)
+        json_read = timed(lambda i: json_for_alert(json_path, f'alert-{i}'), UPLOADS)
+        store_read = timed(lambda i: store.for_alert(f'alert-{i}'), UPLOADS)
+        assert len(store.for_alert('alert-7')) == len(json_for_alert(json_path, 'alert-7'))
+        store.close()
+
+    print("=" * 60)
+    print(f"MEDIA METADATA BENCHMARK ({EXISTING} existing entries)")
+    print("=" * 60)
+    print(f"{'Operation':<22} {'JSON ms':>10} {'SQLite ms':>10} {'Speedup':>10}")
+    print("-" * 60)
+    print(f"{'upload (add entry)':<22} {json_write:>10.2f} {store_write:>10.3f} {json_write / store_write:>9.0f}x")
+    print(f"{'media for alert':<22} {json_read:>10.2f} {store_read:>10.3f} {json_read / store_read:>9.0f}x")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Benchmark the per-handler row conversion path vs the shared encoder + orjson.
+Run with: python tools/bench_serialization.py
+"""
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from backend.serialization import encode_rows, FastJSONResponse, orjson
+
+ROWS = 10000
+
+
+def make_rows(n):
+    random.seed(n)
+    now = datetime.now(timezone.utc)
+    rows = []
+    for i in range(n):
+        created = now - timedelta(seconds=i * 7)
+        rows.append({
+            'id': uuid.uuid4(),
+            'user_id': uuid.uuid4(),
+            'type': random.choice(['medical', 'fire', 'crime', 'accident']),
+            'status': random.choice(['pending', 'assigned', 'in_progress']),
+            'created_at': created,
+            'updated_at': created + timedelta(seconds=30),
+            # asyncpg returns JSONB as text
+            'location': json.dumps({'lat': 28.6 + random.random(), 'lng': 77.2 + random.random(), 'address': 'Connaught Place, New Delhi'}),
+            'verified': False,
+            'verification_method': None,
+            'note': 'Need help near the metro station',
+            'assigned_to': uuid.uuid4() if i % 2 else None,
+            'severity': random.randint(1, 5),
+            'eta_minutes': None,
+            'resolved_at': None,
+            'marked_done_at': None,
+            'auto_delete_at': None,
+        })
+    return rows
+
+
+def current_path(rows):
+    # what list_alerts did: copy, per-endpoint field list, then FastAPI's encoder + json
+    alerts = [dict(row) for row in rows]
+    for alert in alerts:
+        for field in ['created_at', 'updated_at', 'resolved_at', 'marked_done_at', 'auto_delete_at']:
+            if alert.get(field):
+                alert[field] = alert[field].isoformat()
+    return JSONResponse(jsonable_encoder(alerts)).body
+
+
+def shared_path(rows):
+    return FastJSONResponse(encode_rows(rows)).body
+
+
+def best_of(fn, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    rows = make_rows(ROWS)
+    print("=" * 60)
+    print(f"ALERT LIST SERIALIZATION BENCHMARK ({ROWS} rows, orjson={'yes' if orjson else 'no'})")
+    print("=" * 60)
+    current = best_of(lambda: current_path(rows))
+    shared = best_of(lambda: shared_path(rows))
+    print(f"{'current (dict + isoformat + jsonable_encoder + json)':<52} {current * 1000:>7.1f} ms")
+    print(f"{'shared (encode_rows + FastJSONResponse)':<52} {shared * 1000:>7.1f} ms")
+    print(f"{'speedup':<52} {current / shared:>7.1f}x")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Benchmark OTP-login user lookups: re-reading users.json per call vs the cached repository.
+Run with: python tools/bench_user_lookup.py
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.users_repository import UsersRepository
+
+USERS_COUNT = 5000
+LOOKUPS = 2000
+
+
+def make_users(n):
+    return {f'+91{9000000000 + i}': {'id': f'user-{i}', 'phone': f'+91{9000000000 + i}', 'name': f'User {i}',
+                                    'role': 'citizen', 'is_verified': True} for i in range(n)}
+
+
+# what get_user_by_phone did before: parse the whole file on every login
+def reread_lookup(path, phone):
+    with open(path, 'r') as f:
+        users = json.load(f)
+    return users.get(phone)
+
+
+def main():
+    users = make_users(USERS_COUNT)
+    phones = random.Random(1).choices(list(users), k=LOOKUPS)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'users.json')
+        with open(path, 'w') as f:
+            json.dump(users, f, indent=2)
+        repo = UsersRepository(path)
+
+        start = time.perf_counter()
+        for phone in phones:
+            assert reread_lookup(path, phone) is not None
+        reread = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for phone in phones:
+            assert repo.get(phone) is not None
+        cached = time.perf_counter() - start
+
+    print("=" * 60)
+    print(f"USER LOOKUP BENCHMARK ({USERS_COUNT} users, {LOOKUPS} logins)")
+    print("=" * 60)
+    print(f"{'re-read users.json per login':<36} {reread / LOOKUPS * 1e6:>10.1f} us/login")
+    print(f"{'UsersRepository.get':<36} {cached / LOOKUPS * 1e6:>10.2f} us/login")
+    print(f"{'logins/s (cached)':<36} {LOOKUPS / cached:>10.0f}")
+    print(f"{'speedup':<36} {reread / cached:>10.0f}x")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
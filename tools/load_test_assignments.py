@@ -0,0 +1,87 @@
+"""Concurrent auto-assign load test against one or more running backend instances.
+Registers responders, fires alerts concurrently (round-robin across instances),
+waits for auto-assign and reports any responder assigned to more than one alert.
+Run with: python tools/load_test_assignments.py [--api URL ...] [--alerts N] [--responders N]
+"""
+import argparse
+import asyncio
+import random
+import sys
+import uuid
+from collections import Counter
+
+import httpx
+
+CENTER = (12.9716, 77.5946)
+
+
+async def login(client, api, phone):
+    otp = (await client.post(f'{api}/auth/request_otp', json={'phone': phone, 'purpose': 'login'})).json()
+    verify = await client.post(f'{api}/auth/verify_otp', json={'phone': phone, 'code': otp.get('otp_sample')})
+    return verify.json().get('access_token')
+
+
+def near_center(spread=0.02):
+    return {'lat': CENTER[0] + random.uniform(-spread, spread), 'lng': CENTER[1] + random.uniform(-spread, spread)}
+
+
+async def open_alerts(client, api, token):
+    alerts = []
+    cursor = None
+    while True:
+        params = {'limit': 100}
+        if cursor:
+            params['cursor'] = cursor
+        resp = await client.get(f'{api}/alerts/open', params=params, headers={'Authorization': f'Bearer {token}'})
+        alerts.extend(resp.json())
+        cursor = resp.headers.get('X-Next-Cursor')
+        if not cursor:
+            return alerts
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--api', action='append', help='instance base URL (repeat for several)')
+    parser.add_argument('--alerts', type=int, default=200)
+    parser.add_argument('--responders', type=int, default=150)
+    parser.add_argument('--wait', type=float, default=40, help='seconds to wait for auto-assign')
+    args = parser.parse_args()
+    apis = args.api or ['http://localhost:8000']
+    random.seed(1)
+
+    async with httpx.AsyncClient(timeout=30) as client:
+        token = await login(client, apis[0], 'loadtest_user')
+        headers = {'Authorization': f'Bearer {token}'}
+        responder_ids = [str(uuid.uuid4()) for _ in range(args.responders)]
+        await asyncio.gather(*[
+            client.post(f'{apis[i % len(apis)]}/responders/heartbeat',
+                        json={'id': rid, 'responder_type': 'volunteer', 'status': 'available', 'location': near_center()})
+            for i, rid in enumerate(responder_ids)
+        ])
+        print(f"Registered {len(responder_ids)} responders on {len(apis)} instance(s)")
+
+        created = await asyncio.gather(*[
+            client.post(f'{apis[i % len(apis)]}/alerts', headers=headers,
+                        json={'type': 'safety', 'note': 'load test', 'severity': random.randint(1, 5),
+                              'location': near_center()})
+            for i in range(args.alerts)
+        ])
+        alert_ids = {r.json().get('id') for r in created if r.status_code == 200}
+        print(f"Created {len(alert_ids)} alerts; waiting {args.wait:.0f}s for auto-assign...")
+        await asyncio.sleep(args.wait)
+
+        ours = [a for a in await open_alerts(client, apis[0], token) if a.get('id') in alert_ids]
+        assigned = [a for a in ours if a.get('assigned_to')]
+        per_responder = Counter(str(a['assigned_to']) for a in assigned)
+        doubles = {rid: n for rid, n in per_responder.items() if n > 1}
+
+    print("=" * 60)
+    print(f"Alerts assigned:        {len(assigned)} / {len(alert_ids)}")
+    print(f"Responders used:        {len(per_responder)}")
+    print(f"Double assignments:     {sum(n - 1 for n in doubles.values())}")
+    print("=" * 60)
+    return 1 if doubles else 0
+
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main()))
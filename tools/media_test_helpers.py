@@ -0,0 +1,36 @@
+"""Shared helpers for the media tests (imported by tools/test_media_*.py)."""
+import os
+from contextlib import contextmanager
+from datetime import datetime
+
+from backend import media_service
+from backend.media_store import MediaStore
+
+
+def add_file(tmp, store, name, expires_ts, size=100, alert_id='a1', counters=None):
+    """Store `size` bytes as `name` for alert_id, expiring at expires_ts; returns (entry, path)."""
+    path = os.path.join(tmp, name)
+    src = os.path.join(tmp, f'{name}.part')
+    with open(src, 'wb') as f:
+        f.write(b'x' * size)
+    # identical content is stored once and referenced again
+    store.acquire(path, size, name, src)
+    entry = store.add({'filename': name, 'filepath': path, 'type': 'photo', 'alert_id': alert_id, 'size': size,
+                       'created_at': datetime.now().isoformat(),
+                       'expires_at': datetime.fromtimestamp(expires_ts).isoformat()})
+    if counters is not None:
+        counters.added()
+    return entry, path
+
+
+@contextmanager
+def scratch_media(tmp, **caps):
+    """Point the media service at tmp, with a fresh index there, for the block; yields the store."""
+    saved_kinds, saved_store = media_service.MEDIA_KINDS, media_service.media_store
+    media_service.MEDIA_KINDS = {kind: dict(spec, dir=tmp, **caps) for kind, spec in saved_kinds.items()}
+    media_service.media_store = MediaStore(os.path.join(tmp, 'media.sqlite3'))
+    try:
+        yield media_service.media_store
+    finally:
+        media_service.MEDIA_KINDS, media_service.media_store = saved_kinds, saved_store
+        media_service.shutdown_image_pool()
@@ -0,0 +1,148 @@
+"""Check the indexed in-memory alert store against an unindexed filter over the same alerts.
+Run with: python tools/test_alert_store.py  (or pytest tools/test_alert_store.py)
+"""
+import os
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.alert_store import AlertStore, parse_timestamp
+
+STATUSES = ['pending', 'assigned', 'en_route', 'resolved', 'done', 'cancelled', None]
+USERS = ['u1', 'u2', 'u3', 7, None]
+BASE = datetime(2026, 5, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def random_time(rng):
+    moment = BASE + timedelta(minutes=rng.randint(-600, 600))
+    # the shapes the JSON store and the DB rows hand us
+    return rng.choice([
+        moment.isoformat(),
+        moment.replace(tzinfo=None).isoformat(),
+        moment.isoformat().replace('+00:00', 'Z'),
+        moment.astimezone(timezone(timedelta(hours=5, minutes=30))).isoformat(),
+        moment,
+        None,
+        'not a date',
+    ])
+
+
+def random_alert(rng, alert_id):
+    alert = {'id': alert_id, 'status': rng.choice(STATUSES), 'user_id': rng.choice(USERS)}
+    field = rng.choice(['resolved_at', 'marked_done_at', None])
+    if field:
+        alert[field] = random_time(rng)
+    return alert
+
+
+def resolved_ts(alert):
+    return parse_timestamp(alert.get('resolved_at') or alert.get('marked_done_at'))
+
+
+def scan_resolved_since(alerts, cutoff, user_id=None, statuses=('resolved', 'done')):
+    threshold = parse_timestamp(cutoff)
+    hits = [(resolved_ts(a), i) for i, a in alerts.items()
+            if resolved_ts(a) is not None and resolved_ts(a) >= threshold and a.get('status') in statuses
+            and (user_id is None or (a.get('user_id') is not None and str(a['user_id']) == str(user_id)))]
+    return [i for _, i in sorted(hits, reverse=True)]
+
+
+def scan_resolved_before(alerts, cutoff, statuses=('resolved', 'done')):
+    threshold = parse_timestamp(cutoff)
+    hits = [(resolved_ts(a), i) for i, a in alerts.items()
+            if resolved_ts(a) is not None and resolved_ts(a) < threshold and a.get('status') in statuses]
+    return [i for _, i in sorted(hits)]
+
+
+def check(store, alerts, rng):
+    assert len(store) == len(alerts) and store.to_dict() == alerts
+    for _ in range(5):
+        statuses = rng.sample(STATUSES, rng.randint(1, 3))
+        assert sorted(a['id'] for a in store.by_status(statuses)) == \
+            sorted(i for i, a in alerts.items() if a.get('status') in statuses)
+        user = rng.choice(USERS[:-1])
+        scoped = rng.choice([None, ['pending', 'assigned']])
+        assert sorted(a['id'] for a in store.by_user(user, scoped)) == \
+            sorted(i for i, a in alerts.items() if a.get('user_id') is not None and str(a['user_id']) == str(user)
+                   and (scoped is None or a.get('status') in scoped))
+        cutoff = BASE + timedelta(minutes=rng.randint(-700, 700))
+        if rng.random() < 0.5:
+            cutoff = cutoff.replace(tzinfo=None)
+        assert [a['id'] for a in store.resolved_since(cutoff)] == scan_resolved_since(alerts, cutoff)
+        assert [a['id'] for a in store.resolved_since(cutoff, user_id=user)] == scan_resolved_since(alerts, cutoff, user)
+        assert [a['id'] for a in store.resolved_since(cutoff, statuses=('cancelled',))] == \
+            scan_resolved_since(alerts, cutoff, statuses=('cancelled',))
+        assert store.resolved_before(cutoff) == scan_resolved_before(alerts, cutoff)
+
+
+def test_indexes_match_a_full_scan_through_writes():
+    rng = random.Random(9)
+    store = AlertStore()
+    alerts = {}
+    for step in range(1500):
+        op = rng.random()
+        if op < 0.5 or not alerts:
+            alert_id = f'a{rng.randint(0, 300)}'
+            alert = random_alert(rng, alert_id)
+            store.put(alert_id, alert)
+            alerts[alert_id] = alert
+        elif op < 0.8:
+            alert_id = rng.choice(sorted(alerts))
+            fields = {'status': rng.choice(STATUSES)}
+            if rng.random() < 0.5:
+                fields['resolved_at'] = random_time(rng)
+            if rng.random() < 0.2:
+                fields['user_id'] = rng.choice(USERS)
+            store.update(alert_id, **fields)
+            alerts[alert_id].update(fields)
+        else:
+            alert_id = rng.choice(sorted(alerts))
+            assert store.delete(alert_id) is alerts.pop(alert_id)
+        if step % 100 == 0:
+            check(store, alerts, rng)
+    check(store, alerts, rng)
+    assert store.update('missing', status='done') is None and store.delete('missing') is None
+
+
+def test_load_rebuilds_the_same_indexes():
+    rng = random.Random(10)
+    alerts = {f'a{i}': random_alert(rng, f'a{i}') for i in range(400)}
+    store = AlertStore()
+    store.put('stale', {'id': 'stale', 'status': 'resolved', 'resolved_at': BASE.isoformat()})
+    store.load(alerts)
+    assert 'stale' not in store
+    check(store, alerts, rng)
+
+
+def test_writes_reach_the_journal():
+    class Journal:
+        def __init__(self):
+            self.ops = []
+
+        def put(self, alert_id, alert):
+            self.ops.append(('put', alert_id, dict(alert)))
+
+        def delete(self, alert_id):
+            self.ops.append(('delete', alert_id))
+
+    journal = Journal()
+    store = AlertStore(journal=journal)
+    store.put('a1', {'id': 'a1', 'status': 'pending'})
+    store.update('a1', status='resolved')
+    store.delete('a1')
+    store.load({'a2': {'id': 'a2'}})  # replays are not journaled again
+    assert journal.ops == [('put', 'a1', {'id': 'a1', 'status': 'pending'}),
+                           ('put', 'a1', {'id': 'a1', 'status': 'resolved'}), ('delete', 'a1')]
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("TESTING ALERT STORE")
+    print("=" * 60)
+    for name, fn in list(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            fn()
+            print(f"   ✓ {name}")
+    print("=" * 60)
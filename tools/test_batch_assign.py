@@ -0,0 +1,114 @@
+"""Exercise the batch auto-assignment solver and batcher.
+Run with: python tools/test_batch_assign.py  (or pytest tools/test_batch_assign.py)
+"""
+import asyncio
+import itertools
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.batch_assign import AssignmentBatcher, candidate_eta_matrix, plan_assignments, solve_assignment
+
+
+def brute_force(cost):
+    n, m = cost.shape
+    k = min(n, m)
+    return min(sum(cost[i, j] for i, j in zip(rows, cols))
+               for rows in itertools.combinations(range(n), k) for cols in itertools.permutations(range(m), k))
+
+
+def test_solver_matches_brute_force():
+    rng = np.random.default_rng(3)
+    for _ in range(200):
+        cost = rng.integers(0, 50, (int(rng.integers(1, 6)), int(rng.integers(1, 6)))).astype(float)
+        rows, cols = solve_assignment(cost)
+        assert len(rows) == min(cost.shape)
+        assert len(set(rows)) == len(rows) and len(set(cols)) == len(cols)
+        assert cost[rows, cols].sum() == brute_force(cost)
+
+
+def test_batch_does_not_share_the_nearest_responder():
+    # both alerts are closest to r0; greedy would give it to both
+    etas = [[60, 600], [90, 100]]
+    assert plan_assignments(etas, [3, 3]) == [(0, 0), (1, 1)]
+
+
+def test_short_supply_leaves_low_severity_unassigned():
+    etas = [[300], [900], [600]]
+    assert plan_assignments(etas, [1, 5, 2]) == [(1, 0)]
+    # responders outside an alert's candidates are never assigned to it
+    assert plan_assignments([[np.inf, 50], [np.inf, 40]], [5, 1]) == [(0, 1)]
+
+
+def test_candidate_matrix_marks_non_candidates():
+    r0 = {'id': 'r0', 'last_location': {'lat': 12.97, 'lng': 77.59}}
+    r1 = {'id': 'r1', 'last_location': {'lat': 12.99, 'lng': 77.60}}
+    locs = [{'lat': 12.971, 'lng': 77.591}, {'lat': 12.98, 'lng': 77.60}]
+    responders, etas = asyncio.run(candidate_eta_matrix(locs, [[r0, r1], [r1]]))
+    assert [r['id'] for r in responders] == ['r0', 'r1']
+    assert np.isfinite(etas[0]).all()
+    assert np.isinf(etas[1, 0]) and np.isfinite(etas[1, 1])
+
+
+def test_batcher_collects_alerts_within_window():
+    async def scenario():
+        batches = []
+
+        async def solve(alerts):
+            batches.append(sorted(a['id'] for a in alerts))
+
+        batcher = AssignmentBatcher(solve, window=0.05, max_batch=3)
+        await batcher.submit({'id': 'a1'})
+        await batcher.submit({'id': 'a2'})
+        await asyncio.sleep(0.1)
+        assert batches == [['a1', 'a2']]
+        # a full batch is solved without waiting for the window
+        for alert_id in ('a3', 'a4', 'a5'):
+            await batcher.submit({'id': alert_id})
+        assert batches[-1] == ['a3', 'a4', 'a5']
+        assert batcher.stats()['batches'] == 2
+
+    asyncio.run(scenario())
+
+
+def test_registry_reload_is_single_flight_and_rate_limited():
+    from backend import app as app_module
+
+    queries = []
+
+    class Responders:
+        async def fetch_all(self, query):
+            queries.append(query)
+            await asyncio.sleep(0.01)
+            return [{'id': 'cold1', 'status': 'available', 'responder_type': 'volunteer',
+                     'last_location': {'lat': 12.9, 'lng': 77.6}}]
+
+    async def scenario():
+        # a batch of rural alerts all missing candidates at once
+        loaded = await asyncio.gather(*(app_module.refresh_responder_registry() for _ in range(10)))
+        assert loaded == [1] * 10 and len(queries) == 1
+        # and again within RESPONDER_RELOAD_INTERVAL: no query
+        assert await app_module.refresh_responder_registry() == 0
+        assert len(queries) == 1
+
+    saved = app_module.database, app_module._registry_reload, app_module._registry_loaded_at
+    app_module.database, app_module._registry_reload, app_module._registry_loaded_at = Responders(), None, None
+    try:
+        asyncio.run(scenario())
+    finally:
+        app_module.database, app_module._registry_reload, app_module._registry_loaded_at = saved
+        app_module.responder_registry.remove('cold1')
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("TESTING BATCH AUTO-ASSIGN")
+    print("=" * 60)
+    for name, fn in list(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            fn()
+            print(f"   ✓ {name}")
+    print("=" * 60)
@@ -0,0 +1,136 @@
+"""Exercise the websocket fan-out: per-client queues, slow-client policies and eviction.
+Run with: python tools/test_broadcaster.py  (or pytest tools/test_broadcaster.py)
+"""
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.broadcaster import Broadcaster, POLICY_DISCONNECT
+
+
+class FakeSocket:
+    """Records sent text; sends wait on `gate` so a test can hold the writer."""
+
+    def __init__(self, hang=False):
+        self.sent = []
+        self.closed_with = None
+        self.gate = asyncio.Event()
+        if not hang:
+            self.gate.set()
+
+    async def send_text(self, text):
+        await self.gate.wait()
+        self.sent.append(text)
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+def test_fan_out_keeps_order_per_client():
+    async def scenario():
+        broadcaster = Broadcaster()
+        sockets = [FakeSocket(), FakeSocket()]
+        for ws in sockets:
+            broadcaster.register(ws)
+        texts = [broadcaster.publish({'type': 'new_alert', 'n': i}, key=f'a{i}') for i in range(3)]
+        await asyncio.sleep(0.01)
+        assert [json.loads(t)['n'] for t in texts] == [0, 1, 2]
+        assert sockets[0].sent == sockets[1].sent == texts
+        await broadcaster.close()
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_coalesces_by_alert_then_drops_oldest():
+    async def scenario():
+        broadcaster = Broadcaster(queue_size=2)
+        ws = FakeSocket(hang=True)
+        client = broadcaster.register(ws)
+        await asyncio.sleep(0)
+        first = broadcaster.publish({'id': 'a1', 'v': 1}, key='a1')
+        await asyncio.sleep(0)  # the writer takes it and blocks on the socket
+        broadcaster.publish({'id': 'a2', 'v': 1}, key='a2')
+        broadcaster.publish({'id': 'a1', 'v': 2}, key='a1')
+        latest = broadcaster.publish({'id': 'a1', 'v': 3}, key='a1')  # replaces v2 in place
+        other = broadcaster.publish({'id': 'a3', 'v': 1}, key='a3')   # drops a2, the oldest
+        assert client.dropped == 2
+        ws.gate.set()
+        await asyncio.sleep(0.01)
+        assert ws.sent == [first, latest, other]
+        await broadcaster.close()
+
+    asyncio.run(scenario())
+
+
+def test_disconnect_policy_closes_slow_client():
+    async def scenario():
+        broadcaster = Broadcaster(queue_size=1, policy=POLICY_DISCONNECT)
+        ws = FakeSocket(hang=True)
+        client = broadcaster.register(ws)
+        await asyncio.sleep(0)
+        for i in range(3):
+            broadcaster.publish({'n': i})
+        await asyncio.sleep(0.01)
+        assert client.closed and ws.closed_with == 1013 and client.dropped == 1
+        assert len(broadcaster) == 0 and ws.sent == []
+
+    asyncio.run(scenario())
+
+
+def test_send_timeout_evicts_and_closes_the_socket():
+    async def scenario():
+        broadcaster = Broadcaster(send_timeout=0.02)
+        stuck, healthy = FakeSocket(hang=True), FakeSocket()
+        broadcaster.register(stuck)
+        broadcaster.register(healthy)
+        broadcaster.publish({'n': 1})
+        await asyncio.sleep(0.1)
+        assert stuck.closed_with == 1011
+        assert len(broadcaster) == 1 and broadcaster.stats()['subscriptions']['all'] == 1
+        # later messages only reach the remaining client
+        assert broadcaster.publish_text('{"n": 2}') == 1
+        await asyncio.sleep(0.01)
+        assert len(healthy.sent) == 2 and stuck.sent == []
+        await broadcaster.close()
+
+    asyncio.run(scenario())
+
+
+def test_redis_envelope_is_valid_json():
+    from backend import app as app_module
+
+    published = []
+
+    async def capture(channel, payload):
+        published.append((channel, payload))
+
+    async def scenario():
+        message = {'type': 'status_update', 'alert_id': 'a"1', 'note': 'ambulance → gate 2'}
+        await app_module.publish_message(message, key='a"1', route={'status': 'assigned'})
+
+    saved = app_module.publish
+    app_module.publish = capture
+    try:
+        asyncio.run(scenario())
+    finally:
+        app_module.publish = saved
+    channel, payload = published[0]
+    envelope = json.loads(payload)
+    assert channel == 'alerts'
+    assert envelope['origin'] == app_module.INSTANCE_ID and envelope['key'] == 'a"1'
+    assert envelope['route'] == {'status': 'assigned'}
+    assert envelope['message']['note'] == 'ambulance → gate 2'
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("TESTING BROADCASTER")
+    print("=" * 60)
+    for name, fn in list(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            fn()
+            print(f"   ✓ {name}")
+    print("=" * 60)
@@ -0,0 +1,85 @@
+"""Exercise category-required responder types and the per-tag registry index.
+Run with: python tools/test_candidate_prefilter.py  (or pytest tools/test_candidate_prefilter.py)
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.alert_categories import AlertCategories
+from backend.responder_registry import ResponderRegistry
+
+
+def responder(rid, rtype, lat, capabilities=None):
+    return {'id': rid, 'status': 'available', 'responder_type': rtype, 'capabilities': capabilities or [],
+            'last_location': {'lat': lat, 'lng': 77.59}}
+
+
+def test_categories_map_alert_types_to_responder_types():
+    categories = AlertCategories()
+    assert categories.required_responder_types({'type': 'fire'}) == ['firefighter']
+    assert categories.required_responder_types({'type': 'Medical'}) == ['paramedic', 'doctor']
+    assert categories.required_responder_types({'type': 'unknown'}) == []
+    assert categories.for_alert({'type': 'fire'})['response_time_target'] == 8
+
+
+def test_categories_refresh_from_database_rows():
+    class Rows:
+        async def fetch_all(self, query):
+            return [{'id': 'c1', 'name': 'Fire Emergency', 'severity_level': 5, 'response_time_target': 6,
+                     'auto_escalate_after': 12, 'required_responder_types': '["firefighter", "Rescue"]'}]
+
+    categories = AlertCategories()
+    assert asyncio.run(categories.refresh(Rows())) == 1
+    assert categories.required_responder_types({'type': 'fire'}) == ['firefighter', 'rescue']
+    assert categories.for_alert({'type': 'medical', 'category_id': 'c1'})['name'] == 'Fire Emergency'
+    # categories not in the table no longer match
+    assert categories.required_responder_types({'type': 'medical'}) == []
+
+
+def test_nearest_by_tag_matches_type_or_capability():
+    registry = ResponderRegistry()
+    registry.upsert(responder('v1', 'volunteer', 12.970))
+    registry.upsert(responder('f1', 'firefighter', 12.990))
+    registry.upsert(responder('v2', 'volunteer', 12.980, capabilities='["Firefighter", "first-aid"]'))
+    registry.upsert(responder('p1', 'police', 12.975))
+    found = [r['id'] for r, _ in registry.nearest(12.970, 77.59, k=5, tags=['firefighter'])]
+    assert found == ['v2', 'f1']
+    found = [r['id'] for r, _ in registry.nearest(12.970, 77.59, k=5, tags=['firefighter', 'first-aid', 'police'])]
+    assert found == ['p1', 'v2', 'f1']
+    assert registry.nearest(12.970, 77.59, k=5, tags=['doctor']) == []
+    assert registry.available_count(['firefighter']) == 2
+
+    # busy and removed responders leave the tag indexes too
+    registry.set_status('v2', 'busy')
+    registry.remove('f1')
+    assert registry.nearest(12.970, 77.59, k=5, tags=['firefighter']) == []
+    assert registry.available_count(['firefighter']) == 0
+    registry.set_status('v2', 'available')
+    assert [r['id'] for r, _ in registry.nearest(12.970, 77.59, k=5, tags=['first-aid'])] == ['v2']
+
+
+def test_tagged_ring_walk_matches_full_scan():
+    registry = ResponderRegistry()
+    types = ['volunteer', 'police', 'firefighter', 'doctor']
+    for i in range(400):
+        registry.upsert(responder(f'r{i}', types[i % 4], 12.9 + (i * 37 % 400) / 2000.0,
+                                  capabilities=['first-aid'] if i % 7 == 0 else []))
+    for tags in (['firefighter'], ['doctor', 'first-aid']):
+        found = [r['id'] for r, _ in registry.nearest(13.0003, 77.59, k=15, tags=tags)]
+        assert len(found) == len(set(found)) == 15
+        expected = [r['id'] for r, _ in registry.nearest(13.0003, 77.59, k=400)
+                    if ({r['responder_type']} | set(r['capabilities'])) & set(tags)][:15]
+        assert found == expected
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("TESTING CANDIDATE PREFILTER")
+    print("=" * 60)
+    for name, fn in list(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            fn()
+            print(f"   ✓ {name}")
+    print("=" * 60)
@@ -0,0 +1,112 @@
+"""Exercise the alert change feed: merging, cursor resets and cursors shared across instances.
+Run with: python tools/test_change_feed.py  (or pytest tools/test_change_feed.py)
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from backend import redis_client as redis_client_module
+from backend.change_feed import ChangeFeed, RECORD_SCRIPT, READ_SCRIPT, OP_UPSERT, OP_PATCH, OP_DELETE
+
+
+class ScriptedRedis:
+    """The two change-feed scripts over plain dicts, run atomically like Redis runs them."""
+
+    def __init__(self):
+        self.strings = {}
+        self.zsets = {}
+
+    async def eval(self, script, numkeys, *args):
+        epoch_key, seq_key, log_key = args[:numkeys]
+        argv = [str(a) for a in args[numkeys:]]
+        self.strings.setdefault(epoch_key, argv[0])
+        log = self.zsets.setdefault(log_key, {})
+        if script == RECORD_SCRIPT:
+            seq = int(self.strings.get(seq_key, 0)) + 1
+            self.strings[seq_key] = str(seq)
+            log[f'{seq}:{argv[1]}'] = seq
+            for member in sorted(log, key=log.get)[:-int(argv[2])]:
+                del log[member]
+            return [self.strings[epoch_key].encode(), seq]
+        assert script == READ_SCRIPT
+        ordered = sorted(log, key=log.get)
+        entries = [m.encode() for m in ordered if argv[1] != '' and log[m] > int(argv[1])]
+        oldest = str(log[ordered[0]]).encode() if ordered else b''
+        return [self.strings[epoch_key].encode(), self.strings.get(seq_key, '0').encode(), oldest, entries]
+
+
+def run_with_redis(redis, coro):
+    previous = redis_client_module.redis
+    redis_client_module.redis = redis
+    try:
+        return asyncio.run(coro)
+    finally:
+        redis_client_module.redis = previous
+
+
+def test_local_feed_merges_changes_per_alert():
+    async def scenario():
+        feed = ChangeFeed()
+        _, start = await feed.since(None)
+        await feed.record(OP_UPSERT, 'a1', {'status': 'pending', 'type': 'fire'})
+        await feed.record(OP_PATCH, 'a1', {'status': 'assigned'})
+        await feed.record(OP_UPSERT, 'a2', {'status': 'pending'})
+        await feed.record(OP_DELETE, 'a2')
+        changes, cursor = await feed.since(start)
+        assert [(c['id'], c['op']) for c in changes] == [('a1', OP_UPSERT), ('a2', OP_DELETE)]
+        assert changes[0]['alert'] == {'status': 'assigned', 'type': 'fire'}
+        assert await feed.since(cursor) == ([], cursor)
+        # unknown epochs and cursors past the head ask for a reload
+        assert (await feed.since('other:1'))[0] is None
+        assert (await feed.since(cursor[:-1] + '9'))[0] is None
+
+    run_with_redis(None, scenario())
+
+
+def test_trimmed_cursor_asks_for_reload():
+    async def scenario():
+        feed = ChangeFeed(max_entries=2)
+        _, start = await feed.since(None)
+        for i in range(3):
+            await feed.record(OP_UPSERT, f'a{i}', {})
+        assert (await feed.since(start))[0] is None
+
+    run_with_redis(None, scenario())
+    redis = ScriptedRedis()
+    run_with_redis(redis, scenario())
+
+
+def test_cursor_from_one_instance_reads_on_another():
+    redis = ScriptedRedis()
+
+    async def scenario():
+        # two workers (or instances behind a load balancer) sharing one Redis
+        first, second = ChangeFeed(), ChangeFeed()
+        _, start = await first.since(None)
+        await first.record(OP_UPSERT, 'a1', {'status': 'pending'})
+        await second.record(OP_PATCH, 'a1', {'status': 'assigned'})
+        await second.record(OP_UPSERT, 'a2', {'status': 'pending'})
+        changes, cursor = await second.since(start)
+        assert [(c['id'], c['op']) for c in changes] == [('a1', OP_UPSERT), ('a2', OP_UPSERT)]
+        assert changes[0]['alert'] == {'status': 'assigned'}
+        # the cursor handed out by the second instance is current on the first
+        assert await first.since(cursor) == ([], cursor)
+        await first.record(OP_DELETE, 'a1')
+        changes, _ = await second.since(cursor)
+        assert [(c['id'], c['op']) for c in changes] == [('a1', OP_DELETE)]
+        assert first.stats()['local_records'] == second.stats()['local_records'] == 0
+
+    run_with_redis(redis, scenario())
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("TESTING CHANGE FEED")
+    print("=" * 60)
+    for name, fn in list(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            fn()
+            print(f"   ✓ {name}")
+    print("=" * 60)
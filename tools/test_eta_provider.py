@@ -0,0 +1,313 @@
+"""Exercise the async ETA provider against a local stand-in Directions server.
+Run with: python tools/test_eta_provider.py  (or pytest tools/test_eta_provider.py)
+"""
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from backend import eta_provider as eta_provider_module
+from backend.eta_provider import EtaProvider, DirectionsBackend, GoogleDirectionsBackend, fallback_eta_seconds
+from backend.eta_cache import TTLCache, eta_key
+
+ROUTE_SECONDS = 321
+SERVER_DELAY = 0.2
+
+
+class StandInDirections(BaseHTTPRequestHandler):
+    """Answers /directions/json and /distancematrix/json with fixed durations after a short delay."""
+    lock = threading.Lock()
+    requests = 0
+    active = 0
+    max_active = 0
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.requests += 1
+            cls.active += 1
+            cls.max_active = max(cls.max_active, cls.active)
+        time.sleep(SERVER_DELAY)
+        url = urlparse(self.path)
+        if url.path.endswith('/distancematrix/json'):
+            origins = parse_qs(url.query)['origins'][0].split('|')
+            element = {'status': 'OK', 'duration': {'value': ROUTE_SECONDS}}
+            body = json.dumps({'rows': [{'elements': [element]} for _ in origins]}).encode()
+        else:
+            body = json.dumps({'routes': [{'legs': [{'duration': {'value': ROUTE_SECONDS}}]}]}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        with cls.lock:
+            cls.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+    @classmethod
+    def reset(cls):
+        cls.requests = 0
+        cls.active = 0
+        cls.max_active = 0
+
+
+def start_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInDirections)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_identical_lookups_are_coalesced():
+    server, url = start_server()
+    StandInDirections.reset()
+
+    async def scenario():
+        provider = EtaProvider(GoogleDirectionsBackend(None, url), max_concurrency=4)
+        origin = {'lat': 10.001, 'lng': 20.001}
+        dest = {'lat': 10.101, 'lng': 20.101}
+        results = await asyncio.gather(*[provider.eta_seconds(origin, dest) for _ in range(50)])
+        await provider.close()
+        return results
+
+    results = run(scenario())
+    server.shutdown()
+    assert results == [ROUTE_SECONDS] * 50
+    assert StandInDirections.requests == 1
+
+
+def test_concurrency_is_capped():
+    server, url = start_server()
+    StandInDirections.reset()
+
+    async def scenario():
+        provider = EtaProvider(GoogleDirectionsBackend(None, url), max_concurrency=3)
+        dest = {'lat': 11.5, 'lng': 21.5}
+        origins = [{'lat': 11.0 + i * 0.01, 'lng': 21.0} for i in range(12)]
+        results = await asyncio.gather(*[provider.eta_seconds(o, dest) for o in origins])
+        await provider.close()
+        return results
+
+    results = run(scenario())
+    server.shutdown()
+    assert results == [ROUTE_SECONDS] * 12
+    assert StandInDirections.requests == 12
+    assert StandInDirections.max_active <= 3
+
+
+def test_event_loop_keeps_running_during_lookups():
+    server, url = start_server()
+    StandInDirections.reset()
+
+    async def scenario():
+        provider = EtaProvider(GoogleDirectionsBackend(None, url), max_concurrency=2)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        tick_task = asyncio.ensure_future(ticker())
+        await provider.eta_seconds({'lat': 12.0, 'lng': 22.0}, {'lat': 12.2, 'lng': 22.2})
+        tick_task.cancel()
+        await provider.close()
+        return ticks
+
+    ticks = run(scenario())
+    server.shutdown()
+    # a blocking client would freeze the loop for the whole SERVER_DELAY
+    assert ticks >= 10
+
+
+def test_unreachable_server_falls_back_to_straight_line():
+    async def scenario():
+        provider = EtaProvider(GoogleDirectionsBackend(None, 'http://127.0.0.1:9'), timeout=0.5)
+        eta = await provider.eta_seconds({'lat': 13.0, 'lng': 23.0}, {'lat': 13.1, 'lng': 23.0})
+        await provider.close()
+        return eta
+
+    eta = run(scenario())
+    # ~11.1 km at the 40 km/h fallback speed
+    assert 950 < eta < 1050
+
+
+class CountingBackend(DirectionsBackend):
+    """Fake provider: counts round trips and fails the origins listed in `unroutable`."""
+
+    def __init__(self, unroutable=()):
+        self.round_trips = 0
+        self.unroutable = set(unroutable)
+
+    async def route_seconds(self, client, origin, dest):
+        self.round_trips += 1
+        return None if origin['lat'] in self.unroutable else 600
+
+    async def matrix_seconds(self, client, origins, dest):
+        self.round_trips += 1
+        return [None if o['lat'] in self.unroutable else 600 for o in origins]
+
+
+def candidate_origins(base_lat, n=20):
+    return [{'lat': base_lat + i * 0.001, 'lng': 30.0} for i in range(n)]
+
+
+def test_matrix_uses_one_round_trip_per_alert():
+    async def scenario():
+        dest = {'lat': 14.5, 'lng': 30.5}
+        per_pair = CountingBackend()
+        provider = EtaProvider(per_pair)
+        await asyncio.gather(*[provider.eta_seconds(o, dest) for o in candidate_origins(14.0)])
+
+        batched = CountingBackend()
+        provider = EtaProvider(batched)
+        etas = await provider.eta_matrix(candidate_origins(15.0), dest)
+        # second call is served from the cache it just filled
+        again = await provider.eta_matrix(candidate_origins(15.0), dest)
+        return per_pair.round_trips, batched.round_trips, etas, again
+
+    per_pair, batched, etas, again = run(scenario())
+    assert per_pair == 20
+    assert batched == 1
+    assert etas == [600] * 20 and again == etas
+
+
+def test_matrix_request_against_stand_in_server():
+    server, url = start_server()
+    StandInDirections.reset()
+
+    async def scenario():
+        provider = EtaProvider(GoogleDirectionsBackend(None, url))
+        etas = await provider.eta_matrix(candidate_origins(17.0), {'lat': 17.5, 'lng': 30.5})
+        await provider.close()
+        return etas
+
+    etas = run(scenario())
+    server.shutdown()
+    assert etas == [ROUTE_SECONDS] * 20
+    assert StandInDirections.requests == 1
+
+
+def test_matrix_failed_pairs_fall_back_to_haversine():
+    async def scenario():
+        origins = candidate_origins(16.0, n=5)
+        dest = {'lat': 16.5, 'lng': 30.5}
+        backend = CountingBackend(unroutable={origins[1]['lat'], origins[3]['lat']})
+        etas = await EtaProvider(backend).eta_matrix(origins, dest)
+        return origins, dest, etas
+
+    origins, dest, etas = run(scenario())
+    assert etas[0] == etas[2] == etas[4] == 600
+    assert etas[1] == fallback_eta_seconds(origins[1], dest)
+    assert etas[3] == fallback_eta_seconds(origins[3], dest)
+
+
+def test_fallback_etas_are_not_kept_for_the_full_ttl():
+    async def scenario():
+        origins = candidate_origins(18.0, n=3)
+        dest = {'lat': 18.5, 'lng': 30.5}
+        backend = CountingBackend(unroutable={o['lat'] for o in origins})
+        provider = EtaProvider(backend, fallback_ttl=0)
+        first = await provider.eta_matrix(origins, dest)
+        single = await provider.eta_seconds(origins[0], dest)
+        # the provider recovers: the next lookups ask it again instead of reusing the estimate
+        backend.unroutable.clear()
+        return first, single, await provider.eta_matrix(origins, dest), await provider.eta_seconds(origins[0], dest), backend.round_trips
+
+    first, single, recovered, single_recovered, round_trips = run(scenario())
+    assert first == [fallback_eta_seconds(o, {'lat': 18.5, 'lng': 30.5}) for o in candidate_origins(18.0, n=3)]
+    assert single == first[0]
+    assert recovered == [600] * 3 and single_recovered == 600
+    assert round_trips == 3
+
+
+def test_failing_cache_falls_back_to_straight_line():
+    async def broken_cache(*args, **kwargs):
+        raise RuntimeError('cache unavailable')
+
+    async def scenario():
+        provider = EtaProvider(CountingBackend())
+        return await provider.eta_seconds(origin, dest)
+
+    origin, dest = {'lat': 19.0, 'lng': 30.0}, {'lat': 19.5, 'lng': 30.5}
+    saved = eta_provider_module.get_cached_redis
+    eta_provider_module.get_cached_redis = broken_cache
+    try:
+        eta = run(scenario())
+    finally:
+        eta_provider_module.get_cached_redis = saved
+    assert eta == fallback_eta_seconds(origin, dest)
+
+
+def test_backend_must_implement_route_seconds():
+    class Incomplete(DirectionsBackend):
+        pass
+
+    try:
+        Incomplete()
+    except TypeError:
+        pass
+    else:
+        raise AssertionError('a backend without route_seconds was instantiated')
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_is_bounded_lru():
+    cache = TTLCache(max_entries=3, ttl=60, clock=FakeClock())
+    for key in 'abc':
+        cache.set(key, 1)
+    cache.get('a')  # 'b' becomes least recently used
+    cache.set('d', 1)
+    assert len(cache) == 3
+    assert cache.get('b') is None and cache.get('a') == 1
+    assert cache.stats()['evictions'] == 1
+
+
+def test_cache_entries_expire():
+    clock = FakeClock()
+    cache = TTLCache(max_entries=10, ttl=60, clock=clock)
+    cache.set('a', 5)
+    clock.now = 30
+    assert cache.get('a') == 5
+    clock.now = 61
+    cache.set('b', 6)  # expired entries at the cold end are purged on write
+    assert len(cache) == 1
+    assert cache.get('a') is None
+    stats = cache.stats()
+    assert stats['hits'] == 1 and stats['misses'] == 1 and stats['expirations'] == 1
+
+
+def test_nearby_coordinates_share_a_key():
+    dest = {'lat': 28.6139, 'lng': 77.2090}
+    assert eta_key({'lat': 28.700001, 'lng': 77.100002}, dest) == eta_key({'lat': 28.700003, 'lng': 77.099998}, dest)
+    assert eta_key({'lat': 28.7001, 'lng': 77.1}, dest) != eta_key({'lat': 28.7003, 'lng': 77.1}, dest)
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("TESTING ASYNC ETA PROVIDER")
+    print("=" * 60)
+    for name, fn in list(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            fn()
+            print(f"   ✓ {name}")
+    print("=" * 60)
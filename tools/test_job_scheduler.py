@@ -0,0 +1,154 @@
+"""Exercise the deferred job scheduler (in memory, and against a scripted stand-in for Redis).
+Run with: python tools/test_job_scheduler.py  (or pytest tools/test_job_scheduler.py)
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.job_scheduler import JobScheduler, SCHEDULE_SCRIPT, CLAIM_SCRIPT
+
+
+def test_jobs_run_in_deadline_order():
+    async def scenario():
+        ran = []
+
+        async def handler(key, payload):
+            ran.append((key, payload.get('n')))
+
+        scheduler = JobScheduler()
+        scheduler.register('auto_assign', handler)
+        await scheduler.start()
+        await scheduler.schedule('auto_assign', 'late', delay=0.3, payload={'n': 2})
+        # an earlier deadline than the one being slept on wakes the scheduler
+        await scheduler.schedule('auto_assign', 'early', delay=0.05, payload={'n': 1})
+        await asyncio.sleep(0.15)
+        assert ran == [('early', 1)]
+        await asyncio.sleep(0.3)
+        assert ran == [('early', 1), ('late', 2)]
+        assert scheduler.stats()['dispatched'] == 2
+        assert scheduler.stats()['scheduled'] == 0
+        await scheduler.stop()
+
+    asyncio.run(scenario())
+
+
+def test_rescheduling_replaces_the_pending_job():
+    async def scenario():
+        ran = []
+
+        async def handler(key, payload):
+            ran.append((key, time.monotonic()))
+
+        scheduler = JobScheduler()
+        scheduler.register('auto_assign', handler)
+        await scheduler.start()
+        start = time.monotonic()
+        await scheduler.schedule('auto_assign', 'a1', delay=5)
+        await scheduler.schedule('auto_assign', 'a1', delay=0.05)
+        # replace=False keeps the existing run time
+        await scheduler.schedule('auto_assign', 'a1', delay=5, replace=False)
+        await asyncio.sleep(0.2)
+        assert [key for key, _ in ran] == ['a1']
+        assert ran[0][1] - start < 0.2
+        assert scheduler.stats()['scheduled'] == 0
+        await scheduler.stop()
+
+    asyncio.run(scenario())
+
+
+def test_cancel_and_failing_handlers():
+    async def scenario():
+        ran = []
+
+        async def handler(key, payload):
+            if key == 'boom':
+                raise RuntimeError('handler failed')
+            ran.append(key)
+
+        scheduler = JobScheduler()
+        scheduler.register('auto_assign', handler)
+        await scheduler.schedule('auto_assign', 'boom', delay=0)
+        await scheduler.schedule('auto_assign', 'cancelled', delay=0.05)
+        await scheduler.schedule('auto_assign', 'ok', delay=0.05)
+        await scheduler.cancel('auto_assign', 'cancelled')
+        # jobs scheduled before start run once it starts
+        await scheduler.start()
+        await asyncio.sleep(0.15)
+        assert ran == ['ok']
+        await scheduler.stop()
+
+    asyncio.run(scenario())
+
+
+class ScriptedRedis:
+    """The scheduler's Redis commands over plain dicts, scripts run atomically like Redis runs them."""
+
+    def __init__(self):
+        self.zset = {}
+        self.hash = {}
+
+    async def ping(self):
+        return True
+
+    async def eval(self, script, numkeys, *args):
+        jid, argv = args[numkeys], [str(a) for a in args[numkeys + 1:]]
+        if script == SCHEDULE_SCRIPT:
+            if argv[1] == '0' and jid in self.zset:
+                return 0
+            self.zset[jid] = float(argv[0])
+            self.hash[jid] = argv[2]
+            return 1
+        assert script == CLAIM_SCRIPT
+        if jid not in self.zset or self.zset[jid] > float(argv[0]):
+            return None
+        del self.zset[jid]
+        return self.hash.pop(jid, '').encode()
+
+    async def zrangebyscore(self, key, low, high, start=0, num=None, withscores=False):
+        rows = sorted((score, jid) for jid, score in self.zset.items() if score <= high)
+        return [(jid.encode(), score) for score, jid in rows[start:start + num]]
+
+
+def test_kept_job_keeps_its_payload_across_instances():
+    redis = ScriptedRedis()
+
+    async def scenario():
+        ran = []
+
+        async def handler(key, payload):
+            ran.append((key, payload))
+
+        first, second = JobScheduler(poll_interval=0.02), JobScheduler(poll_interval=0.02)
+        await first.start(redis)
+        await second.start(redis)
+        second.register('escalation', handler)
+        run_at = time.time() + 0.1
+        await first.schedule('escalation', 'a1', run_at=run_at, payload={'level': 1})
+        # e.g. a restarting instance rebuilding its timers with a stale level
+        await second.schedule('escalation', 'a1', run_at=time.time(), payload={'level': 3}, replace=False)
+        assert redis.zset['escalation:a1'] == run_at
+        await first.stop()
+        await asyncio.sleep(0.25)
+        assert ran == [('a1', {'level': 1})]
+        # replacing rewrites both
+        await second.schedule('escalation', 'a2', delay=5, payload={'level': 1})
+        await second.schedule('escalation', 'a2', delay=0, payload={'level': 2})
+        await asyncio.sleep(0.1)
+        assert ran[-1] == ('a2', {'level': 2})
+        await second.stop()
+
+    asyncio.run(scenario())
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("TESTING JOB SCHEDULER")
+    print("=" * 60)
+    for name, fn in list(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            fn()
+            print(f"   ✓ {name}")
+    print("=" * 60)
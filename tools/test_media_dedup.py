@@ -0,0 +1,93 @@
+"""Exercise content-addressed media storage: retries, shared files and reference counts.
+Run with: python tools/test_media_dedup.py  (or pytest tools/test_media_dedup.py)
+"""
+import asyncio
+import base64
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from backend import media_service
+from media_test_helpers import scratch_media
+
+
+def stored_files(tmp):
+    return sorted(name for name in os.listdir(tmp) if not name.startswith('media.sqlite3'))
+
+
+def test_retries_and_shared_bytes_are_stored_once():
+    clip = base64.b64encode(os.urandom(4096)).decode()
+
+    def scenario(store):
+        async def uploads():
+            first = await media_service.save_audio(clip, 'a1')
+            retry = await media_service.save_audio(clip, 'a1')
+            other = await media_service.save_audio(clip, 'a2')
+            return first, retry, other
+        first, retry, other = asyncio.run(uploads())
+        assert first == retry and first['url'] == other['url']
+        assert len(store.for_alert('a1')) == 1 and len(store.for_alert('a2')) == 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with scratch_media(tmp) as store:
+            scenario(store)
+        assert len(stored_files(tmp)) == 1
+        # the file survives until the last entry referencing it is released
+        assert store.release([store.for_alert('a1')[0]['id']]) == []
+        assert len(stored_files(tmp)) == 1
+        removed = store.release([store.for_alert('a2')[0]['id']])
+        assert [size for _, size in removed] == [4096]
+        assert stored_files(tmp) == []
+
+
+def test_concurrent_retries_are_indexed_once():
+    clip = base64.b64encode(os.urandom(4096)).decode()
+    photo = base64.b64encode(os.urandom(2048)).decode()
+
+    def scenario():
+        async def uploads():
+            return (await asyncio.gather(*[media_service.save_audio(clip, 'a1') for _ in range(8)]),
+                    await asyncio.gather(*[media_service.save_photo(photo, 'a1') for _ in range(4)]))
+        return asyncio.run(uploads())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with scratch_media(tmp) as store:
+            clips, photos = scenario()
+        assert all(info == clips[0] for info in clips)
+        assert all(info['url'] == photos[0]['url'] for info in photos)
+        # one entry per file, and no temp files left behind by the losing retries
+        assert len(store.for_alert('a1')) == len(stored_files(tmp)) == 2
+        store.release(m['id'] for m in store.for_alert('a1'))
+        assert stored_files(tmp) == []
+
+
+def test_stream_upload_of_known_bytes_drops_the_temp_file():
+    photo = os.urandom(2048)
+
+    def scenario(store):
+        async def uploads():
+            first = await media_service.save_photo(base64.b64encode(photo).decode(), 'a1')
+            writer = media_service.MediaWriter('photo', 'a2', 'again.jpg')
+            await writer.write(photo)
+            return first, await writer.finish()
+        return asyncio.run(uploads())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with scratch_media(tmp) as store:
+            first, second = scenario(store)
+        assert first['url'] == second['url']
+        assert not [name for name in stored_files(tmp) if name.endswith('.part')]
+        assert len([name for name in stored_files(tmp) if not name.endswith(('_display.jpg', '_thumb.jpg'))]) == 1
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("TESTING MEDIA DEDUPLICATION")
+    print("=" * 60)
+    for name, fn in list(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            fn()
+            print(f"   ✓ {name}")
+    print("=" * 60)
@@ -0,0 +1,52 @@
+"""Exercise the heap-based media expiry scheduler.
+Run with: python tools/test_media_expiry.py  (or pytest tools/test_media_expiry.py)
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.media_expiry import MediaExpiryScheduler
+from backend.media_store import MediaStore
+from media_test_helpers import add_file
+
+
+def test_files_are_removed_at_their_deadline():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MediaStore(os.path.join(tmp, 'media.sqlite3'))
+        # already expired before start: removed by the rebuilt heap
+        _, stale = add_file(tmp, store, 'stale.jpg', time.time() - 60)
+        _, later = add_file(tmp, store, 'later.jpg', time.time() + 3600)
+
+        async def scenario():
+            scheduler = MediaExpiryScheduler(store, batch_slack=0)
+            scheduler.start()
+            await asyncio.sleep(0.1)
+            assert not os.path.exists(stale)
+            # an earlier deadline than the one being slept on wakes the scheduler
+            entry, soon = add_file(tmp, store, 'soon.jpg', time.time() + 0.2)
+            scheduler.schedule(entry['id'], time.time() + 0.2, soon, 100)
+            await asyncio.sleep(0.1)
+            assert os.path.exists(soon)
+            await asyncio.sleep(0.3)
+            assert not os.path.exists(soon)
+            assert os.path.exists(later)
+            assert scheduler.stats()['deleted_files'] == 2
+            await scheduler.stop()
+
+        asyncio.run(scenario())
+        assert [m['filename'] for m in store.for_alert('a1')] == ['later.jpg']
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("TESTING MEDIA EXPIRY SCHEDULER")
+    print("=" * 60)
+    for name, fn in list(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            fn()
+            print(f"   ✓ {name}")
+    print("=" * 60)
@@ -0,0 +1,88 @@
+"""Exercise the SQLite media metadata index: JSON migration, lookups and reference-counted release.
+Run with: python tools/test_media_store.py  (or pytest tools/test_media_store.py)
+"""
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.media_store import MediaStore
+
+
+def entry(filename, alert_id, minutes, kind='photo'):
+    now = datetime.now()
+    return {'filename': filename, 'filepath': f'/nonexistent/{filename}', 'type': kind, 'alert_id': alert_id,
+            'size': 10, 'created_at': now.isoformat(), 'expires_at': (now + timedelta(minutes=minutes)).isoformat()}
+
+
+def test_legacy_json_is_imported_once():
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = os.path.join(tmp, 'media_metadata.json')
+        with open(legacy, 'w') as f:
+            json.dump({'files': [entry('a.jpg', 'a1', 30), entry('b.webm', 'a1', 30, 'audio')]}, f)
+        db = os.path.join(tmp, 'media.sqlite3')
+        store = MediaStore(db, legacy_json=legacy)
+        assert [m['filename'] for m in store.for_alert('a1')] == ['a.jpg', 'b.webm']
+        store.release(m['id'] for m in store.for_alert('a1'))
+        store.close()
+        # a restart must not bring the deleted entries back
+        assert MediaStore(db, legacy_json=legacy).for_alert('a1') == []
+
+
+def test_lookups_schedule_and_release():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MediaStore(os.path.join(tmp, 'media.sqlite3'))
+        ids = {}
+        for name, alert_id, minutes, blob in (('old.jpg', 'a1', -5, 'x.jpg'), ('new.jpg', 'a1', 30, 'y.jpg'),
+                                              ('other.jpg', 'a2', -1, 'x.jpg')):
+            src = os.path.join(tmp, f'{name}.part')
+            with open(src, 'wb') as f:
+                f.write(b'x' * 10)
+            path = os.path.join(tmp, blob)
+            store.acquire(path, 10, blob, src)
+            ids[name] = store.add(dict(entry(name, alert_id, minutes), filepath=path))['id']
+        assert [m['filename'] for m in store.for_alert('a2')] == ['other.jpg']
+        assert [row[1] for row in store.schedule()] == [ids['old.jpg'], ids['other.jpg'], ids['new.jpg']]
+        assert sorted(store.blob_paths()) == [os.path.join(tmp, 'x.jpg'), os.path.join(tmp, 'y.jpg')]
+        # x.jpg is shared: the file goes with its last reference
+        assert store.release([ids['old.jpg']]) == []
+        assert os.path.exists(os.path.join(tmp, 'x.jpg'))
+        assert store.release([ids['other.jpg'], 'unknown']) == [(os.path.join(tmp, 'x.jpg'), 10)]
+        assert not os.path.exists(os.path.join(tmp, 'x.jpg'))
+        assert store.sizes(ids.values()) == {ids['new.jpg']: 10}
+
+
+def test_duplicate_entries_from_older_races_are_dropped_on_open():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, 'media.sqlite3')
+        path = os.path.join(tmp, 'x.jpg')
+        store = MediaStore(db)
+        # an index written before entries were unique per alert: one upload recorded twice
+        store._conn.execute('DROP INDEX idx_media_alert_file')
+        for _ in range(2):
+            src = os.path.join(tmp, 'x.part')
+            with open(src, 'wb') as f:
+                f.write(b'x' * 10)
+            store.acquire(path, 10, 'x', src)
+            store.add(dict(entry('x.jpg', 'a1', 30), filepath=path))
+        store.close()
+        store = MediaStore(db)
+        kept = store.for_alert('a1')
+        assert len(kept) == 1
+        added, new = store.index(dict(entry('x.jpg', 'a1', 30), filepath=path))
+        assert not new and added['id'] == kept[0]['id']
+        assert store.release([kept[0]['id']]) == [(path, 10)] and not os.path.exists(path)
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("TESTING MEDIA STORE")
+    print("=" * 60)
+    for name, fn in list(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            fn()
+            print(f"   ✓ {name}")
+    print("=" * 60)
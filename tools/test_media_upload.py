@@ -0,0 +1,130 @@
+"""Exercise the streaming multipart media upload: storage, size caps and bad bodies.
+Run with: python tools/test_media_upload.py  (or pytest tools/test_media_upload.py)
+"""
+import asyncio
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from backend import media_service
+from backend.media_store import MediaStore
+from backend.media_upload import receive_media_upload
+from media_test_helpers import scratch_media
+
+BOUNDARY = 'safenowtestboundary'
+CONTENT_TYPE = f'multipart/form-data; boundary={BOUNDARY}'
+
+
+def multipart_body(parts):
+    body = b''
+    for name, filename, content in parts:
+        disposition = f'form-data; name="{name}"' + (f'; filename="{filename}"' if filename else '')
+        body += f'--{BOUNDARY}\r\nContent-Disposition: {disposition}\r\n\r\n'.encode() + content + b'\r\n'
+    return body + f'--{BOUNDARY}--\r\n'.encode()
+
+
+async def chunked(body, size=1000):
+    for i in range(0, len(body), size):
+        yield body[i:i + size]
+
+
+def run_upload(tmp, body, **caps):
+    with scratch_media(tmp, **caps) as store:
+        return asyncio.run(receive_media_upload(chunked(body), CONTENT_TYPE, 'a1')), store
+
+
+def test_files_are_streamed_to_disk_and_indexed():
+    with tempfile.TemporaryDirectory() as tmp:
+        photo, audio = os.urandom(5000), os.urandom(12000)
+        body = multipart_body([('alert_note', None, b'ignored field'), ('photos', 'one.png', photo),
+                               ('photos', 'two.jpg', photo[::-1]), ('audio', 'clip.ogg', audio)])
+        saved, store = run_upload(tmp, body)
+        assert len(saved['photo']) == 2 and len(saved['audio']) == 1
+        assert saved['photo'][0]['url'].endswith('.png') and saved['audio'][0]['url'].endswith('.ogg')
+        with open(os.path.join(tmp, saved['audio'][0]['filename']), 'rb') as f:
+            assert f.read() == audio
+        assert sorted(m['size'] for m in store.for_alert('a1')) == [5000, 5000, 12000]
+        assert not [name for name in os.listdir(tmp) if name.endswith('.part')]
+
+
+def test_oversized_file_is_rejected_and_removed():
+    with tempfile.TemporaryDirectory() as tmp:
+        body = multipart_body([('photos', 'big.jpg', os.urandom(20000))])
+        try:
+            run_upload(tmp, body, max_bytes=10000)
+            assert False, 'expected MediaTooLarge'
+        except media_service.MediaTooLarge:
+            pass
+        assert [name for name in os.listdir(tmp) if not name.startswith('media.sqlite3')] == []
+
+
+def test_truncated_body_is_rejected():
+    with tempfile.TemporaryDirectory() as tmp:
+        body = multipart_body([('photos', 'p.jpg', os.urandom(3000))])[:2000]
+        try:
+            run_upload(tmp, body)
+            assert False, 'expected ValueError'
+        except ValueError:
+            pass
+        assert [name for name in os.listdir(tmp) if not name.startswith('media.sqlite3')] == []
+
+
+def test_second_audio_part_is_rejected():
+    with tempfile.TemporaryDirectory() as tmp:
+        # the response has room for one audio URL: a second clip must not be stored silently
+        body = multipart_body([('audio', 'one.ogg', os.urandom(3000)), ('audio', 'two.ogg', os.urandom(3000))])
+        try:
+            run_upload(tmp, body)
+            assert False, 'expected ValueError'
+        except ValueError:
+            pass
+        assert MediaStore(os.path.join(tmp, 'media.sqlite3')).for_alert('a1') == []
+        assert [name for name in os.listdir(tmp) if not name.startswith('media.sqlite3')] == []
+
+
+def test_failed_upload_rolls_back_stored_files():
+    with tempfile.TemporaryDirectory() as tmp:
+        # the first file is stored and indexed before the second goes over the cap
+        body = multipart_body([('audio', 'ok.ogg', os.urandom(3000)), ('photos', 'big.jpg', os.urandom(20000))])
+        try:
+            run_upload(tmp, body, max_bytes=10000)
+            assert False, 'expected MediaTooLarge'
+        except media_service.MediaTooLarge:
+            pass
+        store = MediaStore(os.path.join(tmp, 'media.sqlite3'))
+        assert store.for_alert('a1') == []
+        assert [name for name in os.listdir(tmp) if not name.startswith('media.sqlite3')] == []
+
+
+def test_disk_failure_with_a_full_queue_raises():
+    class FailingWriter(media_service.MediaWriter):
+        async def _drain(self):
+            # dies (disk full) without ever taking a chunk off the queue
+            await asyncio.sleep(0.01)
+            raise OSError(28, 'No space left on device')
+
+    async def scenario():
+        writer = FailingWriter('audio', 'a1', 'clip.ogg')
+        try:
+            for _ in range(media_service.UPLOAD_QUEUE_CHUNKS * 4):
+                await writer.write(b'x' * 100)
+            await writer.finish()
+            assert False, 'expected OSError'
+        except OSError as e:
+            assert e.errno == 28
+        await writer.abort()
+
+    asyncio.run(asyncio.wait_for(scenario(), timeout=5))
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("TESTING STREAMING MEDIA UPLOAD")
+    print("=" * 60)
+    for name, fn in list(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            fn()
+            print(f"   ✓ {name}")
+    print("=" * 60)
@@ -0,0 +1,70 @@
+"""Exercise photo display/thumbnail renditions (skipped checks when Pillow is missing).
+Run with: python tools/test_photo_renditions.py  (or pytest tools/test_photo_renditions.py)
+"""
+import asyncio
+import base64
+import io
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from backend import media_service
+from media_test_helpers import scratch_media
+
+
+def jpeg_data_url(width, height):
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), (200, 30, 30)).save(buffer, 'JPEG', quality=95)
+    return 'data:image/jpeg;base64,' + base64.b64encode(buffer.getvalue()).decode()
+
+
+def test_save_photo_returns_bounded_renditions():
+    if media_service.Image is None:
+        return
+    from PIL import Image
+    with tempfile.TemporaryDirectory() as tmp:
+        with scratch_media(tmp):
+            info = asyncio.run(media_service.save_photo(jpeg_data_url(4000, 3000), 'a1'))
+        assert info['thumbnail_url'].endswith('_thumb.jpg') and info['display_url'].endswith('_display.jpg')
+        with Image.open(os.path.join(tmp, os.path.basename(info['thumbnail_url']))) as thumb:
+            assert max(thumb.size) == media_service.PHOTO_RENDITIONS['photo_thumbnail'][1]
+        with Image.open(os.path.join(tmp, os.path.basename(info['display_url']))) as display:
+            assert display.size == (1600, 1200)
+
+
+
+def test_renditions_are_shared_by_identical_photos():
+    if media_service.Image is None:
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        photo = jpeg_data_url(800, 600)
+
+        async def uploads():
+            return await media_service.save_photo(photo, 'a1'), await media_service.save_photo(photo, 'a2')
+
+        with scratch_media(tmp):
+            first, second = asyncio.run(uploads())
+        assert first['thumbnail_url'] == second['thumbnail_url']
+        assert len([name for name in os.listdir(tmp) if name.endswith('.jpg')]) == 3
+
+
+def test_unreadable_photo_falls_back_to_original():
+    with tempfile.TemporaryDirectory() as tmp:
+        data = base64.b64encode(b'not really a jpeg').decode()
+        with scratch_media(tmp):
+            info = asyncio.run(media_service.save_photo(data, 'a1'))
+        assert info['thumbnail_url'] == info['display_url'] == info['url']
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("TESTING PHOTO RENDITIONS")
+    print("=" * 60)
+    for name, fn in list(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            fn()
+            print(f"   ✓ {name}")
+    print("=" * 60)
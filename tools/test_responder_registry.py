@@ -0,0 +1,81 @@
+"""Check ResponderRegistry.nearest() against a brute-force haversine scan.
+Run with: python tools/test_responder_registry.py  (or pytest tools/test_responder_registry.py)
+"""
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.responder_registry import ResponderRegistry
+from backend.utils import haversine_distance
+
+
+def brute_force(responders, lat, lng, k, max_distance_m):
+    scored = sorted((haversine_distance(lat, lng, r['last_location']['lat'], r['last_location']['lng']), r['id'])
+                    for r in responders if r['status'] == 'available')
+    return [rid for dist, rid in scored if dist <= max_distance_m][:k]
+
+
+def make_registry(points, seed=7):
+    random.seed(seed)
+    registry = ResponderRegistry()
+    responders = []
+    for i, (lat, lng) in enumerate(points):
+        responder = {'id': f'r{i}', 'status': random.choice(['available'] * 4 + ['busy']),
+                     'last_location': {'lat': lat, 'lng': lng}}
+        responders.append(responder)
+        registry.upsert(dict(responder))
+    return registry, responders
+
+
+def check(registry, responders, queries, ks, radii):
+    for lat, lng in queries:
+        for k in ks:
+            for max_distance_m in radii:
+                found = registry.nearest(lat, lng, k=k, max_distance_m=max_distance_m)
+                assert [r['id'] for r, _ in found] == brute_force(responders, lat, lng, k, max_distance_m)
+                for r, dist in found:
+                    loc = r['last_location']
+                    assert abs(dist - haversine_distance(lat, lng, loc['lat'], loc['lng'])) < 1e-6
+
+
+def test_dense_city_matches_brute_force():
+    random.seed(1)
+    points = [(12.9 + random.random() * 0.2, 77.5 + random.random() * 0.2) for _ in range(2000)]
+    registry, responders = make_registry(points)
+    queries = [(12.9 + random.random() * 0.2, 77.5 + random.random() * 0.2) for _ in range(15)] + [(13.3, 77.9)]
+    check(registry, responders, queries, ks=(1, 5, 40), radii=(500.0, 5000.0, 50000.0))
+
+
+def test_sparse_and_far_matches_brute_force():
+    random.seed(2)
+    # small clusters hundreds of km apart, queried from empty country in between
+    points = [(lat + random.gauss(0, 0.05), lng + random.gauss(0, 0.05))
+              for lat, lng in ((23.0, 77.4), (19.0, 72.8), (13.0, 80.2)) for _ in range(150)]
+    registry, responders = make_registry(points)
+    queries = [(13.0, 77.5), (21.0, 75.0), (23.0, 77.4), (28.6, 77.2)]
+    check(registry, responders, queries, ks=(1, 20), radii=(50000.0, 400000.0, 1500000.0))
+
+
+def test_small_registry_scan_and_status_changes():
+    registry, responders = make_registry([(12.97 + i * 0.001, 77.59) for i in range(10)])
+    check(registry, responders, [(12.97, 77.59)], ks=(3, 20), radii=(2000.0,))
+    for r in responders[:5]:
+        registry.set_status(r['id'], 'busy')
+        r['status'] = 'busy'
+    registry.remove('r9')
+    responders = responders[:9]
+    check(registry, responders, [(12.97, 77.59)], ks=(3, 20), radii=(2000.0,))
+    assert registry.nearest(12.97, 77.59, k=0) == []
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("TESTING RESPONDER REGISTRY")
+    print("=" * 60)
+    for name, fn in list(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            fn()
+            print(f"   ✓ {name}")
+    print("=" * 60)
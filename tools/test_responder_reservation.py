@@ -0,0 +1,239 @@
+"""Exercise atomic responder reservation and the assignment retry path.
+Run with: python tools/test_responder_reservation.py  (or pytest tools/test_responder_reservation.py)
+"""
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import sys
+from collections import Counter
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.batch_assign import candidate_eta_matrix, plan_assignments, reserve_assignments
+from backend.responder_registry import ResponderRegistry
+from backend.responder_reservation import ResponderReservations, HEARTBEAT_SQL
+
+
+def make_registry(n, seed=5):
+    random.seed(seed)
+    registry = ResponderRegistry()
+    for i in range(n):
+        registry.upsert({'id': f'r{i}', 'status': 'available',
+                         'last_location': {'lat': 12.9 + random.random() * 0.1, 'lng': 77.55 + random.random() * 0.1}})
+    return registry
+
+
+def test_reservation_is_exclusive_until_released():
+    registry = make_registry(3)
+    reservations = ResponderReservations(registry=registry)
+
+    async def scenario():
+        assert await reservations.reserve('r0', 'a1')
+        assert not await reservations.reserve('r0', 'a2')
+        assert registry.get('r0')['status'] == 'busy'
+        assert all(r['id'] != 'r0' for r, _ in registry.nearest(12.95, 77.6, k=3))
+        # only the alert holding the reservation releases it
+        await reservations.release('r0', 'a2')
+        assert reservations.holds('r0')
+        await reservations.release('r0', 'a1')
+        assert registry.get('r0')['status'] == 'available'
+        assert await reservations.reserve('r0', 'a2')
+
+    asyncio.run(scenario())
+    assert reservations.stats() == {'held': 1, 'reserved': 2, 'lost': 1}
+
+
+def test_lost_reservation_falls_back_to_next_best():
+    taken = {1}
+    attempts = []
+
+    async def reserve(i, j):
+        attempts.append((i, j))
+        return j not in taken
+
+    etas = [[30, 10, 20, 40]]
+    pairs = asyncio.run(reserve_assignments([(0, 1)], etas, [3], reserve))
+    assert pairs == [(0, 2)]
+    assert attempts == [(0, 1), (0, 2)]
+
+
+def test_concurrent_batches_never_double_assign():
+    registry = make_registry(60)
+    reservations = ResponderReservations(registry=registry)
+    assigned = []
+
+    async def worker(worker_id, alerts):
+        # each worker plans from its own snapshot of the registry, like separate instances do
+        locs = [a['location'] for a in alerts]
+        candidates = [[dict(r) for r, _ in registry.nearest(loc['lat'], loc['lng'], k=10)] for loc in locs]
+        responders, etas = await candidate_eta_matrix(locs, candidates)
+        await asyncio.sleep(random.random() * 0.01)
+
+        async def reserve(i, j):
+            await asyncio.sleep(0)
+            return await reservations.reserve(responders[j]['id'], alerts[i]['id'])
+
+        pairs = plan_assignments(etas, [a['severity'] for a in alerts])
+        for i, j in await reserve_assignments(pairs, etas, [a['severity'] for a in alerts], reserve):
+            assigned.append((alerts[i]['id'], responders[j]['id']))
+
+    async def scenario():
+        random.seed(11)
+        workers = []
+        for w in range(8):
+            alerts = [{'id': f'w{w}a{i}', 'severity': random.randint(1, 5),
+                       'location': {'lat': 12.95 + random.gauss(0, 0.01), 'lng': 77.6 + random.gauss(0, 0.01)}}
+                      for i in range(10)]
+            workers.append(worker(w, alerts))
+        await asyncio.gather(*workers)
+
+    asyncio.run(scenario())
+    per_responder = Counter(responder for _, responder in assigned)
+    assert assigned
+    # the workers' plans did collide; the reservations resolved every collision
+    assert reservations.lost > 0
+    assert max(per_responder.values()) == 1
+    assert len({alert for alert, _ in assigned}) == len(assigned)
+
+
+class SQLiteDatabase:
+    """The reservation and heartbeat statements run as written, on SQLite instead of Postgres."""
+
+    def __init__(self):
+        self.conn = sqlite3.connect(':memory:', isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.create_function('now', 0, lambda: datetime.utcnow().isoformat(' '))
+        self.conn.executescript("""
+            CREATE TABLE responders (id TEXT PRIMARY KEY, user_id TEXT, responder_type TEXT, status TEXT,
+                                     last_location TEXT, reserved_for TEXT, reserved_until TIMESTAMP,
+                                     created_at TIMESTAMP, updated_at TIMESTAMP);
+            CREATE TABLE alerts (id TEXT PRIMARY KEY, assigned_to TEXT, status TEXT);
+        """)
+
+    async def fetch_one(self, query, values=None):
+        return self.conn.execute(query, values or {}).fetchone()
+
+    async def execute(self, query, values=None):
+        self.conn.execute(query, values or {})
+
+    def status(self, rid):
+        return self.conn.execute('SELECT status FROM responders WHERE id = ?', (rid,)).fetchone()[0]
+
+
+def test_heartbeat_on_another_instance_keeps_a_db_reservation():
+    database = SQLiteDatabase()
+    # two instances sharing the database, each with its own registry
+    first = ResponderReservations(database, make_registry(2))
+    second = ResponderReservations(database, make_registry(2))
+
+    async def heartbeat(rid):
+        # the second instance does not hold the reservation, so it reports 'available' as sent
+        await database.execute(HEARTBEAT_SQL, values={'id': rid, 'user_id': None, 'responder_type': 'volunteer',
+                                                      'status': 'available',
+                                                      'last_location': json.dumps({'lat': 12.9, 'lng': 77.6})})
+
+    async def scenario():
+        for rid in ('r0', 'r1'):
+            await heartbeat(rid)
+        assert await first.reserve('r0', 'a1')
+        # heartbeat lands before assign_responder has written assigned_to
+        await heartbeat('r0')
+        assert database.status('r0') == 'busy'
+        assert not await second.reserve('r0', 'a2')
+        # once assigned, the active alert keeps it busy after the hold runs out
+        database.conn.execute("INSERT INTO alerts VALUES ('a1', 'r0', 'assigned')")
+        database.conn.execute("UPDATE responders SET reserved_until = ? WHERE id = 'r0'",
+                              (datetime.utcnow() - timedelta(seconds=1),))
+        await heartbeat('r0')
+        assert database.status('r0') == 'busy'
+        # released on resolve: available again for anyone
+        database.conn.execute("UPDATE alerts SET status = 'resolved'")
+        await first.release('r0', 'a1')
+        await heartbeat('r0')
+        assert await second.reserve('r0', 'a2')
+
+    asyncio.run(scenario())
+
+
+def test_expired_hold_frees_a_reservation_that_was_never_assigned():
+    database = SQLiteDatabase()
+    reservations = ResponderReservations(database, make_registry(1), hold=-1)
+
+    async def scenario():
+        await database.execute(HEARTBEAT_SQL, values={'id': 'r0', 'user_id': None, 'responder_type': 'volunteer',
+                                                      'status': 'available', 'last_location': None})
+        assert await reservations.reserve('r0', 'a1')
+        # the reserving process died before assigning: the next heartbeat frees the responder
+        await database.execute(HEARTBEAT_SQL, values={'id': 'r0', 'user_id': None, 'responder_type': 'volunteer',
+                                                      'status': 'available', 'last_location': None})
+        assert database.status('r0') == 'available'
+
+    asyncio.run(scenario())
+
+
+def available_heartbeat(database, rid):
+    return database.execute(HEARTBEAT_SQL, values={'id': rid, 'user_id': None, 'responder_type': 'volunteer',
+                                                   'status': 'available', 'last_location': None})
+
+
+def test_release_for_another_alert_leaves_the_responder_reserved():
+    database = SQLiteDatabase()
+    first = ResponderReservations(database, make_registry(1))
+    second_registry = make_registry(1)
+    second = ResponderReservations(database, second_registry)
+
+    async def scenario():
+        await available_heartbeat(database, 'r0')
+        assert await first.reserve('r0', 'a1')
+        # the second instance never held r0; releasing it for a2 must not free it
+        await second.release('r0', 'a2')
+        assert database.status('r0') == 'busy'
+        assert second_registry.get('r0')['status'] == 'busy'
+        assert not await second.reserve('r0', 'a3')
+        await first.release('r0', 'a1')
+        assert database.status('r0') == 'available'
+
+    asyncio.run(scenario())
+
+
+def test_decline_of_an_alert_not_held_keeps_the_responder_busy():
+    from fastapi import HTTPException
+    from backend import app as app_module
+
+    database = SQLiteDatabase()
+    database.conn.execute("INSERT INTO alerts VALUES ('a2', 'r9', 'assigned')")
+    reservations = ResponderReservations(database, make_registry(1))
+    other_instance = ResponderReservations(database, make_registry(1))
+
+    async def scenario():
+        await available_heartbeat(database, 'r0')
+        assert await other_instance.reserve('r0', 'a1')
+        for alert_id, code in (('a2', 403), ('missing', 404)):
+            try:
+                await app_module.responder_decline('r0', {'alert_id': alert_id})
+            except HTTPException as e:
+                assert e.status_code == code
+            else:
+                raise AssertionError('decline of an alert not assigned to r0 succeeded')
+        assert database.status('r0') == 'busy'
+
+    saved = app_module.database, app_module.responder_reservations
+    app_module.database, app_module.responder_reservations = database, reservations
+    try:
+        asyncio.run(scenario())
+    finally:
+        app_module.database, app_module.responder_reservations = saved
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("TESTING RESPONDER RESERVATION")
+    print("=" * 60)
+    for name, fn in list(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            fn()
+            print(f"   ✓ {name}")
+    print("=" * 60)
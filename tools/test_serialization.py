@@ -0,0 +1,104 @@
+"""Check the shared row encoder and orjson rendering against a plain json.dumps reference.
+Run with: python tools/test_serialization.py  (or pytest tools/test_serialization.py)
+"""
+import json
+import os
+import sys
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from backend import serialization
+from backend.serialization import encode_row, encode_rows, dumps, JSON_COLUMNS
+
+
+class Record:
+    """Shaped like the rows the databases library returns."""
+
+    def __init__(self, mapping):
+        self._mapping = mapping
+
+
+class DriverUUID(uuid.UUID):
+    """Stands in for asyncpg's UUID subclass."""
+
+
+def reference(row):
+    """What the handlers produced before the shared encoder: convert by hand, then json.dumps."""
+    out = {}
+    for key, value in row.items():
+        if isinstance(value, (datetime, date)):
+            value = value.isoformat()
+        elif isinstance(value, uuid.UUID):
+            value = str(value)
+        elif isinstance(value, Decimal):
+            value = float(value)
+        elif isinstance(value, str) and key in JSON_COLUMNS:
+            try:
+                value = json.loads(value)
+            except ValueError:
+                pass
+        out[key] = value
+    return json.dumps(out)
+
+
+def sample_rows():
+    ist = timezone(timedelta(hours=5, minutes=30))
+    alert_id = uuid.UUID('12345678-1234-5678-1234-567812345678')
+    return [
+        {'id': alert_id, 'user_id': DriverUUID(int=7), 'type': 'medical', 'status': 'pending',
+         'location': '{"lat": 12.97, "lng": 77.59, "address": "MG Road → Gate 2"}',
+         'attachments': '[]', 'route_trace': None, 'description': 'chest pain "severe"',
+         'created_at': datetime(2026, 3, 1, 10, 15, 30, 123456),
+         'updated_at': datetime(2026, 3, 1, 10, 15, 30, tzinfo=timezone.utc),
+         'resolved_at': datetime(2026, 3, 1, 16, 0, tzinfo=ist), 'escalation_level': 2,
+         'severity': Decimal('3.5'), 'verified': True},
+        {'id': str(alert_id), 'contact': 'not json', 'metadata': '{"tags": ["a", "b"]}',
+         'birthday': date(1990, 5, 17), 'score': 0.1, 'notes': None},
+    ]
+
+
+def test_encoded_rows_render_like_json_dumps():
+    for row in sample_rows():
+        for source in (row, Record(row)):
+            encoded = encode_row(source)
+            assert json.loads(dumps(encoded)) == json.loads(reference(row))
+            # and encoding is idempotent on already-encoded rows
+            assert json.loads(dumps(encode_row(json.loads(dumps(encoded))))) == json.loads(reference(row))
+    assert encode_row(None) is None
+    assert [json.loads(dumps(r)) for r in encode_rows(sample_rows())] == [json.loads(reference(r)) for r in sample_rows()]
+
+
+def test_json_columns_are_parsed_once():
+    encoded = encode_row(sample_rows()[0])
+    assert encoded['location']['address'] == 'MG Road → Gate 2'
+    assert encoded['attachments'] == [] and encoded['route_trace'] is None
+    # text that is not JSON is passed through, and only JSON columns are parsed
+    encoded = encode_row({'contact': 'not json', 'description': '{"lat": 1}'})
+    assert encoded == {'contact': 'not json', 'description': '{"lat": 1}'}
+
+
+def test_stdlib_fallback_writes_the_same_document():
+    payload = {'alerts': [encode_row(r) for r in sample_rows()], 'count': 2, 1: 'non-str key'}
+    fast = dumps(payload)
+    saved = serialization.orjson
+    serialization.orjson = None
+    try:
+        slow = dumps(payload)
+    finally:
+        serialization.orjson = saved
+    assert json.loads(fast) == json.loads(slow)
+    assert json.loads(slow)['1'] == 'non-str key'
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("TESTING SERIALIZATION")
+    print("=" * 60)
+    for name, fn in list(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            fn()
+            print(f"   ✓ {name}")
+    print("=" * 60)
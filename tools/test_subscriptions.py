@@ -0,0 +1,168 @@
+"""Check websocket subscription routing: the index must reach exactly the clients a full filter scan would.
+Run with: python tools/test_subscriptions.py  (or pytest tools/test_subscriptions.py)
+"""
+import asyncio
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.alert_store import AlertStore
+from backend.broadcaster import Broadcaster, Subscription, route_for
+
+TYPES = ['medical', 'fire', 'police', 'accident']
+STATUSES = ['pending', 'assigned', 'en_route', 'resolved']
+USERS = ['u1', 'u2', 'u3']
+
+
+class FakeSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, text):
+        self.sent.append(text)
+
+    async def close(self, code=1000):
+        pass
+
+
+def routed(broadcaster, route):
+    """Clients the index delivers to."""
+    return {c for c in broadcaster._candidates(route) if c.subscription.matches(route)}
+
+
+def scanned(broadcaster, route):
+    """Clients a filter over every connection would deliver to."""
+    return {c for c in broadcaster.clients if c.subscription.matches(route)}
+
+
+def random_subscription(rng):
+    params = {}
+    if rng.random() < 0.4:
+        params['types'] = ','.join(rng.sample(TYPES, rng.randint(1, 2)))
+    if rng.random() < 0.4:
+        params['statuses'] = ','.join(rng.sample(STATUSES, rng.randint(1, 2)))
+    shape = rng.random()
+    if shape < 0.25:
+        lat, lng = 12.8 + rng.random() * 0.4, 77.4 + rng.random() * 0.4
+        params['bbox'] = f'{lat},{lng},{lat + rng.random() * 0.3},{lng + rng.random() * 0.3}'
+    elif shape < 0.5:
+        params['near'] = f'{12.8 + rng.random() * 0.4},{77.4 + rng.random() * 0.4}'
+        params['radius_m'] = str(rng.choice([500, 5000, 20000]))
+    elif shape < 0.55:
+        params['bbox'] = '-80,-170,80,170'  # too many cells to index
+    if rng.random() < 0.2:
+        params['scope'] = 'own'
+    return Subscription.from_params(params, user_id=rng.choice(USERS))
+
+
+def random_route(rng):
+    # deletions and flat status messages arrive without some attributes
+    route = {}
+    if rng.random() < 0.8:
+        route['type'] = rng.choice(TYPES)
+    if rng.random() < 0.8:
+        route['status'] = rng.choice(STATUSES)
+    if rng.random() < 0.8:
+        route['user_id'] = rng.choice(USERS)
+    if rng.random() < 0.8:
+        route['lat'] = 12.7 + rng.random() * 0.6
+        route['lng'] = 77.3 + rng.random() * 0.6
+    return route
+
+
+def test_filters_match_each_attribute():
+    sub = Subscription.from_params({'types': 'medical,fire', 'statuses': 'pending',
+                                    'near': '12.97,77.59', 'radius_m': '1000', 'scope': 'own'}, user_id='u1')
+    here = {'type': 'medical', 'status': 'pending', 'user_id': 'u1', 'lat': 12.971, 'lng': 77.591}
+    assert sub.matches(here)
+    assert not sub.matches(dict(here, type='police'))
+    assert not sub.matches(dict(here, status='resolved'))
+    assert not sub.matches(dict(here, user_id='u2'))
+    assert not sub.matches(dict(here, lat=12.99))  # inside the bbox, outside the radius
+    # attributes a message does not carry never exclude it
+    assert sub.matches({'status': 'pending'}) and sub.matches({})
+    assert Subscription.from_params({'bbox': '12.9,77.5,13.0,77.6'}).matches({'lat': 12.95, 'lng': 77.55})
+    assert not Subscription.from_params({'bbox': '12.9,77.5,13.0,77.6'}).matches({'lat': 13.05, 'lng': 77.55})
+    # scope=own without a user id is not a user filter
+    assert Subscription.from_params({'scope': 'own'}).user_id is None
+
+
+def test_index_matches_full_scan():
+    rng = random.Random(5)
+
+    async def scenario():
+        broadcaster = Broadcaster()
+        for _ in range(300):
+            broadcaster.register(FakeSocket(), random_subscription(rng))
+        for _ in range(500):
+            route = random_route(rng)
+            assert routed(broadcaster, route) == scanned(broadcaster, route)
+        # re-subscribing moves a client between index buckets
+        for client in rng.sample(sorted(broadcaster.clients, key=id), 100):
+            broadcaster.subscribe(client, random_subscription(rng))
+        for client in rng.sample(sorted(broadcaster.clients, key=id), 50):
+            broadcaster.unregister(client)
+        for _ in range(500):
+            route = random_route(rng)
+            assert routed(broadcaster, route) == scanned(broadcaster, route)
+        await broadcaster.close()
+
+    asyncio.run(scenario())
+
+
+def test_route_from_alert_payload():
+    alert = {'id': 'a1', 'type': 'fire', 'status': 'pending', 'user_id': 42,
+             'location': '{"lat": 12.97, "lng": 77.59}'}
+    assert route_for(alert) == {'type': 'fire', 'status': 'pending', 'user_id': '42', 'lat': 12.97, 'lng': 77.59}
+    assert route_for({'location': {'lat': None, 'lng': 77.5}}) == {}
+
+
+def test_flat_status_and_delete_messages_route_by_the_stored_alert():
+    from backend import app as app_module
+
+    store = AlertStore()
+    store.put('a1', {'id': 'a1', 'type': 'medical', 'status': 'assigned', 'user_id': 'u1',
+                     'location': {'lat': 12.97, 'lng': 77.59}})
+    saved = app_module.ALERTS
+    app_module.ALERTS = store
+    try:
+        deleted = app_module.alert_route({'type': 'alert_deleted', 'alert_id': 'a1'})
+        status = app_module.alert_route({'type': 'alert_status_changed', 'alert_id': 'a1', 'new_status': 'resolved'})
+        unknown = app_module.alert_route({'type': 'alert_deleted', 'alert_id': 'gone'})
+        nested = app_module.alert_route({'type': 'alert_status_changed', 'alert_id': 'a1',
+                                         'alert': {'id': 'a1', 'type': 'medical'}, 'new_status': 'en_route'})
+    finally:
+        app_module.ALERTS = saved
+    # the message type is never mistaken for the alert type
+    assert deleted == {'type': 'medical', 'status': 'assigned', 'user_id': 'u1', 'lat': 12.97, 'lng': 77.59}
+    assert status['status'] == 'resolved' and status['type'] == 'medical'
+    assert unknown == {}
+    assert nested['status'] == 'en_route' and nested['user_id'] == 'u1'
+
+    async def scenario():
+        broadcaster = Broadcaster()
+        medical = broadcaster.register(FakeSocket(), Subscription.from_params({'types': 'medical'}))
+        fire = broadcaster.register(FakeSocket(), Subscription.from_params({'types': 'fire'}))
+        resolved = broadcaster.register(FakeSocket(), Subscription.from_params({'statuses': 'resolved'}))
+        own = broadcaster.register(FakeSocket(), Subscription.from_params({'scope': 'own'}, user_id='u2'))
+        far = broadcaster.register(FakeSocket(), Subscription.from_params({'near': '28.6,77.2', 'radius_m': '5000'}))
+        assert routed(broadcaster, deleted) == {medical}
+        assert routed(broadcaster, status) == {medical, resolved}
+        # nothing known about the alert: every subscriber hears of the deletion
+        assert routed(broadcaster, unknown) == {medical, fire, resolved, own, far}
+        await broadcaster.close()
+
+    asyncio.run(scenario())
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("TESTING SUBSCRIPTIONS")
+    print("=" * 60)
+    for name, fn in list(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            fn()
+            print(f"   ✓ {name}")
+    print("=" * 60)
@@ -0,0 +1,89 @@
+"""Exercise the cached users repository: single parse, mtime reloads and saves.
+Run with: python tools/test_users_repository.py  (or pytest tools/test_users_repository.py)
+"""
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.users_repository import UsersRepository
+
+DEMO = {'+910000000001': {'id': 'demo-1', 'role': 'admin'}}
+
+
+def write_users(path, users, mtime):
+    with open(path, 'w') as f:
+        json.dump(users, f)
+    os.utime(path, (mtime, mtime))
+
+
+def test_lookups_do_not_reread_the_file():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'users.json')
+        write_users(path, {'+911': {'id': 'u1'}}, 1000)
+        repo = UsersRepository(path, defaults=DEMO, check_interval=3600)
+        assert repo.get('+911') == {'id': 'u1'}
+        os.remove(path)
+        # still served from memory; the next stat is an hour away
+        assert repo.get('+911') == {'id': 'u1'}
+        assert repo.get('+910000000001')['role'] == 'admin'
+
+
+def test_external_edit_is_picked_up_by_mtime():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'users.json')
+        write_users(path, {'+911': {'id': 'u1'}}, 1000)
+        repo = UsersRepository(path, defaults=DEMO, check_interval=0)
+        assert repo.get('+912') is None
+        write_users(path, {'+911': {'id': 'u1'}, '+912': {'id': 'u2'},
+                           '+910000000001': {'id': 'evil', 'role': 'citizen'}}, 2000)
+        assert repo.get('+912') == {'id': 'u2'}
+        # demo users still take precedence over the file
+        assert repo.get('+910000000001')['id'] == 'demo-1'
+
+
+def test_writes_are_kept_across_reload_and_saved_atomically():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'users.json')
+        repo = UsersRepository(path, defaults=DEMO, check_interval=0)
+        repo['+913'] = {'id': 'u3'}
+        write_users(path, {'+914': {'id': 'u4'}}, 3000)
+        assert repo.get('+913') == {'id': 'u3'} and repo.get('+914') == {'id': 'u4'}
+        assert repo.save() and not repo.save()
+        with open(path) as f:
+            assert set(json.load(f)) == {'+910000000001', '+913', '+914'}
+        assert not os.path.exists(path + '.tmp')
+        assert UsersRepository(path).get('+913') == {'id': 'u3'}
+
+
+def test_reload_keeps_newer_file_entries_over_stale_memory():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'users.json')
+        write_users(path, {'+915': {'id': 'u5', 'name': 'old'}, '+916': {'id': 'u6'}}, 1000)
+        repo = UsersRepository(path, check_interval=0)
+        assert repo.get('+915')['name'] == 'old'
+        repo['+916'] = {'id': 'u6', 'name': 'written here'}
+        # another worker edits a different user, then this one reloads and saves
+        write_users(path, {'+915': {'id': 'u5', 'name': 'new'}, '+916': {'id': 'u6'}}, 2000)
+        assert repo.get('+915')['name'] == 'new'
+        assert repo.get('+916')['name'] == 'written here'
+        repo['+917'] = {'id': 'u7'}
+        write_users(path, {'+915': {'id': 'u5', 'name': 'newer'}, '+916': {'id': 'u6'}}, 3000)
+        assert repo.save()  # the file changed after the last check: merged, not clobbered
+        with open(path) as f:
+            saved = json.load(f)
+        assert saved['+915']['name'] == 'newer'
+        assert saved['+916']['name'] == 'written here' and saved['+917'] == {'id': 'u7'}
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("TESTING USERS REPOSITORY")
+    print("=" * 60)
+    for name, fn in list(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            fn()
+            print(f"   ✓ {name}")
+    print("=" * 60)